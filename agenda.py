@@ -0,0 +1,134 @@
+"""
+Agenda de consultas do lado do cliente:
+- PoliticaAgendamento: a regra de prazo dos triggers de Consulta, validada
+  localmente antes de ir ao banco
+- IndiceAgenda: índice em memória usado por MySQLDB.horarios_livres
+
+O IndiceAgenda guarda, para cada médico, os inícios das consultas numa
+lista ordenada. Como toda consulta dura `duracao` minutos, dois horários
+conflitam quando estão a menos de `duracao` um do outro: checar um horário
+é um bisect. Um médico ocupado em uma clínica está ocupado em todas, então
+o índice é por médico; o schema não tem horário de funcionamento por clínica.
+"""
+
+import bisect
+import threading
+from datetime import date, datetime, time, timedelta
+
+
+class PoliticaAgendamento:
+    """
+    Prazo máximo de agendamento, a mesma regra de tg_verifica_intervalo_agendamento(_upd):
+    o banco recusa quando TIMESTAMPDIFF(DAY, CURDATE(), Data_Hora) > prazo_dias,
+    ou seja, a partir da meia-noite de hoje + prazo_dias + 1.
+    O prazo vem da tabela PoliticaAgendamento, a mesma lida pelos triggers.
+    `defasagem_dias` é CURDATE() do servidor menos a data local na leitura,
+    para que "hoje" seja o mesmo dos triggers quando os fusos diferem.
+    """
+
+    def __init__(self, prazo_dias=60, defasagem_dias=0):
+        self.prazo_dias = prazo_dias
+        self.defasagem_dias = defasagem_dias
+
+    def limite(self, hoje=None):
+        """Primeiro instante fora do prazo."""
+        if hoje is None:
+            hoje = date.today() + timedelta(days=self.defasagem_dias)
+        return datetime.combine(hoje + timedelta(days=self.prazo_dias + 1), time())
+
+    def permite(self, data_hora, hoje=None):
+        return data_hora < self.limite(hoje)
+
+    def mensagem(self):
+        """Mesmo texto do SIGNAL dos triggers."""
+        return f"A consulta só pode ser agendada com no máximo {self.prazo_dias} dias de antecedência."
+
+
+class IndiceAgenda:
+    """
+    Inícios de consulta por médico + grade de atendimento:
+    - duracao: minutos de cada consulta (também o passo da grade)
+    - inicio_expediente/fim_expediente: horas do expediente
+    - dias_semana: dias atendidos, como em date.weekday() (0 = segunda)
+    """
+
+    def __init__(self, duracao=30, inicio_expediente=8, fim_expediente=18, dias_semana=(0, 1, 2, 3, 4)):
+        self.duracao = timedelta(minutes=duracao)
+        self.inicio_expediente = time(inicio_expediente)
+        self.fim_expediente = time(fim_expediente)
+        self.dias_semana = frozenset(dias_semana)
+        self.lock = threading.RLock()
+        self._inicios = {}  # codmed -> [datetime, ...] ordenada, com repetições
+
+    def carregar(self, pares):
+        """Recria o índice a partir de pares (codmed, data_hora)."""
+        with self.lock:
+            inicios = {}
+            for codmed, data_hora in pares:
+                inicios.setdefault(codmed, []).append(data_hora)
+            for lista in inicios.values():
+                lista.sort()
+            self._inicios = inicios
+
+    def adicionar(self, codmed, data_hora):
+        with self.lock:
+            bisect.insort(self._inicios.setdefault(codmed, []), data_hora)
+
+    def remover(self, codmed, data_hora):
+        """Remove uma ocorrência; consultas fora do índice (passadas) são ignoradas."""
+        with self.lock:
+            lista = self._inicios.get(codmed)
+            if not lista:
+                return
+            i = bisect.bisect_left(lista, data_hora)
+            if i < len(lista) and lista[i] == data_hora:
+                del lista[i]
+                if not lista:
+                    del self._inicios[codmed]
+
+    def conflitos(self, codmed, data_hora):
+        """Inícios de consultas do médico que se sobrepõem a uma consulta em `data_hora`."""
+        with self.lock:
+            lista = self._inicios.get(codmed, [])
+            i = bisect.bisect_right(lista, data_hora - self.duracao)
+            j = bisect.bisect_left(lista, data_hora + self.duracao, i)
+            return lista[i:j]
+
+    def _grade(self, inicio, fim):
+        """Horários da grade em [inicio, fim), em ordem."""
+        dia = inicio.date()
+        while True:
+            abertura = datetime.combine(dia, self.inicio_expediente)
+            if abertura >= fim:
+                return
+            if dia.weekday() in self.dias_semana:
+                fechamento = datetime.combine(dia, self.fim_expediente)
+                t = abertura
+                if inicio > t:
+                    # arredonda para cima até o próximo horário da grade
+                    t += -(-(inicio - abertura) // self.duracao) * self.duracao
+                while t + self.duracao <= fechamento and t < fim:
+                    yield t
+                    t += self.duracao
+            dia += timedelta(days=1)
+
+    def proximos_livres(self, codmed, quantidade, inicio, fim):
+        """Os `quantidade` primeiros horários da grade em [inicio, fim) sem conflito."""
+        livres = []
+        with self.lock:
+            lista = self._inicios.get(codmed, [])
+            for t in self._grade(inicio, fim):
+                i = bisect.bisect_right(lista, t - self.duracao)
+                if i < len(lista) and lista[i] < t + self.duracao:
+                    continue
+                livres.append(t)
+                if len(livres) >= quantidade:
+                    break
+        return livres
+
+    def stats(self):
+        with self.lock:
+            return {
+                'medicos': len(self._inicios),
+                'consultas': sum(len(lista) for lista in self._inicios.values()),
+            }
@@ -1,8 +1,12 @@
+import os
 import streamlit as st
 import pandas as pd
 from datetime import datetime, timedelta
 from typing import Dict, Optional
 from db import MySQLDB
+from agenda import PoliticaAgendamento
+import metricas
+import perfil
 
 # ============================================================================
 # CONFIGURAÇÃO STREAMLIT
@@ -20,9 +24,13 @@ st.set_page_config(
 
 @st.cache_resource
 def init_db():
-    """Inicializa a conexão com o banco de dados."""
+    """Inicializa o pool de conexões e o cache de leituras (compartilhados entre sessões)."""
     try:
-        db = MySQLDB()
+        db = MySQLDB(
+            pool_size=int(os.getenv('DB_POOL_SIZE', 10)),
+            cache_ttl=float(os.getenv('DB_CACHE_TTL', 30)),
+            slow_query_ms=float(os.getenv('DB_SLOW_QUERY_MS', 500)),
+        )
         db.connect()
         return db
     except Exception as e:
@@ -34,6 +42,183 @@ def init_db():
 # Inicializa conexão global
 db = init_db()
 
+
+@st.cache_resource
+def init_metricas():
+    """
+    Registro de métricas do processo (Prometheus): duração de cada tela mais
+    as estatísticas do MySQLDB, lidas a cada coleta. METRICS_PORT expõe
+    /metrics por HTTP; METRICS_FILE grava o texto a cada METRICS_FILE_INTERVAL s.
+    """
+    registro = metricas.Registro()
+    if db is not None:
+        registro.adicionar_coletor(lambda: metricas.coletar_mysqldb(db))
+    porta = os.getenv('METRICS_PORT')
+    if porta:
+        metricas.servir_http(registro, int(porta), host=os.getenv('METRICS_HOST', '127.0.0.1'))
+    arquivo = os.getenv('METRICS_FILE')
+    if arquivo:
+        metricas.gravar_periodicamente(registro, arquivo, float(os.getenv('METRICS_FILE_INTERVAL', 15)))
+    return registro
+
+
+registro_metricas = init_metricas()
+
+# ============================================================================
+# PERFIL DE RENDERIZAÇÃO (modo opcional da barra lateral)
+# ============================================================================
+# Sem perfil ativo nesta thread, perfil.etapa() não mede nada.
+PERFIL_DIR = os.getenv('PERFIL_DIR', 'perfis')
+
+
+def dataframe(*args, **kwargs):
+    """pd.DataFrame(...) medido como etapa do perfil de renderização."""
+    with perfil.etapa('DataFrame', 'pd.DataFrame'):
+        return pd.DataFrame(*args, **kwargs)
+
+
+def grafico(fn, dados, **kwargs):
+    """st.*_chart(dados) medido como etapa do perfil de renderização."""
+    with perfil.etapa('gráfico', f"st.{fn.__name__}"):
+        return fn(dados, **kwargs)
+
+
+def _consulta_no_perfil(metodo, sql, inicio, duracao, erro):
+    perfil.registrar('consulta', metodo, inicio, duracao, erro)
+
+# ============================================================================
+# LISTAS DE REFERÊNCIA EM CACHE (compartilhadas entre sessões)
+# ============================================================================
+# Evita que cada rerun refaça as leituras completas das abas Listar de
+# pacientes, médicos e clínicas. Toda escrita bem-sucedida chama invalidar_listas().
+LISTAS_TTL = int(os.getenv('APP_CACHE_TTL', 300))
+
+
+@st.cache_data(ttl=LISTAS_TTL, show_spinner=False)
+def listar_pacientes():
+    return db.get_clientes()
+
+
+@st.cache_data(ttl=LISTAS_TTL, show_spinner=False)
+def listar_medicos():
+    return db.get_medicos()
+
+
+@st.cache_data(ttl=LISTAS_TTL, show_spinner=False)
+def listar_clinicas():
+    return db.get_clinicas()
+
+
+# listas que exibem dados de cada tabela (consultas usam paginação e seletores com busca)
+_LISTAS_POR_TABELA = {
+    'Paciente': (listar_pacientes,),
+    'Medico': (listar_medicos,),
+    'Clinica': (listar_clinicas,),
+    'Consulta': (),
+}
+
+
+def invalidar_listas(*tabelas):
+    """Limpa as listas em cache afetadas por uma escrita em `tabelas`."""
+    for tabela in tabelas:
+        for lista in _LISTAS_POR_TABELA[tabela]:
+            lista.clear()
+
+
+# ============================================================================
+# ABAS SOB DEMANDA
+# ============================================================================
+def abas(rotulos, key):
+    """
+    Substitui st.tabs: st.tabs executa o conteúdo de todas as abas a cada
+    rerun, aqui só a aba ativa roda suas consultas. A aba escolhida fica em
+    st.session_state[key]. Retorna um booleano por rótulo (True = ativa).
+    """
+    ativa = st.radio(
+        key, range(len(rotulos)), format_func=rotulos.__getitem__,
+        horizontal=True, key=key, label_visibility="collapsed"
+    )
+    return [i == ativa for i in range(len(rotulos))]
+
+
+# ============================================================================
+# SELETORES COM BUSCA NO SERVIDOR
+# ============================================================================
+def rotulo_paciente(p):
+    return f"{p['cpf']} - {p['nome']}"
+
+
+def rotulo_medico(m):
+    especialidade = f" ({m['especialidade']})" if m.get('especialidade') else ""
+    return f"{m['codmed']} - {m['nome']}{especialidade}"
+
+
+def rotulo_clinica(c):
+    return f"{c['codcli']} - {c['nome']}"
+
+
+def rotulo_consulta(c):
+    return f"{c['Data_Hora']} | {c['clinica_nome']} ({c['CodCli']}) | {c['medico_nome']} ({c['CodMed']})"
+
+
+def seletor_busca(rotulo, buscar, formatar, key, atual=None, nenhum=None, limite=20):
+    """
+    Seletor com autocompletar: o texto digitado vira uma busca por prefixo
+    indexada no servidor (db.buscar_*) e só os `limite` primeiros resultados
+    chegam ao selectbox. Retorna o registro escolhido, com as chaves reais.
+    - atual: registro exibido como primeira opção (telas de edição); a
+      primeira chave (código ou CPF) o identifica, e ele não se repete nos
+      resultados mesmo que o rótulo da busca traga campos a mais
+    - nenhum: rótulo de uma opção inicial que retorna None (ex.: "Todos")
+    """
+    termo = st.text_input(f"Buscar {rotulo}", key=f"{key}_busca", placeholder="Início do nome ou do código")
+    resultados = buscar(termo, limite=limite)
+    if atual is not None:
+        chave = next(iter(atual))
+        resultados = [atual] + [r for r in resultados if r.get(chave) != atual[chave]]
+    registros = {formatar(r): r for r in resultados}
+    if nenhum is not None:
+        registros = {nenhum: None, **registros}
+    if not registros:
+        st.info("Nenhum resultado para a busca.")
+        return None
+    sel = st.selectbox(f"Selecione {rotulo}", list(registros), key=key)
+    return registros[sel]
+
+
+def seletor_consulta(key, limite=100):
+    """Escolhe uma consulta a partir do paciente: busca o paciente e lista só as consultas dele."""
+    paciente = seletor_busca("paciente", db.buscar_pacientes, rotulo_paciente, key=f"{key}_pac")
+    if not paciente:
+        return None
+    pagina = db.get_pedidos_pagina(limite=limite, cpf=paciente['cpf'])
+    if not pagina['linhas']:
+        st.info("Paciente sem consultas.")
+        return None
+    consultas = {rotulo_consulta(c): c for c in pagina['linhas']}
+    sel = st.selectbox("Selecione consulta", list(consultas), key=key)
+    if pagina['proximo'] is not None:
+        st.caption(f"Mostrando as {limite} primeiras consultas do paciente.")
+    return consultas[sel]
+
+
+def busca_por_nome(tipo, key, limite=20):
+    """
+    Campo de busca aproximada por nome (db.buscar_nomes): aceita partes do nome
+    e erros de digitação. Retorna None se o campo estiver vazio, senão o
+    DataFrame com os resultados ranqueados.
+    """
+    texto = st.text_input("Buscar por nome", key=key, placeholder="Ex: mari silv, fernnda")
+    if not texto.strip():
+        return None
+    resultados = db.buscar_nomes(texto, tipo=tipo, limite=limite)
+    coluna = 'cpf' if tipo == 'paciente' else 'codmed'
+    return dataframe(
+        [{coluna: r['chave'], 'nome': r['nome'], 'relevância': r['score']} for r in resultados],
+        columns=[coluna, 'nome', 'relevância']
+    )
+
+
 # ============================================================================
 # SIMULAÇÃO DE BANCO DE DADOS (em memória, como dicionários/listas)
 # ============================================================================
@@ -343,15 +528,21 @@ def tela_pacientes():
         st.error("❌ Banco de dados não conectado.")
         return
 
-    tab1, tab2, tab3, tab4 = st.tabs(["Listar", "Criar", "Editar", "Deletar"])
+    tab1, tab2, tab3, tab4 = abas(["Listar", "Criar", "Editar", "Deletar"], key="aba_pacientes")
 
     # TAB: LISTAR
-    with tab1:
+    if tab1:
         st.subheader("Lista de Pacientes")
         try:
-            pacientes = db.get_clientes()  # No db.py, pacientes são chamados de clientes
-            if pacientes:
-                df = pd.DataFrame(pacientes)
+            encontrados = busca_por_nome('paciente', key="busca_nome_paciente")
+            pacientes = None if encontrados is not None else listar_pacientes()  # No db.py, pacientes são chamados de clientes
+            if encontrados is not None:
+                if encontrados.empty:
+                    st.info("Nenhum paciente encontrado.")
+                else:
+                    st.dataframe(encontrados, width='stretch', hide_index=True)
+            elif pacientes:
+                df = dataframe(pacientes)
                 st.dataframe(df, width='stretch', hide_index=True)
             else:
                 st.warning("Nenhum paciente cadastrado.")
@@ -359,7 +550,7 @@ def tela_pacientes():
             st.error(f"Erro ao carregar pacientes: {str(e)}")
 
     # TAB: CRIAR
-    with tab2:
+    if tab2:
         st.subheader("Criar Novo Paciente")
         with st.form("form_criar_paciente"):
             cpf = st.text_input("CPF", placeholder="000.000.000-00", max_chars=14)
@@ -373,65 +564,56 @@ def tela_pacientes():
         if submitted:
             try:
                 db.create_cliente(cpf, nome, data_nascimento.isoformat(), genero, telefone, email)
+                invalidar_listas('Paciente')
                 st.success(f"✅ Paciente '{nome}' criado com sucesso!")
                 st.rerun()
             except Exception as e:
                 st.error(f"❌ Erro ao criar paciente: {str(e)}")
 
     # TAB: EDITAR
-    with tab3:
+    if tab3:
         st.subheader("Editar Paciente")
         try:
-            pacientes = db.get_clientes()
-            if pacientes:
-                opcoes = [f"{p['cpf']} - {p['nome']}" for p in pacientes]
-                sel = st.selectbox("Selecione paciente", opcoes, key="sel_editar_pac")
-                cpf_selecionado = sel.split(" - ")[0]
-
-                # Busca o paciente completo
-                paciente = next((p for p in pacientes if p['cpf'] == cpf_selecionado), None)
-
-                if paciente:
-                    with st.form("form_editar_paciente"):
-                        nome = st.text_input("Nome", value=paciente["nome"])
-                        data_nasc = datetime.strptime(str(paciente["data_nascimento"]), "%Y-%m-%d").date()
-                        data_nascimento = st.date_input("Data de Nascimento", value=data_nasc, format="DD/MM/YYYY", min_value=datetime(1900, 1, 1), max_value=datetime.today())
-                        genero = st.selectbox("Gênero", ["M", "F"], index=0 if paciente["genero"] == "M" else 1)
-                        telefone = st.text_input("Telefone", value=paciente["telefone"])
-                        email = st.text_input("E-mail", value=paciente["email"])
-                        submitted = st.form_submit_button("Atualizar")
-
-                    if submitted:
-                        try:
-                            db.update_cliente(cpf_selecionado, nome, data_nascimento.isoformat(), genero, telefone, email)
-                            st.success("✅ Paciente atualizado com sucesso!")
-                            st.rerun()
-                        except Exception as e:
-                            st.error(f"❌ Erro ao atualizar paciente: {str(e)}")
-            else:
-                st.warning("Nenhum paciente para editar.")
+            # O registro vem completo da busca, com a chave real
+            paciente = seletor_busca("paciente", db.buscar_pacientes, rotulo_paciente, key="sel_editar_pac")
+            if paciente:
+                cpf_selecionado = paciente['cpf']
+                with st.form("form_editar_paciente"):
+                    nome = st.text_input("Nome", value=paciente["nome"])
+                    data_nasc = datetime.strptime(str(paciente["data_nascimento"]), "%Y-%m-%d").date()
+                    data_nascimento = st.date_input("Data de Nascimento", value=data_nasc, format="DD/MM/YYYY", min_value=datetime(1900, 1, 1), max_value=datetime.today())
+                    genero = st.selectbox("Gênero", ["M", "F"], index=0 if paciente["genero"] == "M" else 1)
+                    telefone = st.text_input("Telefone", value=paciente["telefone"])
+                    email = st.text_input("E-mail", value=paciente["email"])
+                    submitted = st.form_submit_button("Atualizar")
+
+                if submitted:
+                    try:
+                        db.update_cliente(cpf_selecionado, nome, data_nascimento.isoformat(), genero, telefone, email)
+                        invalidar_listas('Paciente')
+                        st.success("✅ Paciente atualizado com sucesso!")
+                        st.rerun()
+                    except Exception as e:
+                        st.error(f"❌ Erro ao atualizar paciente: {str(e)}")
         except Exception as e:
             st.error(f"Erro ao carregar pacientes: {str(e)}")
 
     # TAB: DELETAR
-    with tab4:
+    if tab4:
         st.subheader("Deletar Paciente")
         try:
-            pacientes = db.get_clientes()
-            if pacientes:
-                opcoes = [f"{p['cpf']} - {p['nome']}" for p in pacientes]
-                sel = st.selectbox("Selecione paciente", opcoes, key="sel_deletar_pac")
-                cpf_selecionado = sel.split(" - ")[0]
+            paciente = seletor_busca("paciente", db.buscar_pacientes, rotulo_paciente, key="sel_deletar_pac")
+            if paciente:
+                cpf_selecionado = paciente['cpf']
 
                 if st.button("🗑️ Deletar Paciente", key="btn_deletar_pac"):
                     try:
                         db.delete_cliente(cpf_selecionado)
+                        invalidar_listas('Paciente')
                         st.success("✅ Paciente deletado com sucesso!")
                         st.rerun()
                     except Exception as e:
                         st.error(f"❌ Erro ao deletar paciente: {str(e)}")
-            else:
-                st.warning("Nenhum paciente para deletar.")
         except Exception as e:
             st.error(f"Erro ao carregar pacientes: {str(e)}")
 
@@ -444,15 +626,21 @@ def tela_medicos():
         st.error("❌ Banco de dados não conectado.")
         return
 
-    tab1, tab2, tab3, tab4 = st.tabs(["Listar", "Criar", "Editar", "Deletar"])
+    tab1, tab2, tab3, tab4 = abas(["Listar", "Criar", "Editar", "Deletar"], key="aba_medicos")
 
     # TAB: LISTAR
-    with tab1:
+    if tab1:
         st.subheader("Lista de Médicos")
         try:
-            medicos = db.get_medicos()
-            if medicos:
-                df = pd.DataFrame(medicos)
+            encontrados = busca_por_nome('medico', key="busca_nome_medico")
+            medicos = None if encontrados is not None else listar_medicos()
+            if encontrados is not None:
+                if encontrados.empty:
+                    st.info("Nenhum médico encontrado.")
+                else:
+                    st.dataframe(encontrados, width='stretch', hide_index=True)
+            elif medicos:
+                df = dataframe(medicos)
                 st.dataframe(df, width='stretch', hide_index=True)
             else:
                 st.warning("Nenhum médico cadastrado.")
@@ -460,7 +648,7 @@ def tela_medicos():
             st.error(f"Erro ao carregar médicos: {str(e)}")
 
     # TAB: CRIAR
-    with tab2:
+    if tab2:
         st.subheader("Criar Novo Médico")
         with st.form("form_criar_medico"):
             codmed = st.text_input("Código do Médico", placeholder="Ex: 1234567", max_chars=7)
@@ -480,62 +668,54 @@ def tela_medicos():
         if submitted:
             try:
                 db.create_medico(codmed, nome, genero, especialidade, telefone, email)
+                invalidar_listas('Medico')
                 st.success(f"✅ Médico '{nome}' criado com sucesso!")
                 st.rerun()
             except Exception as e:
                 st.error(f"❌ Erro ao criar médico: {str(e)}")
 
     # TAB: EDITAR
-    with tab3:
+    if tab3:
         st.subheader("Editar Médico")
         try:
-            medicos = db.get_medicos()
-            if medicos:
-                opcoes = [f"{m['codmed']} - {m['nome']}" for m in medicos]
-                sel = st.selectbox("Selecione médico", opcoes, key="sel_editar_med")
-                codmed_selecionado = sel.split(" - ")[0]
-                medico = db.get_medico_por_id(codmed_selecionado)
-
-                if medico:
-                    with st.form("form_editar_medico"):
-                        nome = st.text_input("Nome", value=medico["nome"])
-                        genero = st.selectbox("Gênero", ["M", "F"], index=0 if medico["genero"] == "M" else 1)
-                        especialidade = st.text_input("Especialidade", value=medico["especialidade"])
-                        telefone = st.text_input("Telefone", value=medico["telefone"])
-                        email = st.text_input("E-mail", value=medico["email"])
-                        submitted = st.form_submit_button("Atualizar")
-
-                    if submitted:
-                        try:
-                            db.update_medico(codmed_selecionado, nome, genero, especialidade, telefone, email)
-                            st.success("✅ Médico atualizado com sucesso!")
-                            st.rerun()
-                        except Exception as e:
-                            st.error(f"❌ Erro ao atualizar médico: {str(e)}")
-            else:
-                st.warning("Nenhum médico para editar.")
+            medico = seletor_busca("médico", db.buscar_medicos, rotulo_medico, key="sel_editar_med")
+            if medico:
+                codmed_selecionado = medico['codmed']
+                with st.form("form_editar_medico"):
+                    nome = st.text_input("Nome", value=medico["nome"])
+                    genero = st.selectbox("Gênero", ["M", "F"], index=0 if medico["genero"] == "M" else 1)
+                    especialidade = st.text_input("Especialidade", value=medico["especialidade"])
+                    telefone = st.text_input("Telefone", value=medico["telefone"])
+                    email = st.text_input("E-mail", value=medico["email"])
+                    submitted = st.form_submit_button("Atualizar")
+
+                if submitted:
+                    try:
+                        db.update_medico(codmed_selecionado, nome, genero, especialidade, telefone, email)
+                        invalidar_listas('Medico')
+                        st.success("✅ Médico atualizado com sucesso!")
+                        st.rerun()
+                    except Exception as e:
+                        st.error(f"❌ Erro ao atualizar médico: {str(e)}")
         except Exception as e:
             st.error(f"Erro ao carregar médicos: {str(e)}")
 
     # TAB: DELETAR
-    with tab4:
+    if tab4:
         st.subheader("Deletar Médico")
         try:
-            medicos = db.get_medicos()
-            if medicos:
-                opcoes = [f"{m['codmed']} - {m['nome']}" for m in medicos]
-                sel = st.selectbox("Selecione médico", opcoes, key="sel_deletar_med")
-                codmed_selecionado = sel.split(" - ")[0]
+            medico = seletor_busca("médico", db.buscar_medicos, rotulo_medico, key="sel_deletar_med")
+            if medico:
+                codmed_selecionado = medico['codmed']
 
                 if st.button("🗑️ Deletar Médico", key="btn_deletar_med"):
                     try:
                         db.delete_medico(codmed_selecionado)
+                        invalidar_listas('Medico')
                         st.success("✅ Médico deletado com sucesso!")
                         st.rerun()
                     except Exception as e:
                         st.error(f"❌ Erro ao deletar médico: {str(e)}")
-            else:
-                st.warning("Nenhum médico para deletar.")
         except Exception as e:
             st.error(f"Erro ao carregar médicos: {str(e)}")
 
@@ -548,15 +728,15 @@ def tela_clinicas():
         st.error("❌ Banco de dados não conectado.")
         return
 
-    tab1, tab2, tab3, tab4 = st.tabs(["Listar", "Criar", "Editar", "Deletar"])
+    tab1, tab2, tab3, tab4 = abas(["Listar", "Criar", "Editar", "Deletar"], key="aba_clinicas")
 
     # TAB: LISTAR
-    with tab1:
+    if tab1:
         st.subheader("Lista de Clínicas")
         try:
-            clinicas = db.get_clinicas()
+            clinicas = listar_clinicas()
             if clinicas:
-                df = pd.DataFrame(clinicas)
+                df = dataframe(clinicas)
                 st.dataframe(df, width='stretch', hide_index=True)
             else:
                 st.warning("Nenhuma clínica cadastrada.")
@@ -564,7 +744,7 @@ def tela_clinicas():
             st.error(f"Erro ao carregar clínicas: {str(e)}")
 
     # TAB: CRIAR
-    with tab2:
+    if tab2:
         st.subheader("Criar Nova Clínica")
         with st.form("form_criar_clinica"):
             codcli = st.text_input("Código da Clínica", placeholder="Ex: 0000001", max_chars=7)
@@ -577,61 +757,53 @@ def tela_clinicas():
         if submitted:
             try:
                 db.create_clinica(codcli, nome, endereco, telefone, email)
+                invalidar_listas('Clinica')
                 st.success(f"✅ Clínica '{nome}' criada com sucesso!")
                 st.rerun()
             except Exception as e:
                 st.error(f"❌ Erro ao criar clínica: {str(e)}")
 
     # TAB: EDITAR
-    with tab3:
+    if tab3:
         st.subheader("Editar Clínica")
         try:
-            clinicas = db.get_clinicas()
-            if clinicas:
-                opcoes = [f"{c['codcli']} - {c['nome']}" for c in clinicas]
-                sel = st.selectbox("Selecione clínica", opcoes, key="sel_editar_cli")
-                codcli_selecionado = sel.split(" - ")[0]
-                clinica = db.get_clinica_por_id(codcli_selecionado)
-
-                if clinica:
-                    with st.form("form_editar_clinica"):
-                        nome = st.text_input("Nome", value=clinica["nome"])
-                        endereco = st.text_input("Endereço", value=clinica["endereco"])
-                        telefone = st.text_input("Telefone", value=clinica["telefone"])
-                        email = st.text_input("E-mail", value=clinica["email"])
-                        submitted = st.form_submit_button("Atualizar")
-
-                    if submitted:
-                        try:
-                            db.update_clinica(codcli_selecionado, nome, endereco, telefone, email)
-                            st.success("✅ Clínica atualizada com sucesso!")
-                            st.rerun()
-                        except Exception as e:
-                            st.error(f"❌ Erro ao atualizar clínica: {str(e)}")
-            else:
-                st.warning("Nenhuma clínica para editar.")
+            clinica = seletor_busca("clínica", db.buscar_clinicas, rotulo_clinica, key="sel_editar_cli")
+            if clinica:
+                codcli_selecionado = clinica['codcli']
+                with st.form("form_editar_clinica"):
+                    nome = st.text_input("Nome", value=clinica["nome"])
+                    endereco = st.text_input("Endereço", value=clinica["endereco"])
+                    telefone = st.text_input("Telefone", value=clinica["telefone"])
+                    email = st.text_input("E-mail", value=clinica["email"])
+                    submitted = st.form_submit_button("Atualizar")
+
+                if submitted:
+                    try:
+                        db.update_clinica(codcli_selecionado, nome, endereco, telefone, email)
+                        invalidar_listas('Clinica')
+                        st.success("✅ Clínica atualizada com sucesso!")
+                        st.rerun()
+                    except Exception as e:
+                        st.error(f"❌ Erro ao atualizar clínica: {str(e)}")
         except Exception as e:
             st.error(f"Erro ao carregar clínicas: {str(e)}")
 
     # TAB: DELETAR
-    with tab4:
+    if tab4:
         st.subheader("Deletar Clínica")
         try:
-            clinicas = db.get_clinicas()
-            if clinicas:
-                opcoes = [f"{c['codcli']} - {c['nome']}" for c in clinicas]
-                sel = st.selectbox("Selecione clínica", opcoes, key="sel_deletar_cli")
-                codcli_selecionado = sel.split(" - ")[0]
+            clinica = seletor_busca("clínica", db.buscar_clinicas, rotulo_clinica, key="sel_deletar_cli")
+            if clinica:
+                codcli_selecionado = clinica['codcli']
 
                 if st.button("🗑️ Deletar Clínica", key="btn_deletar_cli"):
                     try:
                         db.delete_clinica(codcli_selecionado)
+                        invalidar_listas('Clinica')
                         st.success("✅ Clínica deletada com sucesso!")
                         st.rerun()
                     except Exception as e:
                         st.error(f"❌ Erro ao deletar clínica: {str(e)}")
-            else:
-                st.warning("Nenhuma clínica para deletar.")
         except Exception as e:
             st.error(f"Erro ao carregar clínicas: {str(e)}")
 
@@ -644,99 +816,138 @@ def tela_consultas():
         st.error("❌ Banco de dados não conectado.")
         return
 
-    tab1, tab2, tab3, tab4 = st.tabs(["Listar", "Criar", "Editar", "Deletar"])
+    tab1, tab2, tab3, tab4 = abas(["Listar", "Criar", "Editar", "Deletar"], key="aba_consultas")
 
     # TAB: LISTAR
-    with tab1:
+    if tab1:
         st.subheader("Lista de Consultas")
         try:
-            consultas = db.get_pedidos()  # No db.py, consultas são chamadas de pedidos
-            if consultas:
-                df = pd.DataFrame(consultas)
+            col1, col2, col3, col4 = st.columns([2, 2, 2, 1])
+            with col1:
+                sel_cli = seletor_busca("clínica", db.buscar_clinicas, rotulo_clinica, key="lst_cons_cli", nenhum="Todas")
+            with col2:
+                sel_med = seletor_busca("médico", db.buscar_medicos, rotulo_medico, key="lst_cons_med", nenhum="Todos")
+            with col3:
+                data_filtro = st.date_input("Data", value=None, format="DD/MM/YYYY", key="lst_cons_data")
+            with col4:
+                limite = st.selectbox("Por página", [25, 50, 100], key="lst_cons_limite")
+
+            codcli = sel_cli['codcli'] if sel_cli else None
+            codmed = sel_med['codmed'] if sel_med else None
+            data_inicio = datetime.combine(data_filtro, datetime.min.time()) if data_filtro else None
+            data_fim = datetime.combine(data_filtro, datetime.max.time()) if data_filtro else None
+
+            # Filtros novos voltam para a primeira página
+            filtros = (codcli, codmed, data_filtro, limite)
+            if st.session_state.get("lst_cons_filtros") != filtros:
+                st.session_state.lst_cons_filtros = filtros
+                st.session_state.lst_cons_cursor = {}
+
+            # Paginação por keyset: o custo da página não cresce com a tabela
+            pagina = db.get_pedidos_pagina(
+                limite=limite, codcli=codcli, codmed=codmed,
+                data_inicio=data_inicio, data_fim=data_fim,
+                **st.session_state.lst_cons_cursor
+            )
+            if pagina['linhas']:
+                df = dataframe(pagina['linhas'])
                 st.dataframe(df, width='stretch', hide_index=True)
             else:
-                st.warning("Nenhuma consulta cadastrada.")
+                st.warning("Nenhuma consulta encontrada.")
+
+            col_ant, col_prox = st.columns(2)
+            with col_ant:
+                if st.button("◀ Anterior", key="btn_cons_anterior", disabled=pagina['anterior'] is None):
+                    st.session_state.lst_cons_cursor = {'antes': pagina['anterior']}
+                    st.rerun()
+            with col_prox:
+                if st.button("Próxima ▶", key="btn_cons_proxima", disabled=pagina['proximo'] is None):
+                    st.session_state.lst_cons_cursor = {'apos': pagina['proximo']}
+                    st.rerun()
         except Exception as e:
             st.error(f"Erro ao carregar consultas: {str(e)}")
 
     # TAB: CRIAR
-    with tab2:
+    if tab2:
         st.subheader("Criar Nova Consulta")
 
         try:
-            pacientes = db.get_clientes()
-            medicos = db.get_medicos()
-            clinicas = db.get_clinicas()
+            # Buscas fora do form: cada tecla digitada precisa refazer a busca
+            clinica = seletor_busca("clínica", db.buscar_clinicas, rotulo_clinica, key="criar_cons_cli")
+            medico = seletor_busca("médico", db.buscar_medicos, rotulo_medico, key="criar_cons_med")
+            paciente = seletor_busca("paciente", db.buscar_pacientes, rotulo_paciente, key="criar_cons_pac")
 
-            if not pacientes or not medicos or not clinicas:
-                st.warning("⚠️ É necessário ter pelo menos um paciente, um médico e uma clínica cadastrados.")
+            if not paciente or not medico or not clinica:
+                st.warning("⚠️ Selecione um paciente, um médico e uma clínica.")
             else:
-                with st.form("form_criar_consulta"):
-                    opcoes_cli = [f"{c['codcli']} - {c['nome']}" for c in clinicas]
-                    sel_cli = st.selectbox("Selecione clínica", opcoes_cli)
-                    codcli = sel_cli.split(" - ")[0]
+                codcli = clinica['codcli']
+                codmed = medico['codmed']
+                cpf = paciente['cpf']
+
+                # horários livres do médico (índice de agenda em memória)
+                manual = "Escolher data e hora"
+                livres = db.horarios_livres(codmed, quantidade=10)
+                opcoes = [manual] + [h.strftime("%d/%m/%Y %H:%M") for h in livres]
+                escolha = st.selectbox("Próximos horários livres do médico", opcoes, key="criar_cons_horario")
+                if not livres:
+                    st.info("Nenhum horário livre no prazo de agendamento.")
 
-                    opcoes_med = [f"{m['codmed']} - {m['nome']} ({m['especialidade']})" for m in medicos]
-                    sel_med = st.selectbox("Selecione médico", opcoes_med)
-                    codmed = sel_med.split(" - ")[0]
-
-                    opcoes_pac = [f"{p['cpf']} - {p['nome']}" for p in pacientes]
-                    sel_pac = st.selectbox("Selecione paciente", opcoes_pac)
-                    cpf = sel_pac.split(" - ")[0]
-
-                    data_consulta = st.date_input("Data da consulta")
-                    hora_consulta = st.time_input("Hora da consulta")
+                with st.form("form_criar_consulta"):
+                    if escolha == manual:
+                        data_consulta = st.date_input("Data da consulta")
+                        hora_consulta = st.time_input("Hora da consulta")
+                    else:
+                        st.write(f"Horário: **{escolha}**")
                     submitted = st.form_submit_button("Criar Consulta")
 
                 if submitted:
                     try:
-                        data_hora = datetime.combine(data_consulta, hora_consulta)
-                        db.create_pedido(codcli, codmed, cpf, data_hora)
-                        st.success("✅ Consulta criada com sucesso!")
-                        st.rerun()
+                        if escolha == manual:
+                            data_hora = datetime.combine(data_consulta, hora_consulta)
+                        else:
+                            data_hora = livres[opcoes.index(escolha) - 1]
+                        conflitos = db.conflitos_agenda(codmed, data_hora)
+                        if conflitos:
+                            horarios = ", ".join(h.strftime("%d/%m/%Y %H:%M") for h in conflitos)
+                            st.error(f"❌ O médico já tem consulta em {horarios}.")
+                        else:
+                            db.create_pedido(codcli, codmed, cpf, data_hora)
+                            invalidar_listas('Consulta')
+                            st.success("✅ Consulta criada com sucesso!")
+                            st.rerun()
                     except Exception as e:
                         st.error(f"❌ Erro ao criar consulta: {str(e)}")
         except Exception as e:
             st.error(f"Erro ao carregar dados: {str(e)}")
 
     # TAB: EDITAR
-    with tab3:
+    if tab3:
         st.subheader("Editar Consulta")
         try:
-            consultas = db.get_pedidos()
-            if consultas:
-                opcoes = [f"{c['CodCli']}-{c['CodMed']}-{c['CpfPaciente']} - {c['Data_Hora']}" for c in consultas]
-                sel = st.selectbox("Selecione consulta", opcoes, key="sel_editar_cons")
-
-                # Parse a seleção
-                parts = sel.split(" - ")
-                ids = parts[0].split("-")
-                codcli_old = ids[0]
-                codmed_old = ids[1]
-                cpf_old = ids[2]
-                data_hora_old = parts[1]
-
-                # Busca listas para os selects
-                pacientes = db.get_clientes()
-                medicos = db.get_medicos()
-                clinicas = db.get_clinicas()
+            consulta = seletor_consulta(key="sel_editar_cons")
+            if consulta:
+                codcli_old = consulta['CodCli']
+                codmed_old = consulta['CodMed']
+                cpf_old = consulta['CpfPaciente']
+                data_hora_old = consulta['Data_Hora']
+
+                # Novos valores: a opção inicial de cada seletor é o valor atual
+                clinica = seletor_busca(
+                    "clínica", db.buscar_clinicas, rotulo_clinica, key="edit_cli",
+                    atual={'codcli': codcli_old, 'nome': consulta['clinica_nome']}
+                )
+                medico = seletor_busca(
+                    "médico", db.buscar_medicos, rotulo_medico, key="edit_med",
+                    atual={'codmed': codmed_old, 'nome': consulta['medico_nome']}
+                )
+                paciente = seletor_busca(
+                    "paciente", db.buscar_pacientes, rotulo_paciente, key="edit_pac",
+                    atual={'cpf': cpf_old, 'nome': consulta['paciente_nome']}
+                )
 
                 with st.form("form_editar_consulta"):
-                    opcoes_cli = [f"{c['codcli']} - {c['nome']}" for c in clinicas]
-                    sel_cli = st.selectbox("Selecione clínica", opcoes_cli, key="edit_cli")
-                    codcli_new = sel_cli.split(" - ")[0]
-
-                    opcoes_med = [f"{m['codmed']} - {m['nome']}" for m in medicos]
-                    sel_med = st.selectbox("Selecione médico", opcoes_med, key="edit_med")
-                    codmed_new = sel_med.split(" - ")[0]
-
-                    opcoes_pac = [f"{p['cpf']} - {p['nome']}" for p in pacientes]
-                    sel_pac = st.selectbox("Selecione paciente", opcoes_pac, key="edit_pac")
-                    cpf_new = sel_pac.split(" - ")[0]
-
-                    dt_old = datetime.fromisoformat(str(data_hora_old).replace(' ', 'T'))
-                    data_consulta = st.date_input("Data da consulta", value=dt_old.date())
-                    hora_consulta = st.time_input("Hora da consulta", value=dt_old.time())
+                    data_consulta = st.date_input("Data da consulta", value=data_hora_old.date())
+                    hora_consulta = st.time_input("Hora da consulta", value=data_hora_old.time())
                     submitted = st.form_submit_button("Atualizar")
 
                 if submitted:
@@ -744,40 +955,26 @@ def tela_consultas():
                         data_hora_new = datetime.combine(data_consulta, hora_consulta)
                         old_keys = (codcli_old, codmed_old, cpf_old, data_hora_old)
                         new_values = {
-                            'codcli': codcli_new,
-                            'codmed': codmed_new,
-                            'cpf': cpf_new,
+                            'codcli': clinica['codcli'],
+                            'codmed': medico['codmed'],
+                            'cpf': paciente['cpf'],
                             'data_hora': data_hora_new
                         }
                         db.update_pedido(old_keys, new_values)
+                        invalidar_listas('Consulta')
                         st.success("✅ Consulta atualizada com sucesso!")
                         st.rerun()
                     except Exception as e:
                         st.error(f"❌ Erro ao atualizar consulta: {str(e)}")
-            else:
-                st.warning("Nenhuma consulta para editar.")
         except Exception as e:
             st.error(f"Erro ao carregar consultas: {str(e)}")
 
     # TAB: DELETAR
-    with tab4:
+    if tab4:
         st.subheader("Deletar Consulta")
         try:
-            consultas = db.get_pedidos()
-            if consultas:
-                # Criar índice para mapear seleção à consulta completa
-                opcoes = []
-                for idx, c in enumerate(consultas):
-                    # Formatar data/hora para exibição
-                    data_hora_str = str(c['Data_Hora']) if c['Data_Hora'] else "N/A"
-                    opcoes.append(f"{idx}|{c['clinica_nome']} - {c['medico_nome']} - {c['paciente_nome']} ({data_hora_str})")
-                
-                sel = st.selectbox("Selecione consulta", opcoes, key="sel_deletar_cons")
-                
-                # Extrair índice da seleção
-                idx = int(sel.split("|")[0])
-                consulta_selecionada = consultas[idx]
-                
+            consulta_selecionada = seletor_consulta(key="sel_deletar_cons")
+            if consulta_selecionada:
                 # Exibir detalhes da consulta
                 st.info(f"""
                 **Clínica:** {consulta_selecionada['clinica_nome']} ({consulta_selecionada['CodCli']})  
@@ -794,12 +991,11 @@ def tela_consultas():
                             consulta_selecionada['CpfPaciente'],
                             consulta_selecionada['Data_Hora']
                         )
+                        invalidar_listas('Consulta')
                         st.success("✅ Consulta deletada com sucesso!")
                         st.rerun()
                     except Exception as e:
                         st.error(f"❌ Erro ao deletar consulta: {str(e)}")
-            else:
-                st.warning("Nenhuma consulta para deletar.")
         except Exception as e:
             st.error(f"Erro ao carregar consultas: {str(e)}")
 
@@ -808,16 +1004,21 @@ def tela_triggers():
     """Exibe informações sobre triggers do banco."""
     st.markdown("## 🔔 Triggers do Sistema")
 
+    # prazo configurado na tabela PoliticaAgendamento (o mesmo lido pelos triggers)
+    politica = db.politica_agendamento() if db is not None else PoliticaAgendamento()
+    prazo = politica.prazo_dias
+
     st.markdown("### Validação de Intervalo de Agendamento")
-    st.info("""
-    O banco de dados possui **2 triggers** que garantem que consultas sejam agendadas com antecedência máxima de **60 dias (2 meses)**.
+    st.info(f"""
+    O banco de dados possui **2 triggers** que garantem que consultas sejam agendadas com antecedência máxima de **{prazo} dias**.
     Essas validações acontecem automaticamente no MySQL, impedindo agendamentos fora do prazo permitido.
+    O mesmo prazo é verificado antes do envio ao banco, pela `PoliticaAgendamento` do `db.py`.
     """)
 
     # Seção de validação
     st.markdown("#### 📅 Regra de Negócio: Limite de Antecedência")
-    st.markdown("""
-    **Restrição:** Consultas só podem ser agendadas com no máximo **2 meses (60 dias)** de antecedência a partir da data atual.
+    st.markdown(f"""
+    **Restrição:** Consultas só podem ser agendadas com no máximo **{prazo} dias** de antecedência a partir da data atual.
 
     **Triggers Implementados:**
     - `tg_verifica_intervalo_agendamento` - Valida no INSERT
@@ -825,9 +1026,9 @@ def tela_triggers():
 
     **Entidade:** Consulta
 
-    **Validação:** `TIMESTAMPDIFF(DAY, CURDATE(), NEW.Data_Hora) > 60`
+    **Validação:** `TIMESTAMPDIFF(DAY, CURDATE(), NEW.Data_Hora) > PoliticaAgendamento.PrazoMaximoDias`
 
-    **Mensagem de Erro:** "A consulta só pode ser agendada com no máximo 2 meses de antecedência."
+    **Mensagem de Erro:** "{politica.mensagem()}"
     """)
 
     st.markdown("---")
@@ -841,9 +1042,13 @@ CREATE TRIGGER tg_verifica_intervalo_agendamento
 BEFORE INSERT ON Consulta
 FOR EACH ROW
 BEGIN
-    IF TIMESTAMPDIFF(DAY, CURDATE(), NEW.Data_Hora) > 60 THEN
+    DECLARE v_prazo INT;
+    DECLARE v_msg VARCHAR(128);
+    SELECT PrazoMaximoDias INTO v_prazo FROM PoliticaAgendamento WHERE Id = 1;
+    IF TIMESTAMPDIFF(DAY, CURDATE(), NEW.Data_Hora) > v_prazo THEN
+        SET v_msg = CONCAT('A consulta só pode ser agendada com no máximo ', v_prazo, ' dias de antecedência.');
         SIGNAL SQLSTATE '45000'
-            SET MESSAGE_TEXT = 'A consulta só pode ser agendada com no máximo 2 meses de antecedência.';
+            SET MESSAGE_TEXT = v_msg;
     END IF;
 END $$
 DELIMITER ;
@@ -854,11 +1059,11 @@ DELIMITER ;
     # Tabela resumo
     st.markdown("### 📊 Resumo dos Triggers")
     triggers_data = [
-        {"Trigger": "tg_verifica_intervalo_agendamento", "Entidade": "Consulta", "Evento": "INSERT", "Validação": "Data ≤ 60 dias"},
-        {"Trigger": "tg_verifica_intervalo_agendamento_upd", "Entidade": "Consulta", "Evento": "UPDATE", "Validação": "Data ≤ 60 dias"},
+        {"Trigger": "tg_verifica_intervalo_agendamento", "Entidade": "Consulta", "Evento": "INSERT", "Validação": f"Data ≤ {prazo} dias"},
+        {"Trigger": "tg_verifica_intervalo_agendamento_upd", "Entidade": "Consulta", "Evento": "UPDATE", "Validação": f"Data ≤ {prazo} dias"},
     ]
 
-    df_triggers = pd.DataFrame(triggers_data)
+    df_triggers = dataframe(triggers_data)
     st.dataframe(df_triggers, width='stretch', hide_index=True)
 
     st.success("✅ Total de 2 triggers implementados no banco de dados MySQL")
@@ -867,7 +1072,7 @@ DELIMITER ;
 
     # Seção de teste
     st.markdown("### 🧪 Teste de Validação do Trigger")
-    st.info("**Como testar:** Tente agendar uma consulta com mais de 60 dias de "
+    st.info(f"**Como testar:** Tente agendar uma consulta com mais de {prazo} dias de "
             "antecedência na aba 'Consultas' → 'Criar'. O sistema deve bloquear e "
             "exibir a mensagem de erro do trigger.")
 
@@ -880,14 +1085,14 @@ DELIMITER ;
         data_hoje = datetime.now().date()
         st.write(f"**Data atual:** {data_hoje.strftime('%d/%m/%Y')}")
 
-        limite_permitido = data_hoje + timedelta(days=60)
+        limite_permitido = data_hoje + timedelta(days=prazo)
         st.write(f"**Limite máximo permitido:** {limite_permitido.strftime('%d/%m/%Y')}")
 
     with col2:
         data_teste = st.date_input("Escolha uma data para testar:", value=data_hoje + timedelta(days=70))
         dias_antecedencia = (data_teste - data_hoje).days
 
-        if dias_antecedencia > 60:
+        if not politica.permite(datetime.combine(data_teste, datetime.min.time()), hoje=data_hoje):
             st.error(f"❌ **{dias_antecedencia} dias de antecedência** - Será BLOQUEADO pelo trigger!")
         elif dias_antecedencia < 0:
             st.warning("⚠️ Data no passado - Consulta não pode ser agendada")
@@ -897,13 +1102,15 @@ DELIMITER ;
     # Exemplos práticos
     st.markdown("#### 💡 Exemplos de Teste")
     exemplos = [
-        {"Data": (data_hoje + timedelta(days=30)).strftime('%d/%m/%Y'), "Dias": "30 dias", "Resultado": "✅ ACEITO"},
-        {"Data": (data_hoje + timedelta(days=60)).strftime('%d/%m/%Y'), "Dias": "60 dias", "Resultado": "✅ ACEITO"},
-        {"Data": (data_hoje + timedelta(days=61)).strftime('%d/%m/%Y'), "Dias": "61 dias", "Resultado": "❌ BLOQUEADO"},
-        {"Data": (data_hoje + timedelta(days=90)).strftime('%d/%m/%Y'), "Dias": "90 dias", "Resultado": "❌ BLOQUEADO"},
+        {
+            "Data": (data_hoje + timedelta(days=dias)).strftime('%d/%m/%Y'),
+            "Dias": f"{dias} dias",
+            "Resultado": "✅ ACEITO" if dias <= prazo else "❌ BLOQUEADO",
+        }
+        for dias in (prazo // 2, prazo, prazo + 1, prazo + 30)
     ]
 
-    df_exemplos = pd.DataFrame(exemplos)
+    df_exemplos = dataframe(exemplos)
     st.dataframe(df_exemplos, width='stretch', hide_index=True)
 
 
@@ -917,7 +1124,7 @@ def tela_consultas_avancadas():
 
     st.info("💡 Implementar consultas avançadas usando as funções do db.py")
 
-    tab1, tab2, tab3, tab4, tab5, tab6, tab7 = st.tabs([
+    tab1, tab2, tab3, tab4, tab5, tab6, tab7 = abas([
         "📊 Resumo Geral",
         "🏥 Estatísticas por Clínica",
         "👨‍⚕️ Ranking de Médicos",
@@ -925,10 +1132,10 @@ def tela_consultas_avancadas():
         "📈 Consultas por Mês",
         "🎯 Especialidades",
         "👥 Pacientes"
-    ])
+    ], key="aba_avancadas")
 
     # TAB 1: Resumo Geral
-    with tab1:
+    if tab1:
         st.subheader("📊 Resumo Geral do Sistema")
         try:
             resumo = db.get_resumo_geral_sistema()
@@ -952,17 +1159,17 @@ def tela_consultas_avancadas():
             st.error(f"Erro ao carregar resumo: {str(e)}")
 
     # TAB 2: Estatísticas por Clínica
-    with tab2:
+    if tab2:
         st.subheader("🏥 Estatísticas por Clínica")
         try:
-            dados = db.get_estatisticas_por_clinica()
-            if dados:
-                df = pd.DataFrame(dados)
+            with db.como_dataframe():
+                df = db.get_estatisticas_por_clinica()
+            if not df.empty:
 
                 # Gráfico de barras
                 st.markdown("### 📊 Total de Consultas por Clínica")
                 chart_data = df.set_index('nome_clinica')['total_consultas']
-                st.bar_chart(chart_data)
+                grafico(st.bar_chart, chart_data)
 
                 # Tabela detalhada
                 st.markdown("### 📋 Dados Detalhados")
@@ -980,7 +1187,7 @@ def tela_consultas_avancadas():
             st.error(f"Erro ao carregar dados: {str(e)}")
 
     # TAB 3: Ranking de Médicos
-    with tab3:
+    if tab3:
         st.subheader("👨‍⚕️ Ranking de Médicos com Mais Atendimentos")
 
         col1, col2 = st.columns([3, 1])
@@ -988,14 +1195,14 @@ def tela_consultas_avancadas():
             limit = st.number_input("Top N médicos", min_value=5, max_value=50, value=10)
 
         try:
-            dados = db.get_medicos_mais_atendimentos(limit=limit)
-            if dados:
-                df = pd.DataFrame(dados)
+            with db.como_dataframe():
+                df = db.get_medicos_mais_atendimentos(limit=limit)
+            if not df.empty:
 
                 # Gráfico horizontal
                 st.markdown("### 📊 Consultas por Médico")
                 chart_data = df.set_index('nome_medico')['total_consultas'].head(10)
-                st.bar_chart(chart_data, horizontal=True)
+                grafico(st.bar_chart, chart_data, horizontal=True)
 
                 # Tabela
                 st.markdown("### 📋 Detalhes dos Médicos")
@@ -1013,7 +1220,7 @@ def tela_consultas_avancadas():
             st.error(f"Erro ao carregar dados: {str(e)}")
 
     # TAB 4: Consultas Próximas
-    with tab4:
+    if tab4:
         st.subheader("📅 Consultas Agendadas para os Próximos Dias")
 
         dias = st.slider("Quantos dias à frente?", min_value=1, max_value=30, value=7)
@@ -1023,7 +1230,7 @@ def tela_consultas_avancadas():
             if dados:
                 st.success(f"✅ {len(dados)} consultas encontradas nos próximos {dias} dias")
 
-                df = pd.DataFrame(dados)
+                df = dataframe(dados)
 
                 # Cards para consultas próximas
                 for idx, consulta in enumerate(dados[:5]):  # Mostra as 5 primeiras em destaque
@@ -1076,7 +1283,7 @@ def tela_consultas_avancadas():
             st.error(f"Erro ao carregar dados: {str(e)}")
 
     # TAB 5: Consultas por Mês
-    with tab5:
+    if tab5:
         st.subheader("📈 Distribuição de Consultas por Mês")
 
         ano_atual = datetime.now().year
@@ -1085,23 +1292,23 @@ def tela_consultas_avancadas():
         try:
             dados = db.get_consultas_por_mes(ano=ano)
             if dados:
-                df = pd.DataFrame(dados)
+                df = dataframe(dados)
 
                 # Gráfico de linha
                 st.markdown("### 📊 Evolução Mensal")
                 chart_data = df.set_index('nome_mes')['total_consultas']
-                st.line_chart(chart_data)
+                grafico(st.line_chart, chart_data)
 
                 # Gráfico de barras
                 st.markdown("### 📊 Comparativo Mensal")
                 col1, col2 = st.columns(2)
                 with col1:
                     chart1 = df.set_index('nome_mes')['total_consultas']
-                    st.bar_chart(chart1)
+                    grafico(st.bar_chart, chart1)
                     st.caption("Total de Consultas")
                 with col2:
                     chart2 = df.set_index('nome_mes')['medicos_ativos']
-                    st.bar_chart(chart2)
+                    grafico(st.bar_chart, chart2)
                     st.caption("Médicos Ativos")
 
                 # Tabela
@@ -1121,18 +1328,18 @@ def tela_consultas_avancadas():
             st.error(f"Erro ao carregar dados: {str(e)}")
 
     # TAB 6: Especialidades
-    with tab6:
+    if tab6:
         st.subheader("🎯 Especialidades Médicas Mais Procuradas")
 
         try:
             dados = db.get_especialidades_mais_procuradas()
             if dados:
-                df = pd.DataFrame(dados)
+                df = dataframe(dados)
 
                 # Gráfico de pizza (aproximação com bar chart)
                 st.markdown("### 📊 Distribuição por Especialidade")
                 chart_data = df.set_index('especialidade')['total_consultas'].head(10)
-                st.bar_chart(chart_data)
+                grafico(st.bar_chart, chart_data)
 
                 # Métricas principais
                 col1, col2, col3 = st.columns(3)
@@ -1160,21 +1367,21 @@ def tela_consultas_avancadas():
             st.error(f"Erro ao carregar dados: {str(e)}")
 
     # TAB 7: Pacientes
-    with tab7:
+    if tab7:
         st.subheader("👥 Estatísticas de Pacientes")
 
-        tab7_1, tab7_2, tab7_3 = st.tabs([
+        tab7_1, tab7_2, tab7_3 = abas([
             "📊 Por Gênero",
             "⚠️ Sem Consulta",
             "📋 Histórico Individual"
-        ])
+        ], key="aba_avancadas_pacientes")
 
         # Subtab: Por Gênero
-        with tab7_1:
+        if tab7_1:
             try:
                 dados = db.get_pacientes_por_genero()
                 if dados:
-                    df = pd.DataFrame(dados)
+                    df = dataframe(dados)
 
                     # Métricas
                     col1, col2, col3 = st.columns(3)
@@ -1190,7 +1397,7 @@ def tela_consultas_avancadas():
                     # Gráfico
                     st.markdown("### 📊 Distribuição por Gênero")
                     chart_data = df.set_index('genero')['total_pacientes']
-                    st.bar_chart(chart_data)
+                    grafico(st.bar_chart, chart_data)
 
                     # Tabela
                     st.markdown("### 📋 Estatísticas Detalhadas")
@@ -1208,13 +1415,13 @@ def tela_consultas_avancadas():
                 st.error(f"Erro ao carregar dados: {str(e)}")
 
         # Subtab: Sem Consulta
-        with tab7_2:
+        if tab7_2:
             try:
-                dados = db.get_pacientes_sem_consulta()
-                if dados:
-                    st.warning(f"⚠️ {len(dados)} pacientes cadastrados nunca tiveram consulta")
+                with db.como_dataframe():
+                    df = db.get_pacientes_sem_consulta()
+                if not df.empty:
+                    st.warning(f"⚠️ {len(df)} pacientes cadastrados nunca tiveram consulta")
 
-                    df = pd.DataFrame(dados)
                     df_display = df[[
                         'nome', 'cpf', 'telefone', 'email', 'idade'
                     ]].rename(columns={
@@ -1231,7 +1438,7 @@ def tela_consultas_avancadas():
                 st.error(f"Erro ao carregar dados: {str(e)}")
 
         # Subtab: Histórico Individual
-        with tab7_3:
+        if tab7_3:
             st.markdown("### 📋 Consultar Histórico de Paciente")
 
             cpf_input = st.text_input("Digite o CPF do paciente", placeholder="000.000.000-00", max_chars=14)
@@ -1275,34 +1482,51 @@ def tela_consultas_avancadas():
 # NAVEGAÇÃO PRINCIPAL
 # ============================================================================
 
+TELAS = {
+    "Home": tela_home,
+    "Pacientes": tela_pacientes,
+    "Médicos": tela_medicos,
+    "Clínicas": tela_clinicas,
+    "Consultas": tela_consultas,
+    "Triggers (Log)": tela_triggers,
+    "Consultas Avançadas": tela_consultas_avancadas,
+}
+
 st.sidebar.markdown("# 🏥 Menu Principal")
-pagina = st.sidebar.radio(
-    "Navegação",
-    [
-        "Home",
-        "Pacientes",
-        "Médicos",
-        "Clínicas",
-        "Consultas",
-        "Triggers (Log)",
-        "Consultas Avançadas"
-    ]
+pagina = st.sidebar.radio("Navegação", list(TELAS))
+perfilar = st.sidebar.checkbox(
+    "⏱️ Perfil de renderização",
+    key="perfil_ativo",
+    help="Mede cada consulta, DataFrame e gráfico desta tela e mostra a cascata no fim da página."
+)
+salvar_cprofile = perfilar and st.sidebar.checkbox(
+    "Salvar cProfile", key="perfil_cprofile",
+    help=f"Grava um .prof por renderização em '{PERFIL_DIR}/'."
 )
 
-if pagina == "Home":
-    tela_home()
-elif pagina == "Pacientes":
-    tela_pacientes()
-elif pagina == "Médicos":
-    tela_medicos()
-elif pagina == "Clínicas":
-    tela_clinicas()
-elif pagina == "Consultas":
-    tela_consultas()
-elif pagina == "Triggers (Log)":
-    tela_triggers()
-elif pagina == "Consultas Avançadas":
-    tela_consultas_avancadas()
+tela = TELAS[pagina]
+with registro_metricas.cronometro('consultas_app_tela_render_seconds',
+                                  "Tempo de renderização de cada tela", tela=tela.__name__):
+    if not perfilar or db is None:
+        tela()
+    else:
+        with perfil.perfilar(tela.__name__, PERFIL_DIR if salvar_cprofile else None) as medicao:
+            with db.observar_consultas(_consulta_no_perfil):
+                tela()
+
+        st.markdown("---")
+        with st.expander(f"⏱️ Perfil de {tela.__name__}: {medicao.total * 1000:.1f} ms", expanded=True):
+            st.markdown("**Tempo por tipo**")
+            st.dataframe(pd.DataFrame(medicao.por_tipo()), width='stretch', hide_index=True)
+            st.markdown("**Cascata**")
+            if medicao.etapas:
+                st.dataframe(pd.DataFrame(medicao.cascata()), width='stretch', hide_index=True)
+            else:
+                st.info("Nenhuma consulta, DataFrame ou gráfico nesta renderização.")
+            if medicao.arquivo_cprofile:
+                st.caption(f"cProfile salvo em `{medicao.arquivo_cprofile}`")
+            if medicao.resumo_cprofile:
+                st.code(medicao.resumo_cprofile, language=None)
 
 
 # Rodapé
@@ -0,0 +1,201 @@
+"""
+Benchmark dos índices secundários de Consulta (migrações 001 e 002).
+
+Para cada consulta analítica mostra o plano (EXPLAIN) e o tempo mediano
+antes e depois das migrações. "Antes" não é uma tabela sem índices: as FKs de
+Consulta já exigiam índices em CpfPaciente e CodMed, que o MySQL cria sozinho.
+O benchmark cria esses dois índices equivalentes (se faltarem), compara
+"antes" (só eles, via IGNORE INDEX nos da migração) com "depois" (só os da
+migração) e os remove no fim.
+Os relatórios por mês e por dia da semana também tiveram o SQL reescrito na
+migração 002 (AnoMes/DiaSemana no lugar de YEAR()/DAYOFWEEK() sobre
+Data_Hora); para eles o "antes" roda o SQL original (SQL_ORIGINAL), então a
+comparação inclui o custo dos predicados antigos. Nos demais o SQL não mudou
+e a diferença é só de índices; a saída indica qual é o caso.
+Rode sobre uma base com volume realista, por exemplo 5M consultas sintéticas.
+
+Uso: python benchmark_indices.py --repeticoes 5
+"""
+
+import argparse
+import re
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+from dotenv import load_dotenv
+from db import MySQLDB
+
+load_dotenv()
+
+INDICES = (
+    'idx_consulta_data_hora', 'idx_consulta_paciente', 'idx_consulta_medico',
+    'idx_consulta_ano_mes', 'idx_consulta_dia_semana',
+)
+
+# equivalentes aos índices implícitos das FKs, que existiam antes da migração 001
+INDICES_FK = (
+    ('idx_bench_fk_paciente', 'CpfPaciente'),
+    ('idx_bench_fk_medico', 'CodMed'),
+)
+
+
+class _DBCaptura(MySQLDB):
+    """MySQLDB que guarda o último SQL executado, para reaproveitar o SQL real dos métodos."""
+
+    def _execute(self, sql, params=None, **kwargs):
+        self.ultimo = (sql, params)
+        return super()._execute(sql, params, **kwargs)
+
+
+def ignorando(sql, indices):
+    """Aplica IGNORE INDEX (indices) nas referências a Consulta."""
+    dica = f" IGNORE INDEX ({', '.join(indices)})"
+    return re.sub(r'\bConsulta(\s+c\b)?', lambda m: m.group(0) + dica, sql)
+
+
+def antes(sql):
+    """Situação antes das migrações: só os índices das FKs."""
+    return ignorando(sql, INDICES)
+
+
+def depois(sql):
+    """Situação atual: índices da migração, sem os equivalentes às FKs."""
+    return ignorando(sql, [nome for nome, _ in INDICES_FK])
+
+
+def criar_indices_fk(db):
+    """Cria os índices de INDICES_FK que faltarem; retorna os nomes criados."""
+    existentes = {
+        r['nome'] for r in db._execute(
+            "SELECT DISTINCT INDEX_NAME AS nome FROM information_schema.STATISTICS "
+            "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'Consulta'",
+            fetchall=True,
+        ) or []
+    }
+    criados = []
+    for nome, coluna in INDICES_FK:
+        if nome not in existentes:
+            print(f"Criando {nome} ({coluna})...")
+            db._execute(f"ALTER TABLE Consulta ADD INDEX {nome} ({coluna})", commit=True)
+            criados.append(nome)
+    return criados
+
+
+def remover_indices(db, nomes):
+    for nome in nomes:
+        db._execute(f"ALTER TABLE Consulta DROP INDEX {nome}", commit=True)
+
+
+def medir(db, sql, params, repeticoes):
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        db._execute(sql, params=params, fetchall=True)
+        tempos.append(time.perf_counter() - inicio)
+    return statistics.median(tempos)
+
+
+def explain(db, sql, params):
+    linhas = db._execute("EXPLAIN " + sql, params=params, fetchall=True) or []
+    return [
+        f"{r.get('table')}: type={r.get('type')} key={r.get('key')} rows={r.get('rows')} extra={r.get('Extra')}"
+        for r in linhas
+    ]
+
+
+# SQL anterior à migração 002 dos métodos que foram reescritos: nome -> (sql, params(hoje))
+SQL_ORIGINAL = {
+    "get_consultas_por_mes": ("""
+        SELECT
+            DATE_FORMAT(Data_Hora, '%%Y-%%m') AS mes,
+            MONTH(Data_Hora) AS numero_mes,
+            MONTHNAME(Data_Hora) AS nome_mes,
+            COUNT(*) AS total_consultas,
+            COUNT(DISTINCT CodMed) AS medicos_ativos,
+            COUNT(DISTINCT CpfPaciente) AS pacientes_atendidos
+        FROM Consulta
+        WHERE YEAR(Data_Hora) = %s
+        GROUP BY DATE_FORMAT(Data_Hora, '%%Y-%%m'), MONTH(Data_Hora), MONTHNAME(Data_Hora)
+        ORDER BY numero_mes
+        """, lambda hoje: (hoje.year,)),
+    "get_taxa_ocupacao_por_dia_semana": ("""
+        SELECT
+            DAYOFWEEK(Data_Hora) AS numero_dia,
+            DAYNAME(Data_Hora) AS dia_semana,
+            COUNT(*) AS total_consultas,
+            COUNT(DISTINCT CodCli) AS clinicas_ativas,
+            ROUND(COUNT(*) / COUNT(DISTINCT DATE(Data_Hora)), 2) AS media_consultas_por_dia
+        FROM Consulta
+        GROUP BY DAYOFWEEK(Data_Hora), DAYNAME(Data_Hora)
+        ORDER BY numero_dia
+        """, lambda hoje: None),
+}
+
+
+def casos(db):
+    """
+    Executa cada método uma vez e captura (nome, sql, params, sql_antes, params_antes).
+    sql_antes é o SQL original quando o método foi reescrito, senão o mesmo sql.
+    """
+    amostra = db._execute("SELECT CodMed, CpfPaciente FROM Consulta LIMIT 1", fetchone=True)
+    if not amostra:
+        raise Exception("Tabela Consulta vazia: popule a base antes do benchmark.")
+    hoje = datetime.now()
+    chamadas = [
+        ("get_historico_paciente", lambda: db.get_historico_paciente(amostra['CpfPaciente'])),
+        ("get_consultas_proximas", lambda: db.get_consultas_proximas(dias=7)),
+        ("get_consultas_por_periodo", lambda: db.get_consultas_por_periodo(hoje - timedelta(days=30), hoje)),
+        ("get_pedidos_pagina (médico)", lambda: db.get_pedidos_pagina(limite=50, codmed=amostra['CodMed'])),
+        ("get_consultas_por_mes", lambda: db.get_consultas_por_mes(hoje.year)),
+        ("get_taxa_ocupacao_por_dia_semana", lambda: db.get_taxa_ocupacao_por_dia_semana()),
+    ]
+    resultado = []
+    for nome, chamada in chamadas:
+        chamada()
+        sql, params = db.ultimo
+        if nome in SQL_ORIGINAL:
+            sql_antes, params_antes = SQL_ORIGINAL[nome]
+            params_antes = params_antes(hoje)
+        else:
+            sql_antes, params_antes = sql, params
+        resultado.append((nome, sql, params, sql_antes, params_antes))
+    return resultado
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compara planos e tempos de Consulta antes e depois dos índices secundários.")
+    parser.add_argument('--repeticoes', type=int, default=5)
+    args = parser.parse_args()
+
+    db = _DBCaptura()
+    criados = []
+    try:
+        total = db._execute("SELECT COUNT(*) AS total FROM Consulta", fetchone=True)['total']
+        print(f"Consulta: {total} linhas\n")
+        criados = criar_indices_fk(db)
+        for nome, sql, params, sql_antes, params_antes in casos(db):
+            t_antes = medir(db, antes(sql_antes), params_antes, args.repeticoes)
+            t_depois = medir(db, depois(sql), params, args.repeticoes)
+            comparacao = "SQL original vs. reescrito" if sql_antes is not sql else "mesmo SQL, só índices"
+            print("=" * 80)
+            print(f"{nome} ({comparacao}): antes {t_antes * 1000:.1f} ms | depois {t_depois * 1000:.1f} ms "
+                  f"| {t_antes / t_depois if t_depois else float('inf'):.1f}x")
+            print("  EXPLAIN antes (índices das FKs):")
+            for linha in explain(db, antes(sql_antes), params_antes):
+                print(f"    {linha}")
+            print("  EXPLAIN depois (índices da migração):")
+            for linha in explain(db, depois(sql), params):
+                print(f"    {linha}")
+    except Exception as e:
+        print("Erro durante o benchmark:", e, file=sys.stderr)
+        sys.exit(1)
+    finally:
+        try:
+            remover_indices(db, criados)
+        finally:
+            db.close()
+
+
+if __name__ == '__main__':
+    main()
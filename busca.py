@@ -0,0 +1,201 @@
+"""
+Índice de busca por nome em memória, usado por MySQLDB.buscar_nomes.
+
+Cada nome é normalizado (minúsculas, sem acentos) e quebrado em palavras.
+- Prefixo: o vocabulário ordenado + bisect acha as palavras que começam
+  com o termo digitado.
+- Aproximada: trigramas indexam o vocabulário (não cada registro), achando
+  palavras parecidas apesar de erros de digitação. Como nomes repetem muito
+  as mesmas palavras, esse índice fica pequeno mesmo com milhões de registros.
+Todos os termos precisam casar com alguma palavra do nome. O ranking é
+palavra exata > prefixo > aproximada.
+"""
+
+import bisect
+import heapq
+import itertools
+import re
+import threading
+import unicodedata
+
+
+def normalizar(texto):
+    """'José da Silva' -> ['jose', 'da', 'silva']"""
+    sem_acento = unicodedata.normalize('NFKD', texto or '').encode('ascii', 'ignore').decode('ascii')
+    return re.findall(r'[a-z0-9]+', sem_acento.lower())
+
+
+def trigramas(palavra):
+    """Trigramas com bordas, como no pg_trgm: 'ana' -> {'  a', ' an', 'ana', 'na '}."""
+    p = f"  {palavra} "
+    return {p[i:i + 3] for i in range(len(p) - 2)}
+
+
+class IndiceNomes:
+    """
+    Índice invertido chave -> nome com busca por prefixo e aproximada.
+    - similaridade_minima: Jaccard de trigramas para aceitar uma palavra aproximada
+    - max_expansoes: palavras do vocabulário consideradas por prefixo de cada termo
+    - max_candidatos: registros pontuados por busca (termos muito genéricos são truncados)
+    `lock` protege o índice; quem carrega pode segurá-lo para que escritas
+    concorrentes esperem a carga terminar.
+    """
+
+    PESO_EXATO = 1.0
+    PESO_PREFIXO = 0.8
+    PESO_APROXIMADO = 0.6
+    BONUS_PRIMEIRA_PALAVRA = 0.05
+
+    def __init__(self, similaridade_minima=0.4, max_expansoes=200, max_candidatos=2000):
+        self.similaridade_minima = similaridade_minima
+        self.max_expansoes = max_expansoes
+        self.max_candidatos = max_candidatos
+        self.lock = threading.RLock()
+        self._limpar()
+
+    def _limpar(self):
+        self._nomes = {}        # chave -> nome original
+        self._palavras = {}     # chave -> palavras normalizadas
+        self._postings = {}     # palavra -> chaves que a contêm
+        self._vocabulario = []  # palavras em ordem, para busca por prefixo
+        self._trigramas = {}    # trigrama -> palavras do vocabulário
+
+    def __len__(self):
+        return len(self._nomes)
+
+    def _indexar_palavra(self, palavra):
+        for t in trigramas(palavra):
+            self._trigramas.setdefault(t, set()).add(palavra)
+
+    def carregar(self, pares):
+        """Recria o índice a partir de pares (chave, nome)."""
+        with self.lock:
+            self._limpar()
+            for chave, nome in pares:
+                palavras = tuple(normalizar(nome))
+                self._nomes[chave] = nome
+                self._palavras[chave] = palavras
+                for palavra in palavras:
+                    self._postings.setdefault(palavra, set()).add(chave)
+            # ordenar uma vez é bem mais barato que um insort por palavra nova
+            self._vocabulario = sorted(self._postings)
+            for palavra in self._vocabulario:
+                self._indexar_palavra(palavra)
+
+    def adicionar(self, chave, nome):
+        """Indexa (ou reindexa) um registro."""
+        with self.lock:
+            self._remover(chave)
+            palavras = tuple(normalizar(nome))
+            self._nomes[chave] = nome
+            self._palavras[chave] = palavras
+            for palavra in set(palavras):
+                chaves = self._postings.get(palavra)
+                if chaves is None:
+                    chaves = self._postings[palavra] = set()
+                    bisect.insort(self._vocabulario, palavra)
+                    self._indexar_palavra(palavra)
+                chaves.add(chave)
+
+    def remover(self, chave):
+        with self.lock:
+            self._remover(chave)
+
+    def _remover(self, chave):
+        palavras = self._palavras.pop(chave, None)
+        if palavras is None:
+            return
+        del self._nomes[chave]
+        for palavra in set(palavras):
+            chaves = self._postings[palavra]
+            chaves.discard(chave)
+            if chaves:
+                continue
+            # palavra saiu do vocabulário
+            del self._postings[palavra]
+            del self._vocabulario[bisect.bisect_left(self._vocabulario, palavra)]
+            for t in trigramas(palavra):
+                vizinhas = self._trigramas[t]
+                vizinhas.discard(palavra)
+                if not vizinhas:
+                    del self._trigramas[t]
+
+    def _expandir(self, termo):
+        """Palavras do vocabulário que casam com `termo`, com o peso de cada uma."""
+        pesos = {}
+        inicio = bisect.bisect_left(self._vocabulario, termo)
+        fim = min(bisect.bisect_left(self._vocabulario, termo + '\x7f'), inicio + self.max_expansoes)
+        for palavra in self._vocabulario[inicio:fim]:
+            pesos[palavra] = self.PESO_EXATO if palavra == termo else self.PESO_PREFIXO
+        if len(termo) < 3:
+            return pesos
+        consulta = trigramas(termo)
+        comuns = {}
+        for t in consulta:
+            for palavra in self._trigramas.get(t, ()):
+                comuns[palavra] = comuns.get(palavra, 0) + 1
+        for palavra, n in comuns.items():
+            if palavra in pesos:
+                continue
+            # Jaccard; len(palavra) + 1 é o nº de trigramas da palavra
+            similaridade = n / (len(consulta) + len(palavra) + 1 - n)
+            if similaridade >= self.similaridade_minima:
+                pesos[palavra] = self.PESO_APROXIMADO * similaridade
+        return pesos
+
+    def buscar(self, texto, limite=10):
+        """
+        Até `limite` registros ranqueados: [{'chave', 'nome', 'score'}, ...],
+        score em [0, 1] (+ bônus quando o 1º termo casa com a 1ª palavra).
+        """
+        termos = list(dict.fromkeys(normalizar(texto)))
+        if not termos or limite < 1:
+            return []
+        with self.lock:
+            expansoes = [self._expandir(t) for t in termos]
+            if not all(expansoes):
+                return []
+
+            # candidatos vêm do termo mais seletivo, palavras de maior peso primeiro
+            tamanhos = [sum(len(self._postings[p]) for p in e) for e in expansoes]
+            base = expansoes[tamanhos.index(min(tamanhos))]
+            candidatos = set()
+            for palavra in sorted(base, key=base.get, reverse=True):
+                falta = self.max_candidatos - len(candidatos)
+                if falta <= 0:
+                    break
+                chaves = self._postings[palavra]
+                candidatos.update(chaves if len(chaves) <= falta else itertools.islice(chaves, falta))
+
+            resultados = []
+            primeiro = expansoes[0]
+            for chave in candidatos:
+                palavras = self._palavras[chave]
+                total = 0.0
+                for pesos in expansoes:
+                    melhor = 0.0
+                    for palavra in palavras:
+                        peso = pesos.get(palavra)
+                        if peso is not None and peso > melhor:
+                            melhor = peso
+                    if not melhor:
+                        break
+                    total += melhor
+                else:
+                    score = total / len(termos)
+                    if palavras[0] in primeiro:
+                        score += self.BONUS_PRIMEIRA_PALAVRA
+                    resultados.append((-score, len(palavras), self._nomes[chave], chave))
+
+            return [
+                {'chave': chave, 'nome': nome, 'score': round(-score, 3)}
+                for score, _, nome, chave in heapq.nsmallest(limite, resultados)
+            ]
+
+    def stats(self):
+        with self.lock:
+            return {
+                'registros': len(self._nomes),
+                'vocabulario': len(self._vocabulario),
+                'trigramas': len(self._trigramas),
+            }
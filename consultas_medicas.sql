@@ -10,7 +10,9 @@ CREATE TABLE Clinica (
     NomeCli VARCHAR(20) NOT NULL,
     Endereco VARCHAR(50) NOT NULL,
     Telefone CHAR(14) NOT NULL,
-    Email VARCHAR(40) NOT NULL
+    Email VARCHAR(40) NOT NULL,
+    -- índice da migração 005 (ver migrations/005_indices_busca.sql)
+    INDEX idx_clinica_nome (NomeCli)
 );
 
 CREATE TABLE Medico (
@@ -19,7 +21,9 @@ CREATE TABLE Medico (
     Genero CHAR(1) NOT NULL,
     Telefone CHAR(15) NOT NULL,
     Email VARCHAR(40) NOT NULL,
-    Especialidade VARCHAR(30) NOT NULL
+    Especialidade VARCHAR(30) NOT NULL,
+    -- índice da migração 005
+    INDEX idx_medico_nome (NomeMed)
 );
 
 CREATE TABLE Paciente(
@@ -28,7 +32,9 @@ CREATE TABLE Paciente(
     DataNascimento DATE NOT NULL,
     Genero CHAR(1) NOT NULL,
     Telefone CHAR(15) NOT NULL,
-    Email VARCHAR(40) NOT NULL
+    Email VARCHAR(40) NOT NULL,
+    -- índice da migração 005
+    INDEX idx_paciente_nome (NomePac)
 );
 
 CREATE TABLE Consulta (
@@ -36,12 +42,41 @@ CREATE TABLE Consulta (
 	CodMed CHAR(7) NOT NULL,
 	CpfPaciente CHAR(14) NOT NULL,
 	Data_Hora DATETIME NOT NULL,
+	-- colunas geradas da migração 002 (ver migrations/002_colunas_geradas_consulta.sql)
+	AnoMes INT AS (YEAR(Data_Hora) * 100 + MONTH(Data_Hora)) STORED NOT NULL,
+	DiaSemana TINYINT AS (DAYOFWEEK(Data_Hora)) STORED NOT NULL,
 	PRIMARY KEY (CodCli, CodMed, CpfPaciente, Data_Hora),
+	-- índices da migração 001 (ver migrations/001_indices_consulta.sql)
+	INDEX idx_consulta_data_hora (Data_Hora),
+	INDEX idx_consulta_paciente (CpfPaciente, Data_Hora),
+	INDEX idx_consulta_medico (CodMed, Data_Hora),
+	-- índices da migração 002
+	INDEX idx_consulta_ano_mes (AnoMes),
+	INDEX idx_consulta_dia_semana (DiaSemana),
 	FOREIGN KEY (CodCli) REFERENCES Clinica (CodCli) ON DELETE CASCADE,
 	FOREIGN KEY (CodMed) REFERENCES Medico (CodMed),
 	FOREIGN KEY (CpfPaciente) REFERENCES Paciente (CpfPaciente)
 );
 
+-- CONTROLE DE VERSÃO DO SCHEMA
+-- Este arquivo já contém todas as migrações listadas abaixo; bancos antigos
+-- são atualizados com `python init_db.py --somente-migracoes`.
+CREATE TABLE VersaoSchema (
+	Versao INT NOT NULL PRIMARY KEY,
+	Descricao VARCHAR(100) NOT NULL,
+	AplicadaEm DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+INSERT INTO VersaoSchema (Versao, Descricao) VALUES
+(1, 'indices_consulta'),
+(2, 'colunas_geradas_consulta'),
+(3, 'resumo_sistema'),
+(4, 'resumo_ranking'),
+(5, 'indices_busca'),
+(6, 'politica_agendamento'),
+(7, 'resumo_sistema_fatias'),
+(8, 'resumo_especialidade_sem_nome');
+
 -- POPULANDO O BANCO
 INSERT INTO Clinica VALUES
 ('0000001', 'Saúde Plus', 'Av. Rosa e Silva, 406, Graças', '(81) 4002-3633', 'saudeplus@mail.com'),
@@ -101,7 +136,7 @@ INSERT INTO Paciente VALUES
 ('147.258.369-01', 'Amanda Silva', '1991-02-28', 'F', '(81) 98876-5431', 'amandasilva@mail.com'),
 ('258.369.147-02', 'Bruno Carvalho', '1984-10-11', 'M', '(81) 99764-3209', 'brunocarvalho@mail.com');
 
-INSERT INTO Consulta VALUES
+INSERT INTO Consulta (CodCli, CodMed, CpfPaciente, Data_Hora) VALUES
 ('0000001', '2819374', '589.612.347-52', '2025-11-03 15:00:00'),
 ('0000002', '8532974', '345.123.897-65', '2025-12-10 16:40:00'),
 ('0000002', '9183424', '345.123.897-65', '2025-12-10 10:30:00'),
@@ -154,42 +189,454 @@ INSERT INTO Consulta VALUES
 ('0000002', '7382910', '901.234.567-89', '2026-04-05 15:30:00'),
 ('0000001', '5793149', '012.345.678-90', '2026-04-08 08:00:00');
 
--- VISUALIZACAO DE CONSULTAS POR MÉDICO
-CREATE VIEW Vw_QtdeConsultasPorMedico AS
-SELECT 
-    m.CodMed,
-    m.NomeMed,
-    m.Especialidade,
-    COUNT(c.CodMed) AS TotalConsultas
-FROM Medico m
-LEFT JOIN Consulta c ON m.CodMed = c.CodMed
-GROUP BY m.CodMed, m.NomeMed, m.Especialidade;
-
 -- TRIGGER
-DROP TRIGGER IF EXISTS trg_verifica_intervalo_agendamento;
-DELIMITER $$ 
+-- PRAZO DE AGENDAMENTO (migração 006, ver migrations/006_politica_agendamento.sql)
+-- Lido pelos triggers e pela validação local do MySQLDB.
+CREATE TABLE PoliticaAgendamento (
+    Id TINYINT NOT NULL PRIMARY KEY,
+    PrazoMaximoDias INT NOT NULL
+);
+
+INSERT INTO PoliticaAgendamento (Id, PrazoMaximoDias) VALUES (1, 60);
+
+DROP TRIGGER IF EXISTS tg_verifica_intervalo_agendamento;
+DELIMITER $$
 CREATE TRIGGER tg_verifica_intervalo_agendamento
 BEFORE INSERT ON Consulta
 FOR EACH ROW
 BEGIN
-    IF TIMESTAMPDIFF(DAY, CURDATE(), NEW.Data_Hora) > 60 THEN
+    DECLARE v_prazo INT;
+    DECLARE v_msg VARCHAR(128);
+    SELECT PrazoMaximoDias INTO v_prazo FROM PoliticaAgendamento WHERE Id = 1;
+    IF TIMESTAMPDIFF(DAY, CURDATE(), NEW.Data_Hora) > v_prazo THEN
+        SET v_msg = CONCAT('A consulta só pode ser agendada com no máximo ', v_prazo, ' dias de antecedência.');
         SIGNAL SQLSTATE '45000'
-            SET MESSAGE_TEXT = 'A consulta só pode ser agendada com no máximo 2 meses de antecedência.';
+            SET MESSAGE_TEXT = v_msg;
     END IF;
 END $$
 DELIMITER ;
 
-DROP TRIGGER IF EXISTS trg_verifica_intervalo_agendamento_upd
+DROP TRIGGER IF EXISTS tg_verifica_intervalo_agendamento_upd;
 DELIMITER $$
 CREATE TRIGGER tg_verifica_intervalo_agendamento_upd
 BEFORE UPDATE ON Consulta
 FOR EACH ROW
 BEGIN
-    IF TIMESTAMPDIFF(DAY, CURDATE(), NEW.Data_Hora) > 60 THEN
+    DECLARE v_prazo INT;
+    DECLARE v_msg VARCHAR(128);
+    SELECT PrazoMaximoDias INTO v_prazo FROM PoliticaAgendamento WHERE Id = 1;
+    IF TIMESTAMPDIFF(DAY, CURDATE(), NEW.Data_Hora) > v_prazo THEN
+        SET v_msg = CONCAT('A consulta só pode ser agendada com no máximo ', v_prazo, ' dias de antecedência.');
         SIGNAL SQLSTATE '45000'
-            SET MESSAGE_TEXT = 'A consulta só pode ser agendada com no máximo 2 meses de antecedência.';
+            SET MESSAGE_TEXT = v_msg;
     END IF;
 END $$
 DELIMITER ;
 
+-- RESUMO DO SISTEMA (migrações 003 e 007, ver migrations/003_resumo_sistema.sql)
+-- Contadores mantidos por triggers para get_resumo_geral_sistema. ResumoSistema
+-- tem 16 fatias (Id): cada conexão atualiza a sua e a leitura soma todas.
+CREATE TABLE ResumoSistema (
+    Id TINYINT NOT NULL PRIMARY KEY,
+    TotalPacientes BIGINT NOT NULL DEFAULT 0,
+    SomaAnoNascimento BIGINT NOT NULL DEFAULT 0,
+    TotalMedicos BIGINT NOT NULL DEFAULT 0,
+    TotalClinicas BIGINT NOT NULL DEFAULT 0,
+    TotalConsultas BIGINT NOT NULL DEFAULT 0,
+    ReconciliadoEm DATETIME NULL
+);
+
+INSERT INTO ResumoSistema (Id) VALUES (1), (2), (3), (4), (5), (6), (7), (8),
+(9), (10), (11), (12), (13), (14), (15), (16);
+
+-- consultas por dia: consultas futuras/passadas sem varrer Consulta
+CREATE TABLE ResumoConsultaDia (
+    Dia DATE NOT NULL PRIMARY KEY,
+    Total BIGINT NOT NULL DEFAULT 0
+);
+
+-- médicos por especialidade (inclusive '', sem especialidade): especialidades
+-- disponíveis sem COUNT(DISTINCT)
+CREATE TABLE ResumoEspecialidade (
+    Especialidade VARCHAR(30) NOT NULL PRIMARY KEY,
+    TotalMedicos BIGINT NOT NULL DEFAULT 0,
+    TotalConsultas BIGINT NOT NULL DEFAULT 0,
+    PacientesUnicos BIGINT NOT NULL DEFAULT 0,
+    INDEX idx_resumo_especialidade_consultas (TotalConsultas)
+);
+
+DELIMITER $$
+-- Fatia de ResumoSistema desta conexão. Os triggers guardam o valor numa
+-- variável antes do UPDATE: com a função no WHERE o UPDATE varreria (e
+-- travaria) todas as fatias.
+CREATE FUNCTION fn_resumo_fatia() RETURNS TINYINT
+NOT DETERMINISTIC NO SQL
+BEGIN
+    RETURN 1 + CONNECTION_ID() % 16;
+END $$
+
+CREATE TRIGGER tg_resumo_paciente_ins
+AFTER INSERT ON Paciente
+FOR EACH ROW
+BEGIN
+    DECLARE v_fatia TINYINT DEFAULT fn_resumo_fatia();
+    UPDATE ResumoSistema
+    SET TotalPacientes = TotalPacientes + 1,
+        SomaAnoNascimento = SomaAnoNascimento + YEAR(NEW.DataNascimento)
+    WHERE Id = v_fatia;
+END $$
+
+CREATE TRIGGER tg_resumo_paciente_upd
+AFTER UPDATE ON Paciente
+FOR EACH ROW
+BEGIN
+    DECLARE v_fatia TINYINT DEFAULT fn_resumo_fatia();
+    IF NEW.DataNascimento <> OLD.DataNascimento THEN
+        UPDATE ResumoSistema
+        SET SomaAnoNascimento = SomaAnoNascimento + YEAR(NEW.DataNascimento) - YEAR(OLD.DataNascimento)
+        WHERE Id = v_fatia;
+    END IF;
+END $$
+
+CREATE TRIGGER tg_resumo_paciente_del
+AFTER DELETE ON Paciente
+FOR EACH ROW
+BEGIN
+    DECLARE v_fatia TINYINT DEFAULT fn_resumo_fatia();
+    UPDATE ResumoSistema
+    SET TotalPacientes = TotalPacientes - 1,
+        SomaAnoNascimento = SomaAnoNascimento - YEAR(OLD.DataNascimento)
+    WHERE Id = v_fatia;
+END $$
+
+CREATE TRIGGER tg_resumo_medico_ins
+AFTER INSERT ON Medico
+FOR EACH ROW
+BEGIN
+    DECLARE v_fatia TINYINT DEFAULT fn_resumo_fatia();
+    UPDATE ResumoSistema SET TotalMedicos = TotalMedicos + 1 WHERE Id = v_fatia;
+    INSERT INTO ResumoEspecialidade (Especialidade, TotalMedicos) VALUES (NEW.Especialidade, 1)
+    ON DUPLICATE KEY UPDATE TotalMedicos = TotalMedicos + 1;
+END $$
+
+CREATE TRIGGER tg_resumo_medico_upd
+AFTER UPDATE ON Medico
+FOR EACH ROW
+BEGIN
+    IF NEW.Especialidade <> OLD.Especialidade THEN
+        UPDATE ResumoEspecialidade SET TotalMedicos = TotalMedicos - 1
+        WHERE Especialidade = OLD.Especialidade;
+        INSERT INTO ResumoEspecialidade (Especialidade, TotalMedicos) VALUES (NEW.Especialidade, 1)
+        ON DUPLICATE KEY UPDATE TotalMedicos = TotalMedicos + 1;
+    END IF;
+END $$
+
+CREATE TRIGGER tg_resumo_medico_del
+AFTER DELETE ON Medico
+FOR EACH ROW
+BEGIN
+    DECLARE v_fatia TINYINT DEFAULT fn_resumo_fatia();
+    UPDATE ResumoSistema SET TotalMedicos = TotalMedicos - 1 WHERE Id = v_fatia;
+    UPDATE ResumoEspecialidade SET TotalMedicos = TotalMedicos - 1
+    WHERE Especialidade = OLD.Especialidade;
+END $$
+
+CREATE TRIGGER tg_resumo_clinica_ins
+AFTER INSERT ON Clinica
+FOR EACH ROW
+BEGIN
+    DECLARE v_fatia TINYINT DEFAULT fn_resumo_fatia();
+    UPDATE ResumoSistema SET TotalClinicas = TotalClinicas + 1 WHERE Id = v_fatia;
+END $$
+
+-- O ON DELETE CASCADE de Consulta não dispara triggers; por isso as consultas
+-- da clínica são descontadas aqui, enquanto ainda existem (BEFORE DELETE).
+CREATE TRIGGER tg_resumo_clinica_del
+BEFORE DELETE ON Clinica
+FOR EACH ROW
+BEGIN
+    DECLARE v_fatia TINYINT DEFAULT fn_resumo_fatia();
+    UPDATE ResumoConsultaDia d
+    JOIN (
+        SELECT DATE(Data_Hora) AS Dia, COUNT(*) AS Total
+        FROM Consulta
+        WHERE CodCli = OLD.CodCli
+        GROUP BY DATE(Data_Hora)
+    ) x ON x.Dia = d.Dia
+    SET d.Total = d.Total - x.Total;
+    UPDATE ResumoSistema
+    SET TotalClinicas = TotalClinicas - 1,
+        TotalConsultas = TotalConsultas - (SELECT COUNT(*) FROM Consulta WHERE CodCli = OLD.CodCli)
+    WHERE Id = v_fatia;
+END $$
+
+CREATE TRIGGER tg_resumo_consulta_ins
+AFTER INSERT ON Consulta
+FOR EACH ROW
+BEGIN
+    DECLARE v_fatia TINYINT DEFAULT fn_resumo_fatia();
+    UPDATE ResumoSistema SET TotalConsultas = TotalConsultas + 1 WHERE Id = v_fatia;
+    INSERT INTO ResumoConsultaDia (Dia, Total) VALUES (DATE(NEW.Data_Hora), 1)
+    ON DUPLICATE KEY UPDATE Total = Total + 1;
+END $$
+
+CREATE TRIGGER tg_resumo_consulta_upd
+AFTER UPDATE ON Consulta
+FOR EACH ROW
+BEGIN
+    IF DATE(NEW.Data_Hora) <> DATE(OLD.Data_Hora) THEN
+        UPDATE ResumoConsultaDia SET Total = Total - 1 WHERE Dia = DATE(OLD.Data_Hora);
+        INSERT INTO ResumoConsultaDia (Dia, Total) VALUES (DATE(NEW.Data_Hora), 1)
+        ON DUPLICATE KEY UPDATE Total = Total + 1;
+    END IF;
+END $$
+
+CREATE TRIGGER tg_resumo_consulta_del
+AFTER DELETE ON Consulta
+FOR EACH ROW
+BEGIN
+    DECLARE v_fatia TINYINT DEFAULT fn_resumo_fatia();
+    UPDATE ResumoSistema SET TotalConsultas = TotalConsultas - 1 WHERE Id = v_fatia;
+    UPDATE ResumoConsultaDia SET Total = Total - 1 WHERE Dia = DATE(OLD.Data_Hora);
+END $$
+
+CREATE PROCEDURE sp_reconciliar_resumo()
+BEGIN
+    UPDATE ResumoSistema SET
+        TotalPacientes = 0,
+        SomaAnoNascimento = 0,
+        TotalMedicos = 0,
+        TotalClinicas = 0,
+        TotalConsultas = 0
+    WHERE Id <> 1;
+    UPDATE ResumoSistema SET
+        TotalPacientes = (SELECT COUNT(*) FROM Paciente),
+        SomaAnoNascimento = (SELECT COALESCE(SUM(YEAR(DataNascimento)), 0) FROM Paciente),
+        TotalMedicos = (SELECT COUNT(*) FROM Medico),
+        TotalClinicas = (SELECT COUNT(*) FROM Clinica),
+        TotalConsultas = (SELECT COUNT(*) FROM Consulta),
+        ReconciliadoEm = NOW()
+    WHERE Id = 1;
+
+    DELETE FROM ResumoConsultaDia;
+    INSERT INTO ResumoConsultaDia (Dia, Total)
+    SELECT DATE(Data_Hora), COUNT(*) FROM Consulta GROUP BY DATE(Data_Hora);
+
+    UPDATE ResumoEspecialidade SET TotalMedicos = 0;
+    INSERT INTO ResumoEspecialidade (Especialidade, TotalMedicos)
+    SELECT x.Especialidade, x.TotalMedicos
+    FROM (
+        SELECT Especialidade, COUNT(*) AS TotalMedicos
+        FROM Medico
+        GROUP BY Especialidade
+    ) x
+    ON DUPLICATE KEY UPDATE TotalMedicos = x.TotalMedicos;
+
+    CALL sp_refresh_rollups();
+END $$
+DELIMITER ;
+
+-- RANKINGS POR MÉDICO E ESPECIALIDADE (migração 004, ver migrations/004_resumo_ranking.sql)
+-- Rollups mantidos por triggers; sp_refresh_rollups() reconstrói tudo.
+CREATE TABLE ResumoMedico (
+    CodMed CHAR(7) NOT NULL PRIMARY KEY,
+    TotalConsultas BIGINT NOT NULL DEFAULT 0,
+    PacientesUnicos BIGINT NOT NULL DEFAULT 0,
+    INDEX idx_resumo_medico_consultas (TotalConsultas)
+);
+
+CREATE TABLE ResumoMedicoPaciente (
+    CodMed CHAR(7) NOT NULL,
+    CpfPaciente CHAR(14) NOT NULL,
+    Total BIGINT NOT NULL DEFAULT 0,
+    PRIMARY KEY (CodMed, CpfPaciente)
+);
+
+CREATE TABLE ResumoEspecialidadePaciente (
+    Especialidade VARCHAR(30) NOT NULL,
+    CpfPaciente CHAR(14) NOT NULL,
+    Total BIGINT NOT NULL DEFAULT 0,
+    PRIMARY KEY (Especialidade, CpfPaciente)
+);
+
+CREATE OR REPLACE VIEW Vw_QtdeConsultasPorMedico AS
+SELECT
+    m.CodMed,
+    m.NomeMed,
+    m.Especialidade,
+    COALESCE(r.TotalConsultas, 0) AS TotalConsultas
+FROM Medico m
+LEFT JOIN ResumoMedico r ON r.CodMed = m.CodMed;
+
+DELIMITER $$
+-- Aplica +1/-1 consulta do par (médico, paciente) aos rollups
+CREATE PROCEDURE sp_resumo_consulta_delta(IN p_codmed CHAR(7), IN p_cpf CHAR(14), IN p_delta INT)
+BEGIN
+    DECLARE v_esp VARCHAR(30);
+    DECLARE v_total BIGINT DEFAULT 0;
+    DECLARE v_par INT DEFAULT 0;
+
+    SELECT Especialidade INTO v_esp FROM Medico WHERE CodMed = p_codmed;
+
+    INSERT INTO ResumoMedicoPaciente (CodMed, CpfPaciente, Total) VALUES (p_codmed, p_cpf, p_delta)
+    ON DUPLICATE KEY UPDATE Total = Total + p_delta;
+    SELECT Total INTO v_total FROM ResumoMedicoPaciente WHERE CodMed = p_codmed AND CpfPaciente = p_cpf;
+    -- +1 quando o par surge, -1 quando desaparece
+    SET v_par = IF(p_delta > 0, v_total = p_delta, -(v_total <= 0));
+    IF v_total <= 0 THEN
+        DELETE FROM ResumoMedicoPaciente WHERE CodMed = p_codmed AND CpfPaciente = p_cpf;
+    END IF;
+    INSERT INTO ResumoMedico (CodMed, TotalConsultas, PacientesUnicos) VALUES (p_codmed, p_delta, GREATEST(v_par, 0))
+    ON DUPLICATE KEY UPDATE TotalConsultas = TotalConsultas + p_delta, PacientesUnicos = PacientesUnicos + v_par;
+
+    INSERT INTO ResumoEspecialidadePaciente (Especialidade, CpfPaciente, Total) VALUES (v_esp, p_cpf, p_delta)
+    ON DUPLICATE KEY UPDATE Total = Total + p_delta;
+    SELECT Total INTO v_total FROM ResumoEspecialidadePaciente WHERE Especialidade = v_esp AND CpfPaciente = p_cpf;
+    SET v_par = IF(p_delta > 0, v_total = p_delta, -(v_total <= 0));
+    IF v_total <= 0 THEN
+        DELETE FROM ResumoEspecialidadePaciente WHERE Especialidade = v_esp AND CpfPaciente = p_cpf;
+    END IF;
+    INSERT INTO ResumoEspecialidade (Especialidade, TotalConsultas, PacientesUnicos)
+    VALUES (v_esp, p_delta, GREATEST(v_par, 0))
+    ON DUPLICATE KEY UPDATE TotalConsultas = TotalConsultas + p_delta, PacientesUnicos = PacientesUnicos + v_par;
+END $$
+
+-- Desconta as consultas que o ON DELETE CASCADE vai remover (cascata não dispara triggers)
+CREATE PROCEDURE sp_resumo_remover_clinica(IN p_codcli CHAR(7))
+BEGIN
+    DECLARE v_fim INT DEFAULT 0;
+    DECLARE v_codmed CHAR(7);
+    DECLARE v_cpf CHAR(14);
+    DECLARE cur CURSOR FOR SELECT CodMed, CpfPaciente FROM Consulta WHERE CodCli = p_codcli;
+    DECLARE CONTINUE HANDLER FOR NOT FOUND SET v_fim = 1;
+    OPEN cur;
+    laco: LOOP
+        FETCH cur INTO v_codmed, v_cpf;
+        IF v_fim THEN
+            LEAVE laco;
+        END IF;
+        CALL sp_resumo_consulta_delta(v_codmed, v_cpf, -1);
+    END LOOP;
+    CLOSE cur;
+END $$
+
+CREATE PROCEDURE sp_refresh_rollups()
+BEGIN
+    DELETE FROM ResumoMedicoPaciente;
+    INSERT INTO ResumoMedicoPaciente (CodMed, CpfPaciente, Total)
+    SELECT CodMed, CpfPaciente, COUNT(*) FROM Consulta GROUP BY CodMed, CpfPaciente;
+
+    DELETE FROM ResumoMedico;
+    INSERT INTO ResumoMedico (CodMed, TotalConsultas, PacientesUnicos)
+    SELECT m.CodMed, COALESCE(SUM(mp.Total), 0), COUNT(mp.CpfPaciente)
+    FROM Medico m
+    LEFT JOIN ResumoMedicoPaciente mp ON mp.CodMed = m.CodMed
+    GROUP BY m.CodMed;
+
+    DELETE FROM ResumoEspecialidadePaciente;
+    INSERT INTO ResumoEspecialidadePaciente (Especialidade, CpfPaciente, Total)
+    SELECT m.Especialidade, mp.CpfPaciente, SUM(mp.Total)
+    FROM ResumoMedicoPaciente mp
+    INNER JOIN Medico m ON m.CodMed = mp.CodMed
+    GROUP BY m.Especialidade, mp.CpfPaciente;
+
+    UPDATE ResumoEspecialidade SET TotalConsultas = 0, PacientesUnicos = 0;
+    INSERT INTO ResumoEspecialidade (Especialidade, TotalConsultas, PacientesUnicos)
+    SELECT x.Especialidade, x.TotalConsultas, x.PacientesUnicos
+    FROM (
+        SELECT Especialidade, SUM(Total) AS TotalConsultas, COUNT(*) AS PacientesUnicos
+        FROM ResumoEspecialidadePaciente
+        GROUP BY Especialidade
+    ) x
+    ON DUPLICATE KEY UPDATE TotalConsultas = x.TotalConsultas, PacientesUnicos = x.PacientesUnicos;
+END $$
+
+CREATE TRIGGER tg_ranking_consulta_ins
+AFTER INSERT ON Consulta
+FOR EACH ROW
+BEGIN
+    CALL sp_resumo_consulta_delta(NEW.CodMed, NEW.CpfPaciente, 1);
+END $$
+
+CREATE TRIGGER tg_ranking_consulta_upd
+AFTER UPDATE ON Consulta
+FOR EACH ROW
+BEGIN
+    IF NEW.CodMed <> OLD.CodMed OR NEW.CpfPaciente <> OLD.CpfPaciente THEN
+        CALL sp_resumo_consulta_delta(OLD.CodMed, OLD.CpfPaciente, -1);
+        CALL sp_resumo_consulta_delta(NEW.CodMed, NEW.CpfPaciente, 1);
+    END IF;
+END $$
+
+CREATE TRIGGER tg_ranking_consulta_del
+AFTER DELETE ON Consulta
+FOR EACH ROW
+BEGIN
+    CALL sp_resumo_consulta_delta(OLD.CodMed, OLD.CpfPaciente, -1);
+END $$
+
+CREATE TRIGGER tg_ranking_medico_ins
+AFTER INSERT ON Medico
+FOR EACH ROW
+BEGIN
+    INSERT INTO ResumoMedico (CodMed) VALUES (NEW.CodMed);
+END $$
+
+-- Troca de especialidade: move as consultas e os pacientes do médico
+CREATE TRIGGER tg_ranking_medico_upd
+AFTER UPDATE ON Medico
+FOR EACH ROW
+BEGIN
+    IF NEW.Especialidade <> OLD.Especialidade THEN
+        UPDATE ResumoEspecialidade e
+        JOIN ResumoMedico r ON r.CodMed = NEW.CodMed
+        SET e.TotalConsultas = e.TotalConsultas - r.TotalConsultas
+        WHERE e.Especialidade = OLD.Especialidade;
+        INSERT INTO ResumoEspecialidade (Especialidade, TotalConsultas)
+        SELECT NEW.Especialidade, r.TotalConsultas FROM ResumoMedico r WHERE r.CodMed = NEW.CodMed
+        ON DUPLICATE KEY UPDATE TotalConsultas = ResumoEspecialidade.TotalConsultas + r.TotalConsultas;
+
+        UPDATE ResumoEspecialidadePaciente ep
+        JOIN ResumoMedicoPaciente mp ON mp.CpfPaciente = ep.CpfPaciente AND mp.CodMed = NEW.CodMed
+        SET ep.Total = ep.Total - mp.Total
+        WHERE ep.Especialidade = OLD.Especialidade;
+        DELETE FROM ResumoEspecialidadePaciente WHERE Especialidade = OLD.Especialidade AND Total <= 0;
+        INSERT INTO ResumoEspecialidadePaciente (Especialidade, CpfPaciente, Total)
+        SELECT NEW.Especialidade, mp.CpfPaciente, mp.Total FROM ResumoMedicoPaciente mp WHERE mp.CodMed = NEW.CodMed
+        ON DUPLICATE KEY UPDATE Total = ResumoEspecialidadePaciente.Total + mp.Total;
+
+        UPDATE ResumoEspecialidade
+        SET PacientesUnicos = (
+            SELECT COUNT(*) FROM ResumoEspecialidadePaciente WHERE Especialidade = OLD.Especialidade
+        )
+        WHERE Especialidade = OLD.Especialidade;
+        UPDATE ResumoEspecialidade
+        SET PacientesUnicos = (
+            SELECT COUNT(*) FROM ResumoEspecialidadePaciente WHERE Especialidade = NEW.Especialidade
+        )
+        WHERE Especialidade = NEW.Especialidade;
+    END IF;
+END $$
+
+CREATE TRIGGER tg_ranking_medico_del
+AFTER DELETE ON Medico
+FOR EACH ROW
+BEGIN
+    DELETE FROM ResumoMedico WHERE CodMed = OLD.CodMed;
+END $$
+
+CREATE TRIGGER tg_ranking_clinica_del
+BEFORE DELETE ON Clinica
+FOR EACH ROW
+BEGIN
+    CALL sp_resumo_remover_clinica(OLD.CodCli);
+END $$
+DELIMITER ;
+
+CREATE EVENT ev_reconciliar_resumo
+ON SCHEDULE EVERY 1 DAY
+DO CALL sp_reconciliar_resumo();
+
+CALL sp_reconciliar_resumo();
+
 COMMIT;
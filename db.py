@@ -1,35 +1,725 @@
+import bisect
+from collections import OrderedDict, deque
+import contextlib
 from datetime import datetime, date
+import functools
+import logging
+import operator
 import re
 import mysql.connector
 from mysql.connector import Error
 import os
+import threading
+import time
+import weakref
 
+from agenda import IndiceAgenda, PoliticaAgendamento
+from busca import IndiceNomes
+
+logger = logging.getLogger(__name__)
 
 class ValidationError(Exception):
     pass
 
 
+# Padrões de validação, compilados uma vez (validate_* e validar_colunas)
+_RE_CPF = re.compile(r'^[0-9]{3}\.[0-9]{3}\.[0-9]{3}-[0-9]{2}$')
+_RE_EMAIL = re.compile(r'^[^@\s]+@[^@\s]+\.[^@\s]+$')
+_RE_TELEFONE = re.compile(r'^\([0-9]{2}\)\s*[0-9]{5}-[0-9]{4}$')
+_RE_TELEFONE_CLINICA = re.compile(r'^\([0-9]{2}\)\s*[0-9]{4}-[0-9]{4}$')
+
+
+_PESOS_DV1 = (10, 9, 8, 7, 6, 5, 4, 3, 2)
+_PESOS_DV2 = (11, 10, 9, 8, 7, 6, 5, 4, 3, 2)
+
+
+def cpf_digitos_validos(cpf):
+    """Confere os dígitos verificadores de um CPF já no formato XXX.XXX.XXX-XX."""
+    d = list(map(int, cpf[:3] + cpf[4:7] + cpf[8:11] + cpf[12:14]))
+    if len(d) != 11 or d.count(d[0]) == 11:
+        # sequências como 111.111.111-11 passam na conta, mas não são CPFs
+        return False
+    return (d[9] == sum(map(operator.mul, d, _PESOS_DV1)) * 10 % 11 % 10
+            and d[10] == sum(map(operator.mul, d, _PESOS_DV2)) * 10 % 11 % 10)
+
+
+_FORMATOS_DATA = ("%Y-%m-%d %H:%M:%S", "%Y-%m-%dT%H:%M:%S", "%Y-%m-%d")
+
+
+@functools.lru_cache(maxsize=8192)
+def _datetime_de_texto(texto):
+    """
+    Caminho rápido: fromisoformat, para as formas com zeros à esquerda
+    ('YYYY-MM-DD', 'YYYY-MM-DD HH:MM:SS', com 'T', com minutos só ou fração).
+    Datas sem zeros ('2026-1-5', '2026-01-05 9:00:00') caem no strptime, como
+    antes. A forma compacta ('20260105') e valores com fuso ('...Z',
+    '...-03:00') são recusados: as colunas DATETIME não têm fuso e um
+    datetime com tzinfo não se compara com os locais.
+    Memoizado: lotes e filtros repetem muito as mesmas datas.
+    """
+    try:
+        dt = datetime.fromisoformat(texto)
+    except ValueError:
+        dt = None
+    if dt is None or texto[4:5] != '-':
+        for fmt in _FORMATOS_DATA:
+            try:
+                dt = datetime.strptime(texto, fmt)
+                break
+            except ValueError:
+                continue
+        else:
+            raise ValidationError("Formato de data/hora inválido. Use YYYY-MM-DD HH:MM:SS")
+    if dt.tzinfo is not None:
+        raise ValidationError("Data/hora com fuso horário não é aceita. Use YYYY-MM-DD HH:MM:SS")
+    return dt
+
+
+# Erros do cliente que indicam conexão perdida (server gone away / lost connection)
+_CONNECTION_LOST_ERRNOS = {2006, 2013, 2055}
+# ER_NO_SUCH_TABLE: banco sem a migração que cria a tabela
+_ER_NO_SUCH_TABLE = 1146
+
+
+def _errno(exc):
+    """errno do erro do driver, mesmo quando _execute o reembrulhou em Exception."""
+    while exc is not None:
+        errno = getattr(exc, 'errno', None)
+        if errno is not None:
+            return errno
+        exc = exc.__cause__ or exc.__context__
+    return None
+
+
+class LivenessCheck:
+    """
+    Decide quando verificar se uma conexão ainda está viva.
+    `is_connected()` faz um ping no servidor; só pingamos conexões ociosas há
+    mais de `idle_threshold` segundos ou marcadas como suspeitas após um erro.
+    """
+
+    def __init__(self, idle_threshold=30.0):
+        self.idle_threshold = idle_threshold
+        self._last_used = {}
+        self._lock = threading.Lock()
+        self._pings = 0
+        self._pings_avoided = 0
+        self._dead = 0
+        self._retries = 0
+
+    def touch(self, conn):
+        self._last_used[id(conn)] = time.monotonic()
+
+    def mark_suspect(self, conn):
+        self._last_used.pop(id(conn), None)
+
+    def forget(self, conn):
+        self._last_used.pop(id(conn), None)
+
+    def is_alive(self, conn):
+        last = self._last_used.get(id(conn))
+        if last is not None and time.monotonic() - last < self.idle_threshold:
+            with self._lock:
+                self._pings_avoided += 1
+            return True
+        with self._lock:
+            self._pings += 1
+        try:
+            alive = conn.is_connected()
+        except Exception:
+            alive = False
+        if not alive:
+            with self._lock:
+                self._dead += 1
+        return alive
+
+    def count_retry(self):
+        with self._lock:
+            self._retries += 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                'idle_threshold': self.idle_threshold,
+                'pings': self._pings,
+                'pings_avoided': self._pings_avoided,
+                'dead_connections': self._dead,
+                'read_retries': self._retries,
+            }
+
+
+class ConnectionPool:
+    """
+    Pool de conexões MySQL com checkout/checkin explícitos.
+    - size: número máximo de conexões abertas
+    - timeout: segundos de espera por uma conexão livre antes de falhar
+    Conexões são criadas sob demanda e validadas a cada checkout. Quem
+    espera é acordado tanto quando uma conexão volta ao pool quanto quando
+    uma é descartada (liberando vaga para criar outra).
+    """
+
+    def __init__(self, factory, size=5, timeout=10.0, liveness=None):
+        if size < 1:
+            raise ValueError("O tamanho do pool deve ser >= 1.")
+        self._factory = factory
+        self._liveness = liveness or LivenessCheck()
+        self.size = size
+        self.timeout = timeout
+        self._idle = []  # pilha (LIFO): a conexão usada mais recentemente sai primeiro
+        self._lock = threading.Lock()
+        self._disponivel = threading.Condition(self._lock)
+        self._created = 0
+        self._in_use = 0
+        self._checkouts = 0
+        self._timeouts = 0
+        self._discarded = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+
+    def _discard(self, conn):
+        self._liveness.forget(conn)
+        try:
+            conn.close()
+        except Exception:
+            pass
+        with self._disponivel:
+            self._created -= 1
+            self._discarded += 1
+            # abriu vaga para uma nova conexão
+            self._disponivel.notify()
+
+    def _reservar(self, deadline):
+        """
+        Espera até haver uma conexão ociosa ou vaga para criar uma.
+        Retorna (conexão ociosa, False) ou (None, True) com a vaga já reservada.
+        """
+        with self._disponivel:
+            while True:
+                if self._idle:
+                    return self._idle.pop(), False
+                if self._created < self.size:
+                    self._created += 1
+                    return None, True
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._timeouts += 1
+                    raise Exception(
+                        f"Tempo esgotado aguardando conexão do pool ({self.timeout}s)."
+                    )
+                self._disponivel.wait(remaining)
+
+    def acquire(self):
+        """Retira uma conexão do pool (bloqueia até `timeout` se esgotado)."""
+        start = time.monotonic()
+        deadline = start + self.timeout
+        while True:
+            conn, criar = self._reservar(deadline)
+            if criar:
+                try:
+                    conn = self._factory()
+                except Exception:
+                    with self._disponivel:
+                        self._created -= 1
+                        self._disponivel.notify()
+                    raise
+            if self._liveness.is_alive(conn):
+                break
+            self._discard(conn)
+
+        waited = time.monotonic() - start
+        with self._lock:
+            self._in_use += 1
+            self._checkouts += 1
+            self._wait_total += waited
+            self._wait_max = max(self._wait_max, waited)
+        return conn
+
+    def release(self, conn, discard=False):
+        """Devolve a conexão ao pool (ou a descarta se `discard`)."""
+        with self._lock:
+            self._in_use -= 1
+        if discard:
+            self._discard(conn)
+            return
+        try:
+            # garante que nenhuma transação pendente vaze para o próximo uso
+            if getattr(conn, 'in_transaction', True):
+                conn.rollback()
+        except Exception:
+            self._discard(conn)
+            return
+        with self._disponivel:
+            self._idle.append(conn)
+            self._disponivel.notify()
+
+    def close(self):
+        """Fecha todas as conexões ociosas."""
+        with self._disponivel:
+            ociosas, self._idle = self._idle, []
+        for conn in ociosas:
+            self._discard(conn)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'size': self.size,
+                'created': self._created,
+                'in_use': self._in_use,
+                'idle': len(self._idle),
+                'checkouts': self._checkouts,
+                'timeouts': self._timeouts,
+                'discarded': self._discarded,
+                'wait_time_total': round(self._wait_total, 6),
+                'wait_time_max': round(self._wait_max, 6),
+                'wait_time_avg': round(self._wait_total / self._checkouts, 6) if self._checkouts else 0.0,
+            }
+
+
+class QueryCache:
+    """
+    Cache de resultados de leitura com TTL e limite LRU (max_size entradas).
+    Cada entrada guarda as tabelas de que depende; `invalidate(*tabelas)`
+    remove as afetadas. Um contador de geração por tabela impede que uma
+    leitura iniciada antes de uma escrita grave no cache um resultado antigo.
+    """
+
+    def __init__(self, ttl=30.0, max_size=256):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._entries = OrderedDict()  # chave -> (expira_em, tabelas, valor)
+        self._generation = {}
+        self._clears = 0
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._expirations = 0
+        self._invalidations = 0
+
+    @property
+    def enabled(self):
+        return self.ttl > 0 and self.max_size > 0
+
+    def generation(self, tabelas):
+        with self._lock:
+            return self._clears, tuple(self._generation.get(t, 0) for t in tabelas)
+
+    def get(self, key):
+        """Retorna (True, valor) num hit válido, (False, None) caso contrário."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] > time.monotonic():
+                    self._entries.move_to_end(key)
+                    self._hits += 1
+                    return True, entry[2]
+                del self._entries[key]
+                self._expirations += 1
+            self._misses += 1
+            return False, None
+
+    def put(self, key, tabelas, geracao, value):
+        with self._lock:
+            if geracao != (self._clears, tuple(self._generation.get(t, 0) for t in tabelas)):
+                # houve escrita nessas tabelas durante a leitura
+                return
+            self._entries[key] = (time.monotonic() + self.ttl, tabelas, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self._evictions += 1
+
+    def invalidate(self, *tabelas):
+        """Remove as entradas que dependem de `tabelas` (todas, se nenhuma for dada)."""
+        with self._lock:
+            if not tabelas:
+                self._clears += 1
+                self._invalidations += len(self._entries)
+                self._entries.clear()
+                return
+            alvo = set(tabelas)
+            for t in alvo:
+                self._generation[t] = self._generation.get(t, 0) + 1
+            chaves = [k for k, entry in self._entries.items() if alvo & entry[1]]
+            for k in chaves:
+                del self._entries[k]
+            self._invalidations += len(chaves)
+
+    def stats(self):
+        with self._lock:
+            consultas = self._hits + self._misses
+            return {
+                'ttl': self.ttl,
+                'max_size': self.max_size,
+                'size': len(self._entries),
+                'hits': self._hits,
+                'misses': self._misses,
+                'hit_rate': round(self._hits / consultas, 4) if consultas else 0.0,
+                'evictions': self._evictions,
+                'expirations': self._expirations,
+                'invalidations': self._invalidations,
+            }
+
+
+def _copiar_resultado(valor):
+    """Cópia das linhas, para que o chamador não altere o que está no cache."""
+    if hasattr(valor, 'iloc'):
+        # DataFrame de como_dataframe(): a cópia rasa compartilharia os buffers
+        # das colunas, e df.loc[...] = x alteraria o resultado em cache
+        return valor.copy()
+    if isinstance(valor, list):
+        return [dict(r) if isinstance(r, dict) else r for r in valor]
+    if isinstance(valor, dict):
+        return {k: _copiar_resultado(v) for k, v in valor.items()}
+    return valor
+
+
+def _rotulado(fn):
+    """
+    Atribui a `fn` (em metrics()) as chamadas a _execute feitas durante ela,
+    nesta thread. Chamadas aninhadas ficam com o método mais interno.
+    """
+    nome = fn.__name__
+
+    @functools.wraps(fn)
+    def wrapper(self, *args, **kwargs):
+        rotulo = self._rotulo
+        anterior = getattr(rotulo, 'metodo', None)
+        rotulo.metodo = nome
+        try:
+            return fn(self, *args, **kwargs)
+        finally:
+            rotulo.metodo = anterior
+    return wrapper
+
+
+def _cacheado(*tabelas):
+    """Leitura read-through em `self._cache`, chaveada por método e argumentos."""
+    dependencias = frozenset(tabelas)
+
+    def decorator(fn):
+        fn = _rotulado(fn)
+
+        @functools.wraps(fn)
+        def wrapper(self, *args, **kwargs):
+            cache = self._cache
+            if not cache.enabled or self._conexao_tx() is not None:
+                # dentro de transaction() a leitura pode ver escritas ainda não confirmadas
+                return fn(self, *args, **kwargs)
+            key = (fn.__name__, args, tuple(sorted(kwargs.items())), self._em_dataframe())
+            try:
+                hash(key)
+            except TypeError:
+                return fn(self, *args, **kwargs)
+            hit, valor = cache.get(key)
+            if not hit:
+                geracao = cache.generation(dependencias)
+                valor = fn(self, *args, **kwargs)
+                cache.put(key, dependencias, geracao, valor)
+            return _copiar_resultado(valor)
+        return wrapper
+    return decorator
+
+
+def _invalida(*tabelas):
+    """Invalida no cache as leituras que dependem de `tabelas` (todas, se nenhuma for dada)."""
+    def decorator(fn):
+        fn = _rotulado(fn)
+
+        @functools.wraps(fn)
+        def wrapper(self, *args, **kwargs):
+            inicio = time.perf_counter()
+            erro = True
+            try:
+                resultado = fn(self, *args, **kwargs)
+                erro = False
+                return resultado
+            finally:
+                # também em caso de erro: lotes podem ter gravado parte das linhas
+                self._apos_commit(self._cache.invalidate, *tabelas)
+                self._operacoes.registrar(fn.__name__, (time.perf_counter() - inicio) * 1000, 0, erro)
+        return wrapper
+    return decorator
+
+
+@functools.lru_cache(maxsize=256)
+def _sql_update(tabela, colunas, chave):
+    """
+    UPDATE para um conjunto de colunas, gerado uma vez por combinação: o mesmo
+    texto reaproveita o statement preparado da conexão.
+    """
+    sets = ', '.join(f"{c} = %s" for c in colunas)
+    where = ' AND '.join(f"{c} = %s" for c in chave)
+    return f"UPDATE {tabela} SET {sets} WHERE {where}"
+
+
+class PreparedStatements:
+    """
+    Statements preparados no servidor, reaproveitados por conexão (modo opt-in).
+    Cada conexão guarda até `max_por_conexao` cursores preparados em LRU,
+    chaveados pelo texto do SQL; reexecutar um deles evita o parse no servidor.
+    O parse economizado é uma estimativa feita por SQL: (média da 1ª execução,
+    que inclui o prepare) - (média das reexecuções), vezes o número de
+    reexecuções, somado entre os SQLs. Uma média global misturaria statements
+    de custos diferentes. Só os primeiros `max_sqls` textos distintos entram
+    nessa estimativa.
+    """
+
+    def __init__(self, max_por_conexao=64, max_sqls=1024):
+        self.max_por_conexao = max_por_conexao
+        self.max_sqls = max_sqls
+        self._por_conexao = weakref.WeakKeyDictionary()  # conn -> OrderedDict(sql -> cursor)
+        self._lock = threading.Lock()
+        self._prepares = 0
+        self._reusos = 0
+        self._descartes = 0
+        self._tempo_prepares = 0.0
+        self._tempo_reusos = 0.0
+        self._por_sql = {}  # sql -> [prepares, tempo_prepares, reusos, tempo_reusos]
+
+    def cursor(self, conn, sql):
+        """Retorna (cursor, novo): o cursor preparado de `sql` nesta conexão."""
+        with self._lock:
+            cursores = self._por_conexao.get(conn)
+            if cursores is None:
+                cursores = self._por_conexao[conn] = OrderedDict()
+            cursor = cursores.get(sql)
+            if cursor is not None:
+                cursores.move_to_end(sql)
+                return cursor, False
+        cursor = conn.cursor(prepared=True)
+        antigos = []
+        with self._lock:
+            cursores[sql] = cursor
+            while len(cursores) > self.max_por_conexao:
+                antigos.append(cursores.popitem(last=False)[1])
+                self._descartes += 1
+        for antigo in antigos:
+            # fechar o cursor libera o statement no servidor
+            self._fechar(antigo)
+        return cursor, True
+
+    def descartar(self, conn, sql):
+        """Remove o cursor de `sql` (após um erro ele pode estar inconsistente)."""
+        with self._lock:
+            cursores = self._por_conexao.get(conn)
+            cursor = cursores.pop(sql, None) if cursores else None
+        if cursor is not None:
+            self._fechar(cursor)
+
+    @staticmethod
+    def _fechar(cursor):
+        try:
+            cursor.close()
+        except Exception:
+            pass
+
+    def registrar(self, sql, novo, segundos):
+        with self._lock:
+            t = self._por_sql.get(sql)
+            if t is None and len(self._por_sql) < self.max_sqls:
+                t = self._por_sql[sql] = [0, 0.0, 0, 0.0]
+            if novo:
+                self._prepares += 1
+                self._tempo_prepares += segundos
+            else:
+                self._reusos += 1
+                self._tempo_reusos += segundos
+            if t is not None:
+                i = 0 if novo else 2
+                t[i] += 1
+                t[i + 1] += segundos
+
+    def stats(self):
+        with self._lock:
+            media_prepare = self._tempo_prepares / self._prepares if self._prepares else 0.0
+            media_reuso = self._tempo_reusos / self._reusos if self._reusos else 0.0
+            economia = sum(
+                max(tp / p - tr / r, 0.0) * r
+                for p, tp, r, tr in self._por_sql.values() if p and r
+            )
+            return {
+                'conexoes': len(self._por_conexao),
+                'statements': sum(len(c) for c in self._por_conexao.values()),
+                'prepares': self._prepares,
+                'reusos': self._reusos,
+                'descartes': self._descartes,
+                'media_primeira_execucao_ms': round(media_prepare * 1000, 3),
+                'media_reexecucao_ms': round(media_reuso * 1000, 3),
+                'parse_economizado_ms': round(economia * 1000, 3),
+            }
+
+
+class MetricasConsultas:
+    """
+    Latência, linhas retornadas e erros de _execute, por método público que
+    originou a consulta. O histograma usa buckets fixos (BUCKETS_MS), então
+    registrar é um bisect e alguns incrementos sob um lock.
+    - limite_lenta_ms: consultas a partir disso vão para o log com o EXPLAIN (0 desativa)
+    - max_lentas: quantas consultas lentas recentes metrics() mostra
+    - intervalo_explain: segundos mínimos entre dois EXPLAIN do mesmo SQL
+    """
+
+    BUCKETS_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+    def __init__(self, limite_lenta_ms=0, max_lentas=50, intervalo_explain=60.0):
+        self.limite_lenta_ms = limite_lenta_ms
+        self.intervalo_explain = intervalo_explain
+        self._lock = threading.Lock()
+        self._por_metodo = {}  # metodo -> [chamadas, erros, linhas, total_ms, max_ms, buckets]
+        self._lentas = deque(maxlen=max_lentas)
+        self._ultimo_explain = {}  # sql -> instante do último EXPLAIN
+
+    def registrar(self, metodo, ms, linhas, erro):
+        i = bisect.bisect_left(self.BUCKETS_MS, ms)
+        with self._lock:
+            m = self._por_metodo.get(metodo)
+            if m is None:
+                m = self._por_metodo[metodo] = [0, 0, 0, 0.0, 0.0, [0] * (len(self.BUCKETS_MS) + 1)]
+            m[0] += 1
+            if erro:
+                m[1] += 1
+            m[2] += linhas
+            m[3] += ms
+            if ms > m[4]:
+                m[4] = ms
+            m[5][i] += 1
+
+    def lenta(self, ms):
+        return 0 < self.limite_lenta_ms <= ms
+
+    def deve_explicar(self, sql):
+        """True no máximo uma vez por `intervalo_explain` para cada SQL."""
+        agora = time.monotonic()
+        with self._lock:
+            ultimo = self._ultimo_explain.get(sql)
+            if ultimo is not None and agora - ultimo < self.intervalo_explain:
+                return False
+            if len(self._ultimo_explain) >= 1024:
+                self._ultimo_explain.clear()
+            self._ultimo_explain[sql] = agora
+            return True
+
+    def registrar_lenta(self, metodo, sql, ms, explain):
+        with self._lock:
+            self._lentas.append({
+                'metodo': metodo,
+                'sql': sql,
+                'ms': round(ms, 3),
+                'quando': datetime.now().isoformat(timespec='seconds'),
+                'explain': explain,
+            })
+
+    def _percentil(self, buckets, chamadas, max_ms, q):
+        """Limite superior do bucket que contém o quantil `q` (limitado ao máximo observado)."""
+        alvo = q * chamadas
+        acumulado = 0
+        for limite, n in zip(self.BUCKETS_MS, buckets):
+            acumulado += n
+            if acumulado >= alvo:
+                return min(limite, round(max_ms, 3))
+        return round(max_ms, 3)
+
+    def snapshot(self):
+        with self._lock:
+            metodos = {}
+            for metodo, (chamadas, erros, linhas, total_ms, max_ms, buckets) in self._por_metodo.items():
+                metodos[metodo] = {
+                    'chamadas': chamadas,
+                    'erros': erros,
+                    'linhas': linhas,
+                    'total_ms': round(total_ms, 3),
+                    'media_ms': round(total_ms / chamadas, 3),
+                    'max_ms': round(max_ms, 3),
+                    'p50_ms': self._percentil(buckets, chamadas, max_ms, 0.50),
+                    'p95_ms': self._percentil(buckets, chamadas, max_ms, 0.95),
+                    'p99_ms': self._percentil(buckets, chamadas, max_ms, 0.99),
+                    # contagem por bucket (não acumulada); '+Inf' acima do último limite
+                    'histograma': dict(zip([f'<={b}' for b in self.BUCKETS_MS] + ['+Inf'], buckets)),
+                }
+            return {
+                'limite_lenta_ms': self.limite_lenta_ms,
+                'buckets_ms': self.BUCKETS_MS,
+                'metodos': metodos,
+                'lentas': list(self._lentas),
+            }
+
+    def reset(self):
+        with self._lock:
+            self._por_metodo.clear()
+            self._lentas.clear()
+            self._ultimo_explain.clear()
+
+
+def _contar_linhas(resultado):
+    if resultado is None:
+        return 0
+    if isinstance(resultado, dict):
+        return 1
+    try:
+        return len(resultado)
+    except TypeError:
+        return 0
+
+
 class MySQLDB:
-    def __init__(self, host=None, user=None, password=None, database=None, port=None):
+    def __init__(self, host=None, user=None, password=None, database=None, port=None,
+                 pool_size=None, pool_timeout=None, liveness_idle=None,
+                 cache_ttl=None, cache_size=None, agenda_duracao=None, prepared=None,
+                 slow_query_ms=None, politica_ttl=None):
         self.host = host or os.getenv('DB_HOST', 'localhost')
         self.user = user or os.getenv('DB_USER', 'root')
         self.password = password or os.getenv('DB_PASSWORD', '')
         self.database = database or os.getenv('DB_NAME', 'consultas_medicas')
         self.port = port or int(os.getenv('DB_PORT', 3306))
+        # pool_size = 0 mantém o modo antigo (uma única conexão em self.conn)
+        self.pool_size = pool_size if pool_size is not None else int(os.getenv('DB_POOL_SIZE', 0))
+        self.pool_timeout = pool_timeout if pool_timeout is not None else float(os.getenv('DB_POOL_TIMEOUT', 10))
+        # segundos sem uso após os quais a conexão é pingada antes de ser reutilizada
+        self.liveness_idle = (liveness_idle if liveness_idle is not None
+                              else float(os.getenv('DB_LIVENESS_IDLE', 30)))
+        self._liveness = LivenessCheck(self.liveness_idle)
+        # cache de leituras (segundos de validade); 0 desativa
+        self.cache_ttl = cache_ttl if cache_ttl is not None else float(os.getenv('DB_CACHE_TTL', 0))
+        self.cache_size = cache_size if cache_size is not None else int(os.getenv('DB_CACHE_SIZE', 256))
+        self._cache = QueryCache(self.cache_ttl, self.cache_size)
+        # statements preparados reaproveitados por conexão (opt-in, DB_PREPARED=1)
+        self.prepared = prepared if prepared is not None else os.getenv('DB_PREPARED', '0') == '1'
+        self._preparados = PreparedStatements() if self.prepared else None
+        # métricas de _execute por método; consultas acima de slow_query_ms vão para o log (0 desativa)
+        self.slow_query_ms = (slow_query_ms if slow_query_ms is not None
+                              else float(os.getenv('DB_SLOW_QUERY_MS', 0)))
+        self._metricas = MetricasConsultas(self.slow_query_ms)
+        # no máximo um EXPLAIN de consulta lenta em andamento (thread à parte)
+        self._explicando = threading.Lock()
+        # duração e erros das escritas (create/update/delete), medidas pelo @_invalida
+        self._operacoes = MetricasConsultas()
+        # índices de nome em memória ('paciente'/'medico'), carregados na 1ª busca
+        self._indices_nomes = {}
+        self._indices_lock = threading.Lock()
+        # agenda por médico para horarios_livres; duração de cada consulta em minutos
+        self.agenda_duracao = (agenda_duracao if agenda_duracao is not None
+                               else int(os.getenv('AGENDA_DURACAO_MIN', 30)))
+        self._agenda = None
+        # prazo de agendamento lido da tabela PoliticaAgendamento, relido a cada politica_ttl segundos
+        self.politica_ttl = (politica_ttl if politica_ttl is not None
+                             else float(os.getenv('DB_POLITICA_TTL', 60)))
+        self._politica = None  # (PoliticaAgendamento, time.monotonic() da leitura)
         self.conn = None
+        self._pool = None
+        self._pool_lock = threading.Lock()
+        # transação aberta por transaction() em cada thread
+        self._tx = threading.local()
+        # formato dos resultados dos get_* (como_dataframe), por thread
+        self._formato = threading.local()
+        # callback de observar_consultas, por thread
+        self._observador = threading.local()
+        # método público em execução (ver _rotulado), por thread
+        self._rotulo = threading.local()
 
-    def connect(self):
-        """Establish and return a MySQL connection (reuses if já conectado)."""
-        if self.conn is not None:
-            try:
-                if getattr(self.conn, "is_connected", lambda: False)():
-                    return self.conn
-            except Exception:
-                # attempt to recreate connection if is_connected check fails
-                self.conn = None
-
+    def _new_connection(self):
         try:
-            self.conn = mysql.connector.connect(
+            return mysql.connector.connect(
                 host=self.host,
                 user=self.user,
                 password=self.password,
@@ -37,14 +727,42 @@ class MySQLDB:
                 port=self.port,
                 autocommit=False
             )
-            return self.conn
-
         except Exception as e:
             raise Exception(f"Erro ao conectar ao banco de dados: {str(e)}")
 
-    def close(self):
-        """Fecha a conexão com o banco de dados."""
+    def _get_pool(self):
+        if self._pool is None:
+            with self._pool_lock:
+                if self._pool is None:
+                    self._pool = ConnectionPool(
+                        self._new_connection, size=self.pool_size, timeout=self.pool_timeout,
+                        liveness=self._liveness
+                    )
+        return self._pool
+
+    def connect(self):
+        """
+        Establish and return a MySQL connection (reuses if já conectado).
+        Em modo pool, inicializa o pool, valida uma conexão e retorna None:
+        as conexões do pool são retiradas e devolvidas por _execute.
+        """
+        if self.pool_size:
+            pool = self._get_pool()
+            pool.release(pool.acquire())
+            return None
+
+        if self.conn is not None:
+            if self._liveness.is_alive(self.conn):
+                return self.conn
+            # attempt to recreate connection if the liveness check fails
+            self._drop_conn()
+
+        self.conn = self._new_connection()
+        return self.conn
+
+    def _drop_conn(self):
         if self.conn:
+            self._liveness.forget(self.conn)
             try:
                 self.conn.close()
             except Exception:
@@ -52,48 +770,631 @@ class MySQLDB:
             finally:
                 self.conn = None
 
-    def _execute(self, sql, params=None, fetchone=False, fetchall=False, commit=False):
+    def close(self):
+        """Fecha a conexão (ou todas as conexões do pool) com o banco de dados."""
+        if self._pool is not None:
+            self._pool.close()
+            self._pool = None
+        self._drop_conn()
+
+    def pool_stats(self):
+        """Estatísticas do pool: em uso, ociosas, tempo de espera e timeouts."""
+        if self._pool is None:
+            return {}
+        return self._pool.stats()
+
+    def liveness_stats(self):
+        """Pings feitos/evitados, conexões mortas detectadas e leituras repetidas."""
+        return self._liveness.stats()
+
+    def cache_stats(self):
+        """Hits, misses, taxa de acerto, despejos LRU, expirações e invalidações do cache."""
+        return self._cache.stats()
+
+    def invalidate_cache(self, *tabelas):
+        """Descarta as leituras em cache que dependem de `tabelas` (ou todas)."""
+        self._cache.invalidate(*tabelas)
+
+    def prepared_stats(self):
+        """Statements preparados, reusos e parse economizado (estimado); {} se desativado."""
+        if self._preparados is None:
+            return {}
+        return self._preparados.stats()
+
+    def metrics(self):
+        """
+        Snapshot das métricas de _execute por método público: chamadas, erros,
+        linhas retornadas, latência (total, média, máx., p50/p95/p99 estimados
+        pelo histograma) e as consultas lentas recentes com o EXPLAIN.
+        Em 'operacoes', o mesmo para cada chamada de create/update/delete
+        (validação, todas as consultas e a atualização dos índices).
+        """
+        snapshot = self._metricas.snapshot()
+        snapshot['operacoes'] = self._operacoes.snapshot()['metodos']
+        return snapshot
+
+    def reset_metrics(self):
+        self._metricas.reset()
+        self._operacoes.reset()
+
+    def _explain(self, sql, params):
+        """
+        Linhas do EXPLAIN de `sql`, ou o erro em texto; fora das métricas.
+        Usa uma conexão nova, fora do pool e da transação da thread.
+        """
+        if sql.lstrip()[:4].upper() == 'CALL':
+            return None
+        conn = None
+        try:
+            conn = self._new_connection()
+            cursor = conn.cursor(dictionary=True)
+            try:
+                cursor.execute("EXPLAIN " + sql, params or ())
+                linhas = cursor.fetchall()
+            finally:
+                cursor.close()
+            return [{k: v for k, v in r.items() if v is not None} for r in linhas or []]
+        except Exception as e:
+            return str(e)
+        finally:
+            if conn is not None:
+                try:
+                    conn.close()
+                except Exception:
+                    pass
+
+    def _acquire(self):
+        if self.pool_size:
+            return self._get_pool().acquire()
+        return self.connect()
+
+    def _release(self, conn, discard=False, ok=True):
+        if ok and not discard:
+            self._liveness.touch(conn)
+        else:
+            # após um erro a conexão é pingada no próximo uso
+            self._liveness.mark_suspect(conn)
+        if self.pool_size:
+            self._pool.release(conn, discard=discard)
+        elif discard and conn is self.conn:
+            self._drop_conn()
+
+    # --- Transações (unidade de trabalho) ---
+    def _conexao_tx(self):
+        """Conexão da transação aberta nesta thread, ou None."""
+        return getattr(self._tx, 'conn', None)
+
+    def _apos_commit(self, fn, *args):
+        """
+        Executa `fn` agora ou, dentro de transaction(), só depois do COMMIT:
+        cache e índices em memória não podem refletir escritas que ainda
+        podem ser desfeitas.
+        """
+        if self._conexao_tx() is None:
+            fn(*args)
+        else:
+            self._tx.pos_commit.append((fn, args))
+
+    def _executar_na_tx(self, sql):
+        cursor = self._tx.conn.cursor()
+        try:
+            cursor.execute(sql)
+        finally:
+            cursor.close()
+
+    @contextlib.contextmanager
+    def transaction(self):
+        """
+        Unidade de trabalho: `with db.transaction(): ...`
+        Os create_*/update_*/delete_* (inclusive os *_lote) chamados no bloco,
+        na mesma thread, usam uma só conexão e um único COMMIT no final; uma
+        exceção desfaz tudo. Leituras via _execute enxergam as escritas
+        pendentes e não passam pelo cache; iter_* usam outra conexão e não as
+        enxergam. Blocos aninhados viram SAVEPOINTs: uma exceção que sai do
+        bloco interno desfaz só ele. Se o ROLLBACK TO SAVEPOINT falhar (ex.:
+        um deadlock já desfez a transação inteira no servidor), a transação
+        fica abortada: os comandos seguintes falham e o bloco externo faz
+        ROLLBACK e levanta exceção em vez de COMMIT, mesmo que o erro interno
+        tenha sido tratado. Cache e índices em memória são atualizados após
+        o COMMIT.
+        Em modo de conexão única (pool_size=0) a conexão é compartilhada: não
+        use a instância em outras threads durante a transação.
+        """
+        if self._conexao_tx() is not None:
+            with self._savepoint():
+                yield
+            return
+        tx = self._tx
+        conn = self._acquire()
+        tx.conn = conn
+        tx.pos_commit = []
+        tx.savepoints = 0
+        tx.abortada = None
+        ok = False
+        broken = False
+        try:
+            # encerra o snapshot deixado por leituras anteriores (autocommit=False)
+            conn.rollback()
+            conn.start_transaction()
+            yield
+            self._verificar_abortada()
+            conn.commit()
+            ok = True
+        except BaseException as e:
+            broken = self._is_connection_lost(e)
+            if not broken:
+                try:
+                    conn.rollback()
+                except Exception:
+                    broken = True
+            raise
+        finally:
+            acoes = tx.pos_commit
+            tx.conn = tx.pos_commit = tx.abortada = None
+            self._release(conn, discard=broken, ok=ok)
+            if ok:
+                for fn, args in acoes:
+                    fn(*args)
+
+    def _verificar_abortada(self):
+        """Recusa continuar uma transação cujo ROLLBACK TO SAVEPOINT falhou."""
+        erro = self._tx.abortada
+        if erro is not None:
+            raise Exception(f"Transação abortada, nada foi gravado: {erro}") from erro
+
+    @contextlib.contextmanager
+    def _savepoint(self):
+        self._verificar_abortada()
+        tx = self._tx
+        tx.savepoints += 1
+        nome = f"sp_{tx.savepoints}"
+        marca = len(tx.pos_commit)
+        self._executar_na_tx(f"SAVEPOINT {nome}")
+        try:
+            yield
+        except BaseException:
+            del tx.pos_commit[marca:]
+            try:
+                self._executar_na_tx(f"ROLLBACK TO SAVEPOINT {nome}")
+            except Exception as e:
+                # ex.: deadlock (1213) já desfez a transação inteira: o savepoint
+                # não existe mais e o que vier depois não pode ser commitado
+                tx.abortada = e
+            raise
+        self._executar_na_tx(f"RELEASE SAVEPOINT {nome}")
+
+    @staticmethod
+    def _is_read_only(sql):
+        head = sql.lstrip()[:6].upper()
+        return head.startswith('SELECT') or head.startswith('WITH')
+
+    @staticmethod
+    def _is_connection_lost(exc):
+        if isinstance(exc, mysql.connector.errors.InterfaceError):
+            return True
+        return getattr(exc, 'errno', None) in _CONNECTION_LOST_ERRNOS
+
+    def _execute(self, sql, params=None, fetchone=False, fetchall=False, commit=False, colunar=False):
         """
         Helper to execute queries.
         - params: tuple or dict
         - fetchone/fetchall: choose result mode
         - commit: commit if True
-        Returns rows (list of dict) or single dict for fetchone or None.
+        Returns rows (list of dict) or single dict for fetchone; without
+        fetchone/fetchall, the number of affected rows (cursor.rowcount).
+        Em modo pool, cada chamada faz checkout/checkin de uma conexão.
+        Leituras (SELECT) são repetidas uma vez, em nova conexão, se a conexão caiu.
+        Dentro de transaction() usa a conexão da transação e ignora `commit`.
+        Com prepared=True, SELECT/INSERT/UPDATE/DELETE reusam statements preparados.
+        colunar=True retorna um pandas.DataFrame (ver como_dataframe).
+        Cada chamada entra em metrics() sob o método público que a originou.
+        """
+        inicio = time.perf_counter()
+        resultado = None
+        erro = True
+        try:
+            resultado = self._execute_sql(sql, params, fetchone, fetchall, commit, colunar)
+            erro = False
+            return resultado
+        finally:
+            ms = (time.perf_counter() - inicio) * 1000
+            metodo = getattr(self._rotulo, 'metodo', None) or '_execute'
+            self._metricas.registrar(metodo, ms, _contar_linhas(resultado), erro)
+            if self._metricas.lenta(ms) and not erro:
+                self._registrar_lenta(metodo, sql, params, ms)
+            observador = getattr(self._observador, 'fn', None)
+            if observador is not None:
+                observador(metodo, sql, inicio, ms / 1000, erro)
+
+    @contextlib.contextmanager
+    def observar_consultas(self, fn):
+        """
+        No bloco (nesta thread), chama fn(metodo, sql, inicio, duracao, erro)
+        após cada _execute; `inicio` em time.perf_counter(), `duracao` em segundos.
+        """
+        anterior = getattr(self._observador, 'fn', None)
+        self._observador.fn = fn
+        try:
+            yield
+        finally:
+            self._observador.fn = anterior
+
+    def _registrar_lenta(self, metodo, sql, params, ms):
+        """
+        Registra a consulta lenta. O EXPLAIN, quando devido, roda numa thread
+        à parte com conexão própria (um por vez): a instrumentação não atrasa
+        nem derruba a consulta que a disparou.
         """
-        conn = self.connect()
+        try:
+            # o lock vem antes de deve_explicar: um SQL que chega com outro EXPLAIN
+            # em andamento não perde a vez no intervalo_explain
+            if sql.lstrip()[:4].upper() != 'CALL' and self._explicando.acquire(blocking=False):
+                try:
+                    if self._metricas.deve_explicar(sql):
+                        threading.Thread(target=self._explicar_lenta, args=(metodo, sql, params, ms),
+                                         name='explain-lenta', daemon=True).start()
+                        return
+                except BaseException:
+                    self._explicando.release()
+                    raise
+                self._explicando.release()
+            self._metricas.registrar_lenta(metodo, sql, ms, None)
+            logger.warning("Consulta lenta em %s: %.1f ms\n%s", metodo, ms, sql.strip())
+        except Exception:
+            logger.exception("Falha ao registrar consulta lenta em %s", metodo)
+
+    def _explicar_lenta(self, metodo, sql, params, ms):
+        try:
+            explain = self._explain(sql, params)
+            self._metricas.registrar_lenta(metodo, sql, ms, explain)
+            logger.warning("Consulta lenta em %s: %.1f ms\n%s\nEXPLAIN: %s", metodo, ms, sql.strip(), explain)
+        except Exception:
+            logger.exception("Falha ao registrar consulta lenta em %s", metodo)
+        finally:
+            self._explicando.release()
+
+    def _execute_sql(self, sql, params, fetchone, fetchall, commit, colunar):
+        """Corpo de _execute, sem as métricas."""
+        conn_tx = self._conexao_tx()
+        if conn_tx is not None:
+            return self._execute_tx(conn_tx, sql, params, fetchone, fetchall, colunar)
+        attempts = 1 if commit or not self._is_read_only(sql) else 2
+        for attempt in range(attempts):
+            conn = self._acquire()
+            ok = False
+            broken = False
+            try:
+                resultado = self._rodar(conn, sql, params, fetchone, fetchall, colunar)
+                if commit:
+                    conn.commit()
+                ok = True
+                return resultado
+            except Exception as e:
+                broken = self._is_connection_lost(e)
+                if not broken:
+                    try:
+                        conn.rollback()
+                    except Exception:
+                        broken = True
+                if broken and attempt + 1 < attempts:
+                    self._liveness.count_retry()
+                    continue
+                raise Exception(f"Erro ao executar consulta: {str(e)}")
+            finally:
+                self._release(conn, discard=broken, ok=ok)
+
+    def _execute_tx(self, conn, sql, params, fetchone, fetchall, colunar=False):
+        """_execute dentro de transaction(): sem commit, rollback nem nova tentativa."""
+        self._verificar_abortada()
+        try:
+            return self._rodar(conn, sql, params, fetchone, fetchall, colunar)
+        except Exception as e:
+            raise Exception(f"Erro ao executar consulta: {str(e)}")
+
+    @staticmethod
+    def _preparavel(sql, params):
+        """DML/SELECT com parâmetros posicionais (CALL e dicts ficam no cursor comum)."""
+        if isinstance(params, dict):
+            return False
+        head = sql.lstrip()[:6].upper()
+        return head in ('SELECT', 'INSERT', 'UPDATE', 'DELETE') or head.startswith('WITH')
+
+    def _rodar(self, conn, sql, params, fetchone, fetchall, colunar=False):
+        """
+        Executa `sql` em `conn` e retorna o resultado como dicts, ou o número de
+        linhas afetadas sem fetchone/fetchall; não faz commit.
+        """
+        if colunar:
+            return self._rodar_colunar(conn, sql, params)
+        if self._preparados is not None and self._preparavel(sql, params):
+            return self._rodar_preparado(conn, sql, params, fetchone, fetchall)
         cursor = conn.cursor(dictionary=True)
         try:
             cursor.execute(sql, params or ())
-            if commit:
-                conn.commit()
             if fetchone:
                 return cursor.fetchone()
             if fetchall:
                 return cursor.fetchall()
+            return cursor.rowcount
+        finally:
+            try:
+                cursor.close()
+            except Exception:
+                pass
+
+    def _rodar_preparado(self, conn, sql, params, fetchone, fetchall):
+        """Reexecuta o statement preparado de `sql` nesta conexão (prepara na 1ª vez)."""
+        cursor, novo = self._preparados.cursor(conn, sql)
+        inicio = time.perf_counter()
+        try:
+            cursor.execute(sql, tuple(params or ()))
+            # o resultado é sempre lido inteiro: o cursor continua em uso depois
+            rows = cursor.fetchall() if cursor.with_rows else None
+        except Exception:
+            self._preparados.descartar(conn, sql)
+            raise
+        self._preparados.registrar(sql, novo, time.perf_counter() - inicio)
+        if not (fetchone or fetchall):
+            return cursor.rowcount
+        if rows is None:
             return None
-        except Exception as e:
-            conn.rollback()
-            raise Exception(f"Erro ao executar consulta: {str(e)}")
+        nomes = cursor.column_names
+        if fetchone:
+            return dict(zip(nomes, rows[0])) if rows else None
+        return [dict(zip(nomes, r)) for r in rows]
+
+    # --- Resultados colunares (pandas) ---
+    def _em_dataframe(self):
+        return getattr(self._formato, 'dataframe', False)
+
+    @contextlib.contextmanager
+    def como_dataframe(self):
+        """
+        `with db.como_dataframe(): df = db.get_pedidos()`
+        No bloco (nesta thread), os get_* que retornam listas de linhas
+        retornam um pandas.DataFrame montado direto das tuplas do cursor, sem
+        um dict por linha: datas viram datetime64, DECIMAL vira float e
+        Especialidade/Genero viram category. Os get_*_por_id, o resumo e
+        get_pedidos_pagina continuam retornando dicts.
+        """
+        anterior = self._em_dataframe()
+        self._formato.dataframe = True
+        try:
+            yield self
+        finally:
+            self._formato.dataframe = anterior
+
+    def _linhas(self, sql, params=None):
+        """fetchall dos relatórios get_*: lista de dicts ou, em como_dataframe(), DataFrame."""
+        if self._em_dataframe():
+            return self._execute(sql, params=params, colunar=True)
+        return self._execute(sql, params=params, fetchall=True) or []
+
+    # colunas categóricas no DataFrame (poucos valores distintos, muito repetidos)
+    _COLUNAS_CATEGORICAS = {'especialidade', 'genero'}
+
+    def _rodar_colunar(self, conn, sql, params, lote=5000):
+        """
+        Lê em cursor de tuplas, em lotes, acumulando uma lista por coluna: o
+        pico de memória é o das colunas mais um lote, não o de uma lista de dicts.
+        """
+        import pandas as pd
+        from mysql.connector import FieldType
+
+        cursor = conn.cursor()
+        try:
+            cursor.execute(sql, params or ())
+            nomes = list(cursor.column_names)
+            tipos = [d[1] for d in cursor.description]
+            colunas = [[] for _ in nomes]
+            while True:
+                linhas = cursor.fetchmany(lote)
+                if not linhas:
+                    break
+                for coluna, valores in zip(colunas, zip(*linhas)):
+                    coluna.extend(valores)
         finally:
             try:
                 cursor.close()
             except Exception:
                 pass
 
+        tipos_data = {FieldType.DATETIME, FieldType.DATE, FieldType.TIMESTAMP}
+        tipos_decimais = {FieldType.DECIMAL, FieldType.NEWDECIMAL}
+        dados = {}
+        for nome, tipo, valores in zip(nomes, tipos, colunas):
+            serie = pd.Series(valores, dtype=object, name=nome)
+            if tipo in tipos_data:
+                serie = pd.to_datetime(serie)
+            elif tipo in tipos_decimais:
+                serie = pd.to_numeric(serie, errors='coerce')
+            elif nome.lower() in self._COLUNAS_CATEGORICAS:
+                serie = serie.astype('category')
+            else:
+                serie = serie.infer_objects()
+            dados[nome] = serie
+        return pd.DataFrame(dados, columns=nomes)
+
+    def _stream(self, sql, params=None, chunk_size=1000):
+        """
+        Executa uma leitura com cursor não bufferizado (server-side) e gera
+        listas de até `chunk_size` dicts, sem materializar o resultado inteiro.
+        Em modo de conexão única usa uma conexão dedicada, para não travar
+        `self.conn` enquanto o gerador estiver aberto.
+        Os argumentos são validados já na chamada, não na primeira iteração.
+        """
+        if chunk_size < 1:
+            raise ValidationError("chunk_size deve ser >= 1.")
+        return self._gerar_lotes(sql, params, chunk_size)
+
+    def _gerar_lotes(self, sql, params, chunk_size):
+        """Gerador de _stream."""
+        dedicated = not self.pool_size
+        conn = self._new_connection() if dedicated else self._acquire()
+        cursor = None
+        exhausted = False
+        try:
+            cursor = conn.cursor(dictionary=True, buffered=False)
+            cursor.execute(sql, params or ())
+            while True:
+                rows = cursor.fetchmany(chunk_size)
+                if not rows:
+                    break
+                yield rows
+            exhausted = True
+        except GeneratorExit:
+            raise
+        except Exception as e:
+            raise Exception(f"Erro ao executar consulta: {str(e)}")
+        finally:
+            # um resultado não lido até o fim deixaria a conexão inutilizável;
+            # fechá-la é mais barato que drenar milhões de linhas
+            if cursor is not None and exhausted:
+                try:
+                    cursor.close()
+                except Exception:
+                    pass
+            if dedicated:
+                try:
+                    conn.close()
+                except Exception:
+                    pass
+            else:
+                self._release(conn, discard=not exhausted, ok=exhausted)
+
+    @staticmethod
+    def iter_dataframes(lotes):
+        """Adapta um gerador de lotes (iter_*) em um gerador de pandas.DataFrame."""
+        import pandas as pd
+        for rows in lotes:
+            yield pd.DataFrame(rows)
+
+    def exportar_csv(self, lotes, caminho, **to_csv_kwargs):
+        """Grava os lotes de um gerador iter_* em CSV com memória constante. Retorna o nº de linhas."""
+        total = 0
+        for i, df in enumerate(self.iter_dataframes(lotes)):
+            df.to_csv(caminho, mode='w' if i == 0 else 'a', header=(i == 0), index=False, **to_csv_kwargs)
+            total += len(df)
+        return total
+
+    # --- Inserção em lote ---
+    # Erros que abortam a transação inteira no InnoDB (não só o statement)
+    _LOTE_ERROS_FATAIS = {1205, 1213}
+
+    def _create_lote(self, registros, montar_params, tabela, colunas, chave, chunk_size=500):
+        """
+        Valida todos os registros antes de escrever e insere os válidos em
+        INSERTs multi-row de `chunk_size` linhas, numa única transação.
+        Retorna {'inseridos': n, 'erros': [{'linha', 'registro', 'erro'}, ...]};
+        `linha` é o índice do registro na entrada.
+        """
+        if chunk_size < 1:
+            raise ValidationError("chunk_size deve ser >= 1.")
+        registros = list(registros)
+        linhas = []
+        erros = []
+        vistos = set()
+        for i, registro in enumerate(registros):
+            try:
+                params = montar_params(**registro)
+            except (ValidationError, TypeError) as e:
+                erros.append({'linha': i, 'registro': registro, 'erro': str(e)})
+                continue
+            k = chave(params)
+            if k in vistos:
+                erros.append({'linha': i, 'registro': registro, 'erro': "Registro duplicado no lote."})
+                continue
+            vistos.add(k)
+            linhas.append((i, params))
+
+        inseridos, erros_banco = self._insert_lote(tabela, colunas, linhas, chunk_size)
+        for erro in erros_banco:
+            erro['registro'] = registros[erro['linha']]
+        erros.extend(erros_banco)
+        erros.sort(key=lambda e: e['linha'])
+        return {'inseridos': inseridos, 'erros': erros}
+
+    @staticmethod
+    def _inseridos_lote(registros, resultado):
+        """Registros de um lote que foram de fato inseridos."""
+        falhas = {e['linha'] for e in resultado['erros']}
+        return (r for i, r in enumerate(registros) if i not in falhas)
+
+    def _insert_lote(self, tabela, colunas, linhas, chunk_size):
+        """
+        Executa os INSERTs multi-row. Se um lote falhar (ex.: SIGNAL de trigger,
+        PK duplicada), o InnoDB desfaz só aquele statement; as linhas do lote são
+        então reinseridas uma a uma para atribuir o erro à linha que o causou.
+        """
+        if not linhas:
+            return 0, []
+        placeholders = "(" + ", ".join(["%s"] * len(colunas)) + ")"
+        base = f"INSERT INTO {tabela} ({', '.join(colunas)}) VALUES "
+        inseridos = 0
+        erros = []
+        # dentro de transaction() o lote entra na transação aberta
+        conn_tx = self._conexao_tx()
+        conn = conn_tx or self._acquire()
+        cursor = None
+        ok = False
+        broken = False
+        try:
+            cursor = conn.cursor()
+            for inicio in range(0, len(linhas), chunk_size):
+                lote = linhas[inicio:inicio + chunk_size]
+                try:
+                    cursor.execute(
+                        base + ", ".join([placeholders] * len(lote)),
+                        [v for _, params in lote for v in params]
+                    )
+                    inseridos += len(lote)
+                    continue
+                except Error as e:
+                    if self._is_connection_lost(e) or e.errno in self._LOTE_ERROS_FATAIS:
+                        raise
+                for indice, params in lote:
+                    try:
+                        cursor.execute(base + placeholders, params)
+                        inseridos += 1
+                    except Error as e:
+                        if self._is_connection_lost(e) or e.errno in self._LOTE_ERROS_FATAIS:
+                            raise
+                        erros.append({'linha': indice, 'erro': e.msg or str(e)})
+            if conn_tx is None:
+                conn.commit()
+            ok = True
+            return inseridos, erros
+        except Exception as e:
+            broken = self._is_connection_lost(e)
+            if not broken and conn_tx is None:
+                try:
+                    conn.rollback()
+                except Exception:
+                    broken = True
+            raise Exception(f"Erro ao inserir lote em {tabela}: {str(e)}")
+        finally:
+            if cursor is not None:
+                try:
+                    cursor.close()
+                except Exception:
+                    pass
+            if conn_tx is None:
+                self._release(conn, discard=broken, ok=ok)
+
     # --- Validations ---
-    def validate_cpf(self, cpf: str):
+    def validate_cpf(self, cpf: str, verificar_digitos: bool = False):
         if cpf is None:
             raise ValidationError("CPF é obrigatório.")
-        pattern = r'^[0-9]{3}\.[0-9]{3}\.[0-9]{3}-[0-9]{2}$'
-        if not re.match(pattern, cpf):
+        if not _RE_CPF.match(cpf):
             raise ValidationError("CPF inválido. Formato obrigatório: XXX.XXX.XXX-XX")
+        if verificar_digitos and not cpf_digitos_validos(cpf):
+            raise ValidationError("CPF inválido: dígitos verificadores não conferem.")
         return True
 
     def validate_email(self, email: str):
         if email is None or email == '':
             return True
-        pattern = r'^[^@\s]+@[^@\s]+\.[^@\s]+$'
-        if not re.match(pattern, email):
+        if not _RE_EMAIL.match(email):
             raise ValidationError("E-mail inválido.")
         return True
 
@@ -101,39 +1402,209 @@ class MySQLDB:
         if phone is None or phone == '':
             raise ValidationError("Telefone é obrigatório.")
         if is_clinica:
-            pattern = r'^\([0-9]{2}\)\s*[0-9]{4}-[0-9]{4}$'
+            pattern = _RE_TELEFONE_CLINICA
             msg = "Telefone inválido. Formato esperado: (DD) XXXX-XXXX"
         else:
-            pattern = r'^\([0-9]{2}\)\s*[0-9]{5}-[0-9]{4}$'
+            pattern = _RE_TELEFONE
             msg = "Telefone inválido. Formato esperado: (DD) XXXXX-XXXX"
-        if not re.match(pattern, phone):
+        if not pattern.match(phone):
             raise ValidationError(msg)
         return True
 
+    @staticmethod
+    def _mascara_invalidos(valores, valido):
+        """Aplica `valido` a cada valor e retorna True nas linhas inválidas."""
+        if hasattr(valores, 'tolist'):
+            valores = valores.tolist()
+        return [not valido(v) for v in valores]
+
+    def validar_colunas(self, cpf=None, telefone=None, email=None,
+                        telefone_clinica=False, verificar_digitos_cpf=False):
+        """
+        Valida colunas inteiras de uma vez (listas ou pandas.Series do mesmo
+        tamanho), com as mesmas regras de validate_cpf/validate_phone/validate_email.
+        Retorna {'cpf': [...], 'telefone': [...], 'email': [...], 'invalido': [...]}
+        com True nas linhas com erro; 'invalido' é o OR das colunas informadas.
+        Com Series, as máscaras são Series de bool com o mesmo índice.
+        Um DataFrame com essas colunas pode ser passado como `**df[['cpf', 'email']]`.
+        """
+        colunas = {'cpf': cpf, 'telefone': telefone, 'email': email}
+        colunas = {nome: valores for nome, valores in colunas.items() if valores is not None}
+        if not colunas:
+            raise ValidationError("Informe ao menos uma coluna: cpf, telefone ou email.")
+        tamanhos = {len(valores) for valores in colunas.values()}
+        if len(tamanhos) > 1:
+            raise ValidationError("As colunas devem ter o mesmo número de linhas.")
+
+        cpf_ok = _RE_CPF.match
+        fone_ok = (_RE_TELEFONE_CLINICA if telefone_clinica else _RE_TELEFONE).match
+        email_ok = _RE_EMAIL.match
+        regras = {
+            'cpf': (
+                (lambda v: isinstance(v, str) and cpf_ok(v) is not None and cpf_digitos_validos(v))
+                if verificar_digitos_cpf else
+                (lambda v: isinstance(v, str) and cpf_ok(v) is not None)
+            ),
+            'telefone': lambda v: isinstance(v, str) and fone_ok(v) is not None,
+            # a coluna Email é NOT NULL nas três tabelas: None, '', NaN e não-textos são inválidos
+            'email': lambda v: isinstance(v, str) and email_ok(v) is not None,
+        }
+        mascaras = {nome: self._mascara_invalidos(valores, regras[nome]) for nome, valores in colunas.items()}
+        mascaras['invalido'] = [any(linha) for linha in zip(*mascaras.values())]
+
+        indice = next((valores.index for valores in colunas.values() if hasattr(valores, 'index')
+                       and hasattr(valores, 'tolist')), None)
+        if indice is not None:
+            import pandas as pd
+            return {nome: pd.Series(m, index=indice, dtype=bool) for nome, m in mascaras.items()}
+        return mascaras
+
     def _parse_datetime(self, value):
         """Normalize input datetime/date/string to Python datetime object."""
         if value is None:
             return None
+        if isinstance(value, str):
+            return _datetime_de_texto(value)
         if isinstance(value, datetime):
+            if value.tzinfo is not None:
+                raise ValidationError("Data/hora com fuso horário não é aceita. Use YYYY-MM-DD HH:MM:SS")
             return value
         if isinstance(value, date):
             return datetime(value.year, value.month, value.day)
-        if isinstance(value, str):
-            for fmt in ("%Y-%m-%d %H:%M:%S", "%Y-%m-%dT%H:%M:%S", "%Y-%m-%d"):
-                try:
-                    dt = datetime.strptime(value, fmt)
-                    return dt
-                except Exception:
-                    continue
-            try:
-                return datetime.fromisoformat(value)
-            except Exception:
-                raise ValidationError("Formato de data/hora inválido. Use YYYY-MM-DD HH:MM:SS")
         raise ValidationError("Tipo de data/hora inválido.")
 
+    def _datetime_param(self, value):
+        """
+        datetime pronto para o driver, em segundos inteiros como a coluna
+        DATETIME (o MySQL arredondaria a fração; o formato antigo truncava).
+        """
+        dt = self._parse_datetime(value)
+        return dt.replace(microsecond=0) if dt.microsecond else dt
+
+    def parse_datetimes(self, valores):
+        """
+        Versão em coluna de _parse_datetime (lista ou pandas.Series, inclusive
+        datetime64): retorna uma lista de datetime. Cada texto distinto é
+        convertido uma vez só.
+        """
+        if hasattr(valores, 'tolist'):
+            valores = valores.tolist()
+        memo = {}
+        saida = []
+        for v in valores:
+            if isinstance(v, str):
+                dt = memo.get(v)
+                if dt is None:
+                    dt = memo[v] = _datetime_de_texto(v)
+                saida.append(dt)
+            else:
+                saida.append(self._parse_datetime(v))
+        return saida
+
+    # --- Busca por prefixo (seletores com autocompletar) ---
+    @staticmethod
+    def _prefixo_like(termo):
+        """Escapa os curingas do LIKE e acrescenta '%': a busca vira um range no índice."""
+        return re.sub(r'([\\%_])', r'\\\1', termo) + '%'
+
+    @staticmethod
+    def _mascara_cpf(termo):
+        """Aplica a máscara do CPF ao que foi digitado: '1234567' -> '123.456.7'."""
+        saida = ''
+        for i, d in enumerate(re.sub(r'\D', '', termo)[:11]):
+            if i in (3, 6):
+                saida += '.'
+            elif i == 9:
+                saida += '-'
+            saida += d
+        return saida
+
+    def _buscar_prefixo(self, sql_select, termo, coluna_codigo, coluna_nome, limite):
+        """
+        Top `limite` linhas de `sql_select` cujo código (se `termo` começa com
+        dígito) ou nome começa com `termo`, em ordem do índice dessa coluna.
+        Termo vazio retorna as primeiras linhas por nome.
+        """
+        if limite < 1:
+            raise ValidationError("limite deve ser >= 1.")
+        termo = (termo or '').strip()
+        coluna = coluna_codigo if termo[:1].isdigit() else coluna_nome
+        where = f"WHERE {coluna} LIKE %s\n" if termo else ""
+        params = (self._prefixo_like(termo), limite) if termo else (limite,)
+        sql = sql_select + where + f"ORDER BY {coluna}\nLIMIT %s"
+        rows = self._execute(sql, params=params, fetchall=True)
+        return rows or []
+
+    # --- Busca por nome em memória (parcial e aproximada) ---
+    _FONTES_NOMES = {
+        'paciente': "SELECT CpfPaciente AS chave, NomePac AS nome FROM Paciente",
+        'medico': "SELECT CodMed AS chave, NomeMed AS nome FROM Medico",
+    }
+
+    def _indice_nomes(self, tipo):
+        """Índice de `tipo`, carregado do banco em streaming na primeira chamada."""
+        if tipo not in self._FONTES_NOMES:
+            raise ValidationError("tipo deve ser 'paciente' ou 'medico'.")
+        indice = self._indices_nomes.get(tipo)
+        if indice is not None:
+            return indice
+        with self._indices_lock:
+            indice = self._indices_nomes.get(tipo)
+            if indice is None:
+                indice = IndiceNomes()
+                # publicado antes da carga: escritas concorrentes esperam o lock
+                # do índice e são aplicadas depois, sem se perder
+                with indice.lock:
+                    self._indices_nomes[tipo] = indice
+                    try:
+                        indice.carregar(
+                            (row['chave'], row['nome'])
+                            for lote in self._stream(self._FONTES_NOMES[tipo])
+                            for row in lote
+                        )
+                    except Exception:
+                        del self._indices_nomes[tipo]
+                        raise
+        return indice
+
+    def _indexar_nome(self, tipo, chave, nome=None):
+        """Mantém o índice em dia após uma escrita; nome=None remove. No-op se não carregado."""
+        if self._conexao_tx() is not None:
+            self._apos_commit(self._indexar_nome, tipo, chave, nome)
+            return
+        indice = self._indices_nomes.get(tipo)
+        if indice is None:
+            return
+        if nome is None:
+            indice.remover(chave)
+        else:
+            indice.adicionar(chave, nome)
+
+    def buscar_nomes(self, texto, tipo='paciente', limite=10):
+        """
+        Busca por nome parcial ou com erros de digitação ('mari sil', 'fernnda').
+        tipo: 'paciente' (chave = CPF) ou 'medico' (chave = CodMed).
+        Retorna [{'chave', 'nome', 'score'}, ...] do mais para o menos relevante.
+        O índice fica em memória e é atualizado pelos create/update/delete;
+        escritas feitas fora desta instância só aparecem após reconstruir_indice_nomes.
+        """
+        if limite < 1:
+            raise ValidationError("limite deve ser >= 1.")
+        return self._indice_nomes(tipo).buscar(texto, limite)
+
+    def reconstruir_indice_nomes(self, tipo=None):
+        """Descarta o índice (de `tipo` ou todos); a próxima busca recarrega do banco."""
+        with self._indices_lock:
+            if tipo is None:
+                self._indices_nomes.clear()
+            else:
+                self._indices_nomes.pop(tipo, None)
+
+    def indice_nomes_stats(self):
+        return {tipo: indice.stats() for tipo, indice in self._indices_nomes.items()}
+
     # --- Clientes (Paciente) CRUD ---
-    def get_clientes(self):
-        sql = """
+    _SQL_CLIENTES_SELECT = """
         SELECT
             CpfPaciente AS cpf,
             NomePac AS nome,
@@ -142,15 +1613,33 @@ class MySQLDB:
             Telefone AS telefone,
             Email AS email
         FROM Paciente
-        ORDER BY NomePac
         """
-        rows = self._execute(sql, fetchall=True)
-        return rows or []
+    _SQL_CLIENTES = _SQL_CLIENTES_SELECT + "ORDER BY NomePac\n"
 
-    def create_cliente(
+    @_cacheado('Paciente')
+    def get_clientes(self):
+        return self._linhas(self._SQL_CLIENTES)
+
+    @_cacheado('Paciente')
+    def buscar_pacientes(self, termo='', limite=20):
+        """
+        Até `limite` pacientes cujo nome ou CPF começa com `termo` (CPF pode ser
+        digitado só com números). Usa idx_paciente_nome ou a PK.
+        """
+        termo = (termo or '').strip()
+        if termo[:1].isdigit():
+            termo = self._mascara_cpf(termo)
+        return self._buscar_prefixo(self._SQL_CLIENTES_SELECT, termo, 'CpfPaciente', 'NomePac', limite)
+
+    def iter_clientes(self, chunk_size=1000):
+        """Versão em streaming de get_clientes: gera listas de até `chunk_size` pacientes."""
+        return self._stream(self._SQL_CLIENTES, chunk_size=chunk_size)
+
+    def _params_cliente(
         self, cpf: str, nome: str, data_nascimento: str,
         genero: str, telefone: str, email: str
     ):
+        """Valida um paciente e retorna os parâmetros do INSERT."""
         if not nome:
             raise ValidationError("Nome é obrigatório.")
         if not genero or genero not in ('M', 'F'):
@@ -161,21 +1650,42 @@ class MySQLDB:
             raise ValidationError("Email é obrigatório.")
         self.validate_phone(telefone, is_clinica=False)
         dt = self._parse_datetime(data_nascimento)
+        return (cpf, nome, dt.date(), genero, telefone, email)
+
+    @_invalida('Paciente')
+    def create_cliente(
+        self, cpf: str, nome: str, data_nascimento: str,
+        genero: str, telefone: str, email: str
+    ):
+        params = self._params_cliente(cpf, nome, data_nascimento, genero, telefone, email)
         sql = """
         INSERT INTO Paciente (CpfPaciente, NomePac, DataNascimento, Genero, Telefone, Email)
         VALUES (%s, %s, %s, %s, %s, %s)
         """
         try:
-            self._execute(
-                sql,
-                params=(cpf, nome, dt.date().isoformat(),
-                        genero, telefone, email),
-                commit=True
-            )
+            self._execute(sql, params=params, commit=True)
+            self._indexar_nome('paciente', cpf, nome)
             return True
         except Error:
             raise
 
+    @_invalida('Paciente')
+    def create_clientes_lote(self, registros, chunk_size=500):
+        """
+        Insere pacientes em lote. `registros`: dicts com os argumentos de create_cliente.
+        Retorna {'inseridos': n, 'erros': [{'linha', 'registro', 'erro'}, ...]}.
+        """
+        registros = list(registros)
+        resultado = self._create_lote(
+            registros, self._params_cliente, 'Paciente',
+            ('CpfPaciente', 'NomePac', 'DataNascimento', 'Genero', 'Telefone', 'Email'),
+            chave=lambda p: p[0], chunk_size=chunk_size
+        )
+        for registro in self._inseridos_lote(registros, resultado):
+            self._indexar_nome('paciente', registro['cpf'], registro['nome'])
+        return resultado
+
+    @_invalida('Paciente')
     def update_cliente(
         self, cpf: str, nome: str = None, data_nascimento: str = None,
         genero: str = None, telefone: str = None, email: str = None
@@ -193,50 +1703,162 @@ class MySQLDB:
                 raise ValidationError("Telefone não pode ser vazio.")
             self.validate_phone(telefone, is_clinica=False)
         if data_nascimento is not None:
-            dt = self._parse_datetime(data_nascimento)
-            data_nascimento = dt.date().isoformat()
-        sets = []
+            data_nascimento = self._parse_datetime(data_nascimento).date()
+        colunas = []
         params = []
         if nome is not None:
             if nome == '':
                 raise ValidationError("Nome não pode ser vazio.")
-            sets.append("NomePac = %s")
+            colunas.append("NomePac")
             params.append(nome)
         if data_nascimento is not None:
-            sets.append("DataNascimento = %s")
+            colunas.append("DataNascimento")
             params.append(data_nascimento)
         if genero is not None:
-            sets.append("Genero = %s")
+            colunas.append("Genero")
             params.append(genero)
         if telefone is not None:
-            sets.append("Telefone = %s")
+            colunas.append("Telefone")
             params.append(telefone)
         if email is not None:
-            sets.append("Email = %s")
+            colunas.append("Email")
             params.append(email)
-        if not sets:
+        if not colunas:
             return 0
-        sql = f"UPDATE Paciente SET {', '.join(sets)} WHERE CpfPaciente = %s"
+        sql = _sql_update('Paciente', tuple(colunas), ('CpfPaciente',))
         params.append(cpf)
         try:
             self._execute(sql, params=tuple(params), commit=True)
+            if nome is not None:
+                self._indexar_nome('paciente', cpf, nome)
             return True
         except Error:
             raise
 
+    @_invalida('Paciente')
     def delete_cliente(self, cpf: str):
         if not cpf:
             raise ValidationError("CPF do cliente obrigatório para exclusão.")
         sql = "DELETE FROM Paciente WHERE CpfPaciente = %s"
         try:
             self._execute(sql, params=(cpf,), commit=True)
+            self._indexar_nome('paciente', cpf)
             return True
         except Error:
             raise
 
+    # --- Agenda (prazo de agendamento e horários livres por médico) ---
+    @_rotulado
+    def politica_agendamento(self):
+        """
+        Política de prazo usada pelos triggers de Consulta, lida da tabela
+        PoliticaAgendamento junto com o CURDATE() do servidor e relida após
+        politica_ttl segundos. Bancos sem a migração 006 ficam com o padrão
+        de 60 dias, que é o valor fixo dos triggers antigos; outros erros
+        são repassados e nada fica em cache.
+        """
+        cache = self._politica
+        if cache is not None and time.monotonic() - cache[1] < self.politica_ttl:
+            return cache[0]
+        try:
+            row = self._execute(
+                "SELECT PrazoMaximoDias, CURDATE() AS hoje FROM PoliticaAgendamento WHERE Id = 1",
+                fetchone=True
+            )
+        except Exception as e:
+            if _errno(e) != _ER_NO_SUCH_TABLE:
+                raise
+            row = None
+        if row:
+            politica = PoliticaAgendamento(row['PrazoMaximoDias'], (row['hoje'] - date.today()).days)
+        else:
+            politica = PoliticaAgendamento()
+        self._politica = (politica, time.monotonic())
+        return politica
+
+    @_rotulado
+    def definir_prazo_agendamento(self, dias: int):
+        """Altera o prazo no banco (e portanto nos triggers) e na validação local."""
+        if not isinstance(dias, int) or dias < 0:
+            raise ValidationError("O prazo deve ser um número inteiro de dias >= 0.")
+        self._execute(
+            "UPDATE PoliticaAgendamento SET PrazoMaximoDias = %s WHERE Id = 1",
+            params=(dias,), commit=True
+        )
+        # relida (com a data do servidor) na próxima validação
+        self._apos_commit(setattr, self, '_politica', None)
+
+    def _verificar_prazo(self, data_hora):
+        """Recusa localmente o que o trigger recusaria, sem ida ao servidor."""
+        politica = self.politica_agendamento()
+        if not politica.permite(data_hora):
+            raise ValidationError(politica.mensagem())
+
+    def _indice_agenda(self):
+        """Índice de agenda, carregado com as consultas futuras na primeira chamada."""
+        agenda = self._agenda
+        if agenda is not None:
+            return agenda
+        with self._indices_lock:
+            if self._agenda is None:
+                agenda = IndiceAgenda(duracao=self.agenda_duracao)
+                # publicado antes da carga, como em _indice_nomes
+                with agenda.lock:
+                    self._agenda = agenda
+                    try:
+                        agenda.carregar(
+                            (row['CodMed'], row['Data_Hora'])
+                            for lote in self._stream(
+                                "SELECT CodMed, Data_Hora FROM Consulta WHERE Data_Hora > %s",
+                                params=(datetime.now() - agenda.duracao,)
+                            )
+                            for row in lote
+                        )
+                    except Exception:
+                        self._agenda = None
+                        raise
+            return self._agenda
+
+    def _agendar_no_indice(self, codmed, data_hora, remover=False):
+        """Mantém a agenda em dia após uma escrita. No-op se não carregada."""
+        if self._conexao_tx() is not None:
+            self._apos_commit(self._agendar_no_indice, codmed, data_hora, remover)
+            return
+        agenda = self._agenda
+        if agenda is None:
+            return
+        if remover:
+            agenda.remover(codmed, data_hora)
+        else:
+            agenda.adicionar(codmed, data_hora)
+
+    def horarios_livres(self, codmed: str, quantidade=5, a_partir=None):
+        """
+        Próximos `quantidade` horários livres do médico dentro do prazo de
+        agendamento, numa grade de consultas de agenda_duracao minutos
+        (8h-18h, segunda a sexta). Um médico ocupado em uma clínica está
+        ocupado em todas, então a clínica escolhida não muda o resultado.
+        """
+        self._validate_codmed(codmed)
+        if quantidade < 1:
+            raise ValidationError("quantidade deve ser >= 1.")
+        agora = datetime.now()
+        inicio = max(self._parse_datetime(a_partir), agora) if a_partir is not None else agora
+        limite = self.politica_agendamento().limite()
+        return self._indice_agenda().proximos_livres(codmed, quantidade, inicio, limite)
+
+    def conflitos_agenda(self, codmed: str, data_hora):
+        """Horários de consultas do médico que se sobrepõem a uma consulta em `data_hora`."""
+        self._validate_codmed(codmed)
+        return self._indice_agenda().conflitos(codmed, self._parse_datetime(data_hora))
+
+    def reconstruir_agenda(self):
+        """Descarta a agenda; a próxima consulta recarrega do banco."""
+        with self._indices_lock:
+            self._agenda = None
+
     # --- Pedidos (Consulta) CRUD ---
-    def get_pedidos(self):
-        sql = """
+    _SQL_PEDIDOS_SELECT = """
         SELECT
             c.CodCli AS CodCli,
             cl.NomeCli AS clinica_nome,
@@ -249,80 +1871,201 @@ class MySQLDB:
         LEFT JOIN Clinica cl ON c.CodCli = cl.CodCli
         LEFT JOIN Medico m ON c.CodMed = m.CodMed
         LEFT JOIN Paciente p ON c.CpfPaciente = p.CpfPaciente
-        ORDER BY c.Data_Hora
         """
-        rows = self._execute(sql, fetchall=True)
-        return rows or []
+    _SQL_PEDIDOS = _SQL_PEDIDOS_SELECT + "ORDER BY c.Data_Hora\n"
+
+    @_cacheado('Consulta', 'Clinica', 'Medico', 'Paciente')
+    def get_pedidos(self):
+        return self._linhas(self._SQL_PEDIDOS)
 
+    def iter_pedidos(self, chunk_size=1000):
+        """Versão em streaming de get_pedidos: gera listas de até `chunk_size` consultas."""
+        return self._stream(self._SQL_PEDIDOS, chunk_size=chunk_size)
+
+    def _keyset_predicado(self, cursor, op):
+        """
+        Expande (Data_Hora, CodCli, CodMed, CpfPaciente) <op> cursor em ORs aninhados,
+        com um limite explícito em Data_Hora para permitir range scan no índice.
+        """
+        if not cursor or len(cursor) != 4:
+            raise ValidationError("Cursor deve conter (data_hora, codcli, codmed, cpf).")
+        data_hora, codcli, codmed, cpf = cursor
+        dt = self._parse_datetime(data_hora)
+        sql = (
+            f"c.Data_Hora {op}= %s AND (c.Data_Hora {op} %s OR (c.Data_Hora = %s AND "
+            f"(c.CodCli {op} %s OR (c.CodCli = %s AND "
+            f"(c.CodMed {op} %s OR (c.CodMed = %s AND c.CpfPaciente {op} %s))))))"
+        )
+        return sql, [dt, dt, dt, codcli, codcli, codmed, codmed, cpf]
+
+    @_cacheado('Consulta', 'Clinica', 'Medico', 'Paciente')
+    def get_pedidos_pagina(self, limite=50, apos=None, antes=None, codcli=None, codmed=None,
+                           data_inicio=None, data_fim=None, cpf=None):
+        """
+        Paginação por keyset sobre (Data_Hora, CodCli, CodMed, CpfPaciente).
+        - apos/antes: cursor retornado em 'proximo'/'anterior' de uma página anterior
+        - codcli, codmed, cpf, data_inicio/data_fim (inclusivos): filtros opcionais
+        Retorna {'linhas': [...], 'proximo': cursor ou None, 'anterior': cursor ou None}.
+        Uma página vazia devolve o próprio cursor recebido como 'anterior' (vindo
+        de `apos`) ou 'proximo' (vindo de `antes`), para a navegação não travar.
+        O custo de cada página não depende da posição na tabela.
+        """
+        if limite < 1:
+            raise ValidationError("limite deve ser >= 1.")
+        if apos is not None and antes is not None:
+            raise ValidationError("Informe apenas um cursor: apos ou antes.")
+        where = []
+        params = []
+        if codcli:
+            where.append("c.CodCli = %s")
+            params.append(codcli)
+        if codmed:
+            where.append("c.CodMed = %s")
+            params.append(codmed)
+        if cpf:
+            where.append("c.CpfPaciente = %s")
+            params.append(cpf)
+        if data_inicio is not None:
+            where.append("c.Data_Hora >= %s")
+            params.append(self._parse_datetime(data_inicio))
+        if data_fim is not None:
+            where.append("c.Data_Hora <= %s")
+            params.append(self._parse_datetime(data_fim))
+        voltando = antes is not None
+        if apos is not None or voltando:
+            pred, pred_params = self._keyset_predicado(antes if voltando else apos, '<' if voltando else '>')
+            where.append(pred)
+            params.extend(pred_params)
+
+        ordem = "DESC" if voltando else "ASC"
+        sql = (
+            self._SQL_PEDIDOS_SELECT
+            + (f"WHERE {' AND '.join(where)}\n" if where else "")
+            + f"ORDER BY c.Data_Hora {ordem}, c.CodCli {ordem}, c.CodMed {ordem}, c.CpfPaciente {ordem}\n"
+            + "LIMIT %s"
+        )
+        params.append(limite + 1)
+        rows = self._execute(sql, params=tuple(params), fetchall=True) or []
+        tem_mais = len(rows) > limite
+        rows = rows[:limite]
+        if voltando:
+            rows.reverse()
+
+        def chave(r):
+            return (r['Data_Hora'], r['CodCli'], r['CodMed'], r['CpfPaciente'])
+
+        if not rows:
+            # página vazia (ex.: filtro mudou e o cursor passou do fim): o cursor
+            # recebido permite voltar na direção de onde se veio
+            return {'linhas': [], 'proximo': antes if voltando else None,
+                    'anterior': apos if not voltando else None}
+        if voltando:
+            proximo = chave(rows[-1])
+            anterior = chave(rows[0]) if tem_mais else None
+        else:
+            proximo = chave(rows[-1]) if tem_mais else None
+            anterior = chave(rows[0]) if apos is not None else None
+        return {'linhas': rows, 'proximo': proximo, 'anterior': anterior}
+
+    @_cacheado('Consulta', 'Clinica', 'Medico', 'Paciente')
     def get_pedido_por_id(self, codcli: str, codmed: str, cpf: str, data_hora):
         if not (codcli and codmed and cpf and data_hora):
             raise ValidationError("Chave completa do pedido é obrigatória.")
-        dt = self._parse_datetime(data_hora)
+        dt = self._datetime_param(data_hora)
         sql = """
         SELECT
             CodCli, CodMed, CpfPaciente, Data_Hora
         FROM Consulta
         WHERE CodCli = %s AND CodMed = %s AND CpfPaciente = %s AND Data_Hora = %s
         """
-        row = self._execute(sql, params=(codcli, codmed, cpf, dt.strftime("%Y-%m-%d %H:%M:%S")), fetchone=True)
+        row = self._execute(sql, params=(codcli, codmed, cpf, dt), fetchone=True)
         return row
 
-    def create_pedido(self, codcli: str, codmed: str, cpf: str, data_hora):
+    def _params_pedido(self, codcli: str, codmed: str, cpf: str, data_hora):
+        """Valida uma consulta e retorna os parâmetros do INSERT."""
         if not (codcli and codmed and cpf and data_hora):
             raise ValidationError("Todos os campos do pedido são obrigatórios.")
-        dt = self._parse_datetime(data_hora)
+        dt = self._datetime_param(data_hora)
+        self._verificar_prazo(dt)
+        return (codcli, codmed, cpf, dt)
+
+    @_invalida('Consulta')
+    def create_pedido(self, codcli: str, codmed: str, cpf: str, data_hora):
+        params = self._params_pedido(codcli, codmed, cpf, data_hora)
         sql = """
         INSERT INTO Consulta (CodCli, CodMed, CpfPaciente, Data_Hora)
         VALUES (%s, %s, %s, %s)
         """
         try:
-            self._execute(sql, params=(codcli, codmed, cpf, dt.strftime("%Y-%m-%d %H:%M:%S")), commit=True)
+            self._execute(sql, params=params, commit=True)
+            self._agendar_no_indice(codmed, params[3])
             return True
         except Error:
             raise
 
+    @_invalida('Consulta')
+    def create_pedidos_lote(self, registros, chunk_size=500):
+        """
+        Insere consultas em lote. `registros`: dicts com os argumentos de create_pedido.
+        Erros do trigger de agendamento são atribuídos à linha que os causou.
+        """
+        registros = list(registros)
+        resultado = self._create_lote(
+            registros, self._params_pedido, 'Consulta',
+            ('CodCli', 'CodMed', 'CpfPaciente', 'Data_Hora'),
+            chave=lambda p: p, chunk_size=chunk_size
+        )
+        for registro in self._inseridos_lote(registros, resultado):
+            self._agendar_no_indice(registro['codmed'], self._datetime_param(registro['data_hora']))
+        return resultado
+
+    @_invalida('Consulta')
     def update_pedido(self, old_keys: tuple, new_values: dict):
         if not old_keys or len(old_keys) != 4:
             raise ValidationError("old_keys deve conter (codcli, codmed, cpf, data_hora).")
         codcli_old, codmed_old, cpf_old, data_hora_old = old_keys
-        dt_old = self._parse_datetime(data_hora_old)
-        sets = []
+        dt_old = self._datetime_param(data_hora_old)
+        dt_new = dt_old
+        colunas = []
         params = []
         if 'codcli' in new_values:
-            sets.append("CodCli = %s")
+            colunas.append("CodCli")
             params.append(new_values['codcli'])
         if 'codmed' in new_values:
-            sets.append("CodMed = %s")
+            colunas.append("CodMed")
             params.append(new_values['codmed'])
         if 'cpf' in new_values:
-            sets.append("CpfPaciente = %s")
+            colunas.append("CpfPaciente")
             params.append(new_values['cpf'])
         if 'data_hora' in new_values:
-            dt_new = self._parse_datetime(new_values['data_hora'])
-            sets.append("Data_Hora = %s")
-            params.append(dt_new.strftime("%Y-%m-%d %H:%M:%S"))
-        if not sets:
+            dt_new = self._datetime_param(new_values['data_hora'])
+            colunas.append("Data_Hora")
+            params.append(dt_new)
+        if not colunas:
             return 0
-        sql = (
-            f"UPDATE Consulta SET {', '.join(sets)} "
-            "WHERE CodCli = %s AND CodMed = %s AND CpfPaciente = %s "
-            "AND Data_Hora = %s"
-        )
-        params.extend([codcli_old, codmed_old, cpf_old,
-                       dt_old.strftime("%Y-%m-%d %H:%M:%S")])
+        # o trigger de UPDATE valida NEW.Data_Hora mesmo quando a data não muda
+        self._verificar_prazo(dt_new)
+        sql = _sql_update('Consulta', tuple(colunas), ('CodCli', 'CodMed', 'CpfPaciente', 'Data_Hora'))
+        params.extend([codcli_old, codmed_old, cpf_old, dt_old])
         try:
-            self._execute(sql, params=tuple(params), commit=True)
+            alteradas = self._execute(sql, params=tuple(params), commit=True)
+            # chave antiga inexistente: nada mudou no banco nem muda no índice
+            if alteradas:
+                self._agendar_no_indice(codmed_old, dt_old, remover=True)
+                self._agendar_no_indice(new_values.get('codmed', codmed_old), dt_new)
             return True
         except Error:
             raise
 
+    @_invalida('Consulta')
     def delete_pedido(self, codcli: str, codmed: str, cpf: str, data_hora):
         if not (codcli and codmed and cpf and data_hora):
             raise ValidationError("Chave completa do pedido é obrigatória.")
-        dt = self._parse_datetime(data_hora)
+        dt = self._datetime_param(data_hora)
         sql = "DELETE FROM Consulta WHERE CodCli = %s AND CodMed = %s AND CpfPaciente = %s AND Data_Hora = %s"
         try:
-            self._execute(sql, params=(codcli, codmed, cpf, dt.strftime("%Y-%m-%d %H:%M:%S")), commit=True)
+            if self._execute(sql, params=(codcli, codmed, cpf, dt), commit=True):
+                self._agendar_no_indice(codmed, dt, remover=True)
             return True
         except Error:
             raise
@@ -333,8 +2076,7 @@ class MySQLDB:
             raise ValidationError("CodCli é obrigatório.")
         return True
 
-    def get_clinicas(self):
-        sql = """
+    _SQL_CLINICAS_SELECT = """
         SELECT
             CodCli AS codcli,
             NomeCli AS nome,
@@ -342,11 +2084,18 @@ class MySQLDB:
             Telefone AS telefone,
             Email AS email
         FROM Clinica
-        ORDER BY NomeCli
         """
-        rows = self._execute(sql, fetchall=True)
-        return rows or []
 
+    @_cacheado('Clinica')
+    def get_clinicas(self):
+        return self._linhas(self._SQL_CLINICAS_SELECT + "ORDER BY NomeCli\n")
+
+    @_cacheado('Clinica')
+    def buscar_clinicas(self, termo='', limite=20):
+        """Até `limite` clínicas cujo nome ou código começa com `termo`."""
+        return self._buscar_prefixo(self._SQL_CLINICAS_SELECT, termo, 'CodCli', 'NomeCli', limite)
+
+    @_cacheado('Clinica')
     def get_clinica_por_id(self, codcli: str):
         self._validate_codcli(codcli)
         sql = (
@@ -356,7 +2105,8 @@ class MySQLDB:
         row = self._execute(sql, params=(codcli,), fetchone=True)
         return row
 
-    def create_clinica(self, codcli: str, nome: str, endereco: str, telefone: str, email: str):
+    def _params_clinica(self, codcli: str, nome: str, endereco: str, telefone: str, email: str):
+        """Valida uma clínica e retorna os parâmetros do INSERT."""
         self._validate_codcli(codcli)
         if not nome:
             raise ValidationError("Nome é obrigatório.")
@@ -366,13 +2116,28 @@ class MySQLDB:
             raise ValidationError("Email é obrigatório.")
         self.validate_email(email)
         self.validate_phone(telefone, is_clinica=True)
+        return (codcli, nome, endereco, telefone, email)
+
+    @_invalida('Clinica')
+    def create_clinica(self, codcli: str, nome: str, endereco: str, telefone: str, email: str):
+        params = self._params_clinica(codcli, nome, endereco, telefone, email)
         sql = "INSERT INTO Clinica (CodCli, NomeCli, Endereco, Telefone, Email) VALUES (%s, %s, %s, %s, %s)"
         try:
-            self._execute(sql, params=(codcli, nome, endereco, telefone, email), commit=True)
+            self._execute(sql, params=params, commit=True)
             return True
         except Error:
             raise
 
+    @_invalida('Clinica')
+    def create_clinicas_lote(self, registros, chunk_size=500):
+        """Insere clínicas em lote. `registros`: dicts com os argumentos de create_clinica."""
+        return self._create_lote(
+            registros, self._params_clinica, 'Clinica',
+            ('CodCli', 'NomeCli', 'Endereco', 'Telefone', 'Email'),
+            chave=lambda p: p[0], chunk_size=chunk_size
+        )
+
+    @_invalida('Clinica')
     def update_clinica(self, codcli: str, nome: str = None, endereco: str = None, telefone: str = None, email: str = None):
         self._validate_codcli(codcli)
         if email is not None:
@@ -383,27 +2148,27 @@ class MySQLDB:
             if telefone == '':
                 raise ValidationError("Telefone não pode ser vazio.")
             self.validate_phone(telefone, is_clinica=True)
-        sets = []
+        colunas = []
         params = []
         if nome is not None:
             if nome == '':
                 raise ValidationError("Nome não pode ser vazio.")
-            sets.append("NomeCli = %s")
+            colunas.append("NomeCli")
             params.append(nome)
         if endereco is not None:
             if endereco == '':
                 raise ValidationError("Endereço não pode ser vazio.")
-            sets.append("Endereco = %s")
+            colunas.append("Endereco")
             params.append(endereco)
         if telefone is not None:
-            sets.append("Telefone = %s")
+            colunas.append("Telefone")
             params.append(telefone)
         if email is not None:
-            sets.append("Email = %s")
+            colunas.append("Email")
             params.append(email)
-        if not sets:
+        if not colunas:
             return 0
-        sql = f"UPDATE Clinica SET {', '.join(sets)} WHERE CodCli = %s"
+        sql = _sql_update('Clinica', tuple(colunas), ('CodCli',))
         params.append(codcli)
         try:
             self._execute(sql, params=tuple(params), commit=True)
@@ -411,11 +2176,14 @@ class MySQLDB:
         except Error:
             raise
 
+    @_invalida('Clinica', 'Consulta')
     def delete_clinica(self, codcli: str):
         self._validate_codcli(codcli)
         sql = "DELETE FROM Clinica WHERE CodCli = %s"
         try:
             self._execute(sql, params=(codcli,), commit=True)
+            # o ON DELETE CASCADE removeu as consultas da clínica
+            self._apos_commit(self.reconstruir_agenda)
             return True
         except Error:
             raise
@@ -426,8 +2194,7 @@ class MySQLDB:
             raise ValidationError("CodMed é obrigatório.")
         return True
 
-    def get_medicos(self):
-        sql = """
+    _SQL_MEDICOS_SELECT = """
         SELECT
             CodMed AS codmed,
             NomeMed AS nome,
@@ -436,11 +2203,18 @@ class MySQLDB:
             Telefone AS telefone,
             Email AS email
         FROM Medico
-        ORDER BY NomeMed
         """
-        rows = self._execute(sql, fetchall=True)
-        return rows or []
 
+    @_cacheado('Medico')
+    def get_medicos(self):
+        return self._linhas(self._SQL_MEDICOS_SELECT + "ORDER BY NomeMed\n")
+
+    @_cacheado('Medico')
+    def buscar_medicos(self, termo='', limite=20):
+        """Até `limite` médicos cujo nome ou código começa com `termo`."""
+        return self._buscar_prefixo(self._SQL_MEDICOS_SELECT, termo, 'CodMed', 'NomeMed', limite)
+
+    @_cacheado('Medico')
     def get_medico_por_id(self, codmed: str):
         self._validate_codmed(codmed)
         sql = (
@@ -451,7 +2225,8 @@ class MySQLDB:
         row = self._execute(sql, params=(codmed,), fetchone=True)
         return row
 
-    def create_medico(self, codmed: str, nome: str, genero: str, especialidade: str, telefone: str, email: str):
+    def _params_medico(self, codmed: str, nome: str, genero: str, especialidade: str, telefone: str, email: str):
+        """Valida um médico e retorna os parâmetros do INSERT."""
         self._validate_codmed(codmed)
         if not nome:
             raise ValidationError("Nome é obrigatório.")
@@ -463,13 +2238,33 @@ class MySQLDB:
             raise ValidationError("Email é obrigatório.")
         self.validate_email(email)
         self.validate_phone(telefone, is_clinica=False)
+        return (codmed, nome, genero, telefone, email, especialidade)
+
+    @_invalida('Medico')
+    def create_medico(self, codmed: str, nome: str, genero: str, especialidade: str, telefone: str, email: str):
+        params = self._params_medico(codmed, nome, genero, especialidade, telefone, email)
         sql = "INSERT INTO Medico (CodMed, NomeMed, Genero, Telefone, Email, Especialidade) VALUES (%s, %s, %s, %s, %s, %s)"
         try:
-            self._execute(sql, params=(codmed, nome, genero, telefone, email, especialidade), commit=True)
+            self._execute(sql, params=params, commit=True)
+            self._indexar_nome('medico', codmed, nome)
             return True
         except Error:
             raise
 
+    @_invalida('Medico')
+    def create_medicos_lote(self, registros, chunk_size=500):
+        """Insere médicos em lote. `registros`: dicts com os argumentos de create_medico."""
+        registros = list(registros)
+        resultado = self._create_lote(
+            registros, self._params_medico, 'Medico',
+            ('CodMed', 'NomeMed', 'Genero', 'Telefone', 'Email', 'Especialidade'),
+            chave=lambda p: p[0], chunk_size=chunk_size
+        )
+        for registro in self._inseridos_lote(registros, resultado):
+            self._indexar_nome('medico', registro['codmed'], registro['nome'])
+        return resultado
+
+    @_invalida('Medico')
     def update_medico(
         self, codmed: str, nome: str = None, genero: str = None, especialidade: str = None,
         telefone: str = None, email: str = None
@@ -485,42 +2280,46 @@ class MySQLDB:
             if telefone == '':
                 raise ValidationError("Telefone não pode ser vazio.")
             self.validate_phone(telefone, is_clinica=False)
-        sets = []
+        colunas = []
         params = []
         if nome is not None:
             if nome == '':
                 raise ValidationError("Nome não pode ser vazio.")
-            sets.append("NomeMed = %s")
+            colunas.append("NomeMed")
             params.append(nome)
         if genero is not None:
-            sets.append("Genero = %s")
+            colunas.append("Genero")
             params.append(genero)
         if especialidade is not None:
             if especialidade == '':
                 raise ValidationError("Especialidade não pode ser vazia.")
-            sets.append("Especialidade = %s")
+            colunas.append("Especialidade")
             params.append(especialidade)
         if telefone is not None:
-            sets.append("Telefone = %s")
+            colunas.append("Telefone")
             params.append(telefone)
         if email is not None:
-            sets.append("Email = %s")
+            colunas.append("Email")
             params.append(email)
-        if not sets:
+        if not colunas:
             return 0
-        sql = f"UPDATE Medico SET {', '.join(sets)} WHERE CodMed = %s"
+        sql = _sql_update('Medico', tuple(colunas), ('CodMed',))
         params.append(codmed)
         try:
             self._execute(sql, params=tuple(params), commit=True)
+            if nome is not None:
+                self._indexar_nome('medico', codmed, nome)
             return True
         except Error:
             raise
 
+    @_invalida('Medico')
     def delete_medico(self, codmed: str):
         self._validate_codmed(codmed)
         sql = "DELETE FROM Medico WHERE CodMed = %s"
         try:
             self._execute(sql, params=(codmed,), commit=True)
+            self._indexar_nome('medico', codmed)
             return True
         except Error:
             raise
@@ -529,6 +2328,7 @@ class MySQLDB:
     # CONSULTAS NÃO TRIVIAIS - BONIFICAÇÃO
     # ========================================
 
+    @_cacheado('Clinica', 'Consulta')
     def get_estatisticas_por_clinica(self):
         """
         Retorna estatísticas de consultas por clínica.
@@ -546,39 +2346,30 @@ class MySQLDB:
         GROUP BY cl.CodCli, cl.NomeCli
         ORDER BY total_consultas DESC
         """
-        rows = self._execute(sql, fetchall=True)
-        return rows or []
+        return self._linhas(sql)
 
+    @_cacheado('Medico', 'Consulta')
     def get_medicos_mais_atendimentos(self, limit=10):
         """
         Ranking de médicos com mais consultas agendadas.
-        Usa: COUNT, GROUP BY, ORDER BY, LIMIT
+        Usa: rollup ResumoMedico mantido por triggers, ORDER BY no índice
+        de TotalConsultas e LIMIT (lê só as `limit` primeiras linhas).
         """
         sql = """
         SELECT
             m.CodMed AS codigo_medico,
             m.NomeMed AS nome_medico,
             m.Especialidade AS especialidade,
-            COUNT(c.CodMed) AS total_consultas,
-            COUNT(DISTINCT c.CpfPaciente) AS pacientes_unicos
-        FROM Medico m
-        LEFT JOIN Consulta c ON m.CodMed = c.CodMed
-        GROUP BY m.CodMed, m.NomeMed, m.Especialidade
-        ORDER BY total_consultas DESC
+            r.TotalConsultas AS total_consultas,
+            r.PacientesUnicos AS pacientes_unicos
+        FROM ResumoMedico r
+        INNER JOIN Medico m ON m.CodMed = r.CodMed
+        ORDER BY r.TotalConsultas DESC
         LIMIT %s
         """
-        rows = self._execute(sql, params=(limit,), fetchall=True)
-        return rows or []
+        return self._linhas(sql, params=(limit,))
 
-    def get_consultas_por_periodo(self, data_inicio, data_fim):
-        """
-        Consultas em um período específico com informações completas.
-        Usa: BETWEEN, manipulação de datas, múltiplos JOINs
-        """
-        dt_inicio = self._parse_datetime(data_inicio)
-        dt_fim = self._parse_datetime(data_fim)
-
-        sql = """
+    _SQL_CONSULTAS_POR_PERIODO = """
         SELECT
             c.Data_Hora AS data_hora,
             cl.NomeCli AS clinica,
@@ -594,9 +2385,24 @@ class MySQLDB:
         WHERE c.Data_Hora BETWEEN %s AND %s
         ORDER BY c.Data_Hora
         """
-        rows = self._execute(sql, params=(dt_inicio, dt_fim), fetchall=True)
-        return rows or []
 
+    @_cacheado('Consulta', 'Clinica', 'Medico', 'Paciente')
+    def get_consultas_por_periodo(self, data_inicio, data_fim):
+        """
+        Consultas em um período específico com informações completas.
+        Usa: BETWEEN, manipulação de datas, múltiplos JOINs
+        """
+        dt_inicio = self._parse_datetime(data_inicio)
+        dt_fim = self._parse_datetime(data_fim)
+        return self._linhas(self._SQL_CONSULTAS_POR_PERIODO, params=(dt_inicio, dt_fim))
+
+    def iter_consultas_por_periodo(self, data_inicio, data_fim, chunk_size=1000):
+        """Versão em streaming de get_consultas_por_periodo (listas de até `chunk_size` linhas)."""
+        dt_inicio = self._parse_datetime(data_inicio)
+        dt_fim = self._parse_datetime(data_fim)
+        return self._stream(self._SQL_CONSULTAS_POR_PERIODO, params=(dt_inicio, dt_fim), chunk_size=chunk_size)
+
+    @_cacheado('Paciente')
     def get_pacientes_por_genero(self):
         """
         Estatísticas demográficas dos pacientes.
@@ -613,71 +2419,77 @@ class MySQLDB:
         GROUP BY Genero
         ORDER BY total_pacientes DESC
         """
-        rows = self._execute(sql, fetchall=True)
-        return rows or []
+        return self._linhas(sql)
 
+    @_cacheado('Consulta')
     def get_consultas_por_mes(self, ano=None):
         """
         Distribuição de consultas por mês.
-        Usa: DATE_FORMAT, COUNT, GROUP BY, manipulação de datas
+        Usa: DATE_FORMAT, COUNT, GROUP BY, coluna gerada AnoMes
         """
         if ano is None:
             ano = datetime.now().year
+        ano = int(ano)
 
+        # Intervalo semiaberto em Data_Hora em vez de YEAR(Data_Hora) = ano;
+        # o filtro em AnoMes permite range scan no índice da coluna gerada.
         sql = """
         SELECT
-            DATE_FORMAT(Data_Hora, '%%Y-%%m') AS mes,
-            MONTH(Data_Hora) AS numero_mes,
-            MONTHNAME(Data_Hora) AS nome_mes,
+            DATE_FORMAT(MIN(Data_Hora), '%%Y-%%m') AS mes,
+            MOD(AnoMes, 100) AS numero_mes,
+            MONTHNAME(MIN(Data_Hora)) AS nome_mes,
             COUNT(*) AS total_consultas,
             COUNT(DISTINCT CodMed) AS medicos_ativos,
             COUNT(DISTINCT CpfPaciente) AS pacientes_atendidos
         FROM Consulta
-        WHERE YEAR(Data_Hora) = %s
-        GROUP BY DATE_FORMAT(Data_Hora, '%%Y-%%m'), MONTH(Data_Hora), MONTHNAME(Data_Hora)
-        ORDER BY numero_mes
+        WHERE AnoMes BETWEEN %s AND %s
+          AND Data_Hora >= %s AND Data_Hora < %s
+        GROUP BY AnoMes
+        ORDER BY AnoMes
         """
-        rows = self._execute(sql, params=(ano,), fetchall=True)
-        return rows or []
+        params = (ano * 100 + 1, ano * 100 + 12, datetime(ano, 1, 1), datetime(ano + 1, 1, 1))
+        return self._linhas(sql, params=params)
 
+    @_cacheado('Medico', 'Consulta')
     def get_especialidades_mais_procuradas(self):
         """
         Ranking de especialidades médicas mais procuradas.
-        Usa: COUNT, GROUP BY, ORDER BY
+        Usa: rollup ResumoEspecialidade mantido por triggers, ORDER BY.
+        Todo médico é contado (inclusive sem especialidade), então filtrar
+        TotalMedicos > 0 dá as mesmas linhas do GROUP BY sobre Medico.
         """
         sql = """
         SELECT
-            COALESCE(NULLIF(m.Especialidade, ''), 'Não especificada') AS especialidade,
-            COUNT(c.CodMed) AS total_consultas,
-            COUNT(DISTINCT c.CpfPaciente) AS pacientes_unicos,
-            COUNT(DISTINCT m.CodMed) AS medicos_especialidade
-        FROM Medico m
-        LEFT JOIN Consulta c ON m.CodMed = c.CodMed
-        GROUP BY m.Especialidade
-        ORDER BY total_consultas DESC
+            COALESCE(NULLIF(Especialidade, ''), 'Não especificada') AS especialidade,
+            TotalConsultas AS total_consultas,
+            PacientesUnicos AS pacientes_unicos,
+            TotalMedicos AS medicos_especialidade
+        FROM ResumoEspecialidade
+        WHERE TotalMedicos > 0
+        ORDER BY TotalConsultas DESC
         """
-        rows = self._execute(sql, fetchall=True)
-        return rows or []
+        return self._linhas(sql)
 
+    @_cacheado('Consulta')
     def get_taxa_ocupacao_por_dia_semana(self):
         """
         Análise de ocupação por dia da semana.
-        Usa: DAYOFWEEK, DAYNAME, COUNT, AVG, GROUP BY
+        Usa: coluna gerada DiaSemana (DAYOFWEEK), DAYNAME, COUNT, AVG, GROUP BY
         """
         sql = """
         SELECT
-            DAYOFWEEK(Data_Hora) AS numero_dia,
-            DAYNAME(Data_Hora) AS dia_semana,
+            DiaSemana AS numero_dia,
+            DAYNAME(MIN(Data_Hora)) AS dia_semana,
             COUNT(*) AS total_consultas,
             COUNT(DISTINCT CodCli) AS clinicas_ativas,
             ROUND(COUNT(*) / COUNT(DISTINCT DATE(Data_Hora)), 2) AS media_consultas_por_dia
         FROM Consulta
-        GROUP BY DAYOFWEEK(Data_Hora), DAYNAME(Data_Hora)
-        ORDER BY numero_dia
+        GROUP BY DiaSemana
+        ORDER BY DiaSemana
         """
-        rows = self._execute(sql, fetchall=True)
-        return rows or []
+        return self._linhas(sql)
 
+    @_cacheado('Paciente', 'Consulta')
     def get_pacientes_sem_consulta(self):
         """
         Pacientes cadastrados que nunca tiveram consulta.
@@ -696,9 +2508,9 @@ class MySQLDB:
         WHERE c.CpfPaciente IS NULL
         ORDER BY p.NomePac
         """
-        rows = self._execute(sql, fetchall=True)
-        return rows or []
+        return self._linhas(sql)
 
+    @_cacheado('Consulta', 'Clinica', 'Medico', 'Paciente')
     def get_consultas_proximas(self, dias=7):
         """
         Consultas agendadas para os próximos N dias.
@@ -723,28 +2535,72 @@ class MySQLDB:
         WHERE c.Data_Hora BETWEEN NOW() AND DATE_ADD(NOW(), INTERVAL %s DAY)
         ORDER BY c.Data_Hora
         """
-        rows = self._execute(sql, params=(dias,), fetchall=True)
-        return rows or []
+        return self._linhas(sql, params=(dias,))
 
+    @_cacheado('Paciente', 'Medico', 'Clinica', 'Consulta')
     def get_resumo_geral_sistema(self):
         """
         Dashboard completo com estatísticas gerais do sistema.
-        Usa: múltiplas agregações e subconsultas
+        Usa: tabelas de resumo mantidas por triggers (ResumoSistema,
+        ResumoConsultaDia, ResumoEspecialidade). ResumoSistema é dividido em
+        fatias, somadas aqui. Só as consultas de hoje posteriores a NOW() são
+        contadas em Consulta, via índice de Data_Hora.
         """
         sql = """
         SELECT
-            (SELECT COUNT(*) FROM Paciente) AS total_pacientes,
-            (SELECT COUNT(*) FROM Medico) AS total_medicos,
-            (SELECT COUNT(*) FROM Clinica) AS total_clinicas,
-            (SELECT COUNT(*) FROM Consulta) AS total_consultas,
-            (SELECT COUNT(*) FROM Consulta WHERE Data_Hora >= CURDATE()) AS consultas_futuras,
-            (SELECT COUNT(*) FROM Consulta WHERE Data_Hora < NOW()) AS consultas_passadas,
-            (SELECT COUNT(DISTINCT Especialidade) FROM Medico WHERE Especialidade != '') AS especialidades_disponiveis,
-            (SELECT ROUND(AVG(YEAR(CURDATE()) - YEAR(DataNascimento)), 1) FROM Paciente) AS idade_media_pacientes
+            r.TotalPacientes AS total_pacientes,
+            r.TotalMedicos AS total_medicos,
+            r.TotalClinicas AS total_clinicas,
+            r.TotalConsultas AS total_consultas,
+            CAST((SELECT COALESCE(SUM(Total), 0) FROM ResumoConsultaDia WHERE Dia >= CURDATE())
+                AS SIGNED) AS consultas_futuras,
+            CAST(r.TotalConsultas
+                - (SELECT COALESCE(SUM(Total), 0) FROM ResumoConsultaDia WHERE Dia > CURDATE())
+                - (SELECT COUNT(*) FROM Consulta
+                   WHERE Data_Hora >= NOW() AND Data_Hora < CURDATE() + INTERVAL 1 DAY)
+                AS SIGNED) AS consultas_passadas,
+            (SELECT COUNT(*) FROM ResumoEspecialidade
+             WHERE TotalMedicos > 0 AND Especialidade <> '') AS especialidades_disponiveis,
+            ROUND(YEAR(CURDATE()) - r.SomaAnoNascimento / NULLIF(r.TotalPacientes, 0), 1) AS idade_media_pacientes
+        FROM (
+            SELECT
+                CAST(SUM(TotalPacientes) AS SIGNED) AS TotalPacientes,
+                CAST(SUM(SomaAnoNascimento) AS SIGNED) AS SomaAnoNascimento,
+                CAST(SUM(TotalMedicos) AS SIGNED) AS TotalMedicos,
+                CAST(SUM(TotalClinicas) AS SIGNED) AS TotalClinicas,
+                CAST(SUM(TotalConsultas) AS SIGNED) AS TotalConsultas
+            FROM ResumoSistema
+        ) r
         """
         row = self._execute(sql, fetchone=True)
         return row or {}
 
+    @_rotulado
+    def reconciliar_resumo(self):
+        """
+        Recalcula as tabelas de resumo a partir das tabelas base (sp_reconciliar_resumo)
+        e retorna os campos que estavam divergentes: {campo: (antes, depois)}.
+        O evento ev_reconciliar_resumo faz o mesmo diariamente no servidor.
+        """
+        self._cache.invalidate()
+        antes = self.get_resumo_geral_sistema()
+        try:
+            self._execute("CALL sp_reconciliar_resumo()", commit=True)
+        finally:
+            self._apos_commit(self._cache.invalidate)
+        depois = self.get_resumo_geral_sistema()
+        return {k: (antes.get(k), v) for k, v in depois.items() if antes.get(k) != v}
+
+    @_invalida()
+    def refresh_rollups(self):
+        """
+        Reconstrói os rollups de ranking (ResumoMedico, ResumoEspecialidade e
+        as tabelas de pares com paciente) a partir de Consulta. Os triggers
+        já os mantêm em dia; use após cargas feitas com triggers desativados.
+        """
+        self._execute("CALL sp_refresh_rollups()", commit=True)
+
+    @_cacheado('Consulta', 'Clinica', 'Medico')
     def get_historico_paciente(self, cpf: str):
         """
         Histórico completo de consultas de um paciente.
@@ -770,5 +2626,4 @@ class MySQLDB:
         WHERE c.CpfPaciente = %s
         ORDER BY c.Data_Hora DESC
         """
-        rows = self._execute(sql, params=(cpf,), fetchall=True)
-        return rows or []
+        return self._linhas(sql, params=(cpf,))
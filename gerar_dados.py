@@ -0,0 +1,567 @@
+"""
+Gera dados sintéticos em escala para testes de carga:
+
+    python gerar_dados.py --clinicas 1000 --medicos 50000 --pacientes 5000000 --consultas 50000000
+
+- Formatos: CPF com dígitos verificadores válidos, telefones e e-mails nos
+  padrões de db.py (conferidos com MySQLDB.validar_colunas antes de gravar).
+- Chaves: códigos e CPFs continuam a partir do maior valor já existente em
+  cada tabela, então nunca colidem com os dados de exemplo nem com uma
+  execução anterior (rodar de novo acrescenta mais dados).
+- Consultas: cada médico recebe horários distintos na grade de 30 min (8h-18h,
+  dias úteis), então (CodMed, Data_Hora) e a PK composta são únicos por
+  construção, sem conflito de agenda. Com --medicos 0 os horários da grade
+  que os médicos existentes já ocupam ficam de fora (ver chaves_existentes);
+  quem não tiver horários livres suficientes recebe menos consultas. As
+  datas vão de --dias-historico atrás até o prazo de PoliticaAgendamento,
+  aceito pelos triggers.
+- Carga: INSERTs multi-row de --lote linhas, um COMMIT por lote, em
+  --processos processos com conexão própria. As tabelas são carregadas em
+  ordem (Clinica, Medico, Paciente, Consulta) por causa das FKs.
+- Com --carga-em-massa os triggers de resumo e ranking (tg_resumo_*,
+  tg_ranking_*) saem durante a carga, já que as linhas de resumo que eles
+  atualizam serializam os processos; no fim são recriados e
+  sp_reconciliar_resumo() recalcula os resumos e rollups de uma vez.
+- Registros já existentes (quantidade 0 de uma tabela) não vão para os
+  processos no initargs: cada tarefa lê pela própria conexão só as chaves
+  de que precisa (ver chaves_existentes).
+Cada tarefa usa um gerador aleatório derivado de --semente, das chaves
+iniciais da execução (maior código e CPF + 1) e do seu intervalo: o
+resultado não depende da ordem dos processos, e a mesma semente sobre a
+mesma base gera os mesmos dados.
+"""
+
+import argparse
+import math
+import multiprocessing
+import os
+import random
+import re
+import sys
+import time
+import unicodedata
+from datetime import date, datetime, timedelta
+
+import mysql.connector
+from dotenv import load_dotenv
+
+from db import MySQLDB
+
+load_dotenv()
+
+NOMES_F = ['Ana', 'Maria', 'Beatriz', 'Camila', 'Fernanda', 'Juliana', 'Larissa', 'Mariana',
+           'Patrícia', 'Rafaela', 'Sofia', 'Tatiana', 'Vitória', 'Amanda', 'Bianca', 'Carolina',
+           'Débora', 'Gabriela', 'Helena', 'Isabela', 'Jéssica', 'Letícia', 'Natália', 'Raquel']
+NOMES_M = ['João', 'Pedro', 'Lucas', 'Gabriel', 'Rafael', 'Bruno', 'Carlos', 'Daniel',
+           'Eduardo', 'Felipe', 'Gustavo', 'Henrique', 'Igor', 'Leonardo', 'Marcos', 'Paulo',
+           'Ricardo', 'Sérgio', 'Thiago', 'Vinicius', 'André', 'Caio', 'Diego', 'Fábio']
+SOBRENOMES = ['Silva', 'Santos', 'Oliveira', 'Souza', 'Lima', 'Pereira', 'Ferreira', 'Costa',
+              'Rodrigues', 'Almeida', 'Nascimento', 'Carvalho', 'Gomes', 'Martins', 'Araújo',
+              'Ribeiro', 'Barbosa', 'Cavalcanti', 'Albuquerque', 'Lins', 'Moura', 'Vieira',
+              'Mendes', 'Nunes', 'Freitas', 'Tavares', 'Lopes', 'Matos', 'Alencar', 'Paiva']
+ESPECIALIDADES = ['Cardiologia', 'Dermatologia', 'Endocrinologia', 'Gastroenterologia',
+                  'Ginecologia', 'Neurologia', 'Oftalmologia', 'Ortopedia',
+                  'Otorrinolaringologia', 'Pediatria', 'Pneumologia', 'Psiquiatria', 'Urologia']
+PREFIXOS_CLINICA = ['Clínica', 'Centro', 'Saúde', 'Vida', 'Med', 'Bem Estar', 'Cuidar']
+RUAS = ['Av. Boa Viagem', 'Rua da Aurora', 'Av. Rosa e Silva', 'Rua do Futuro',
+        'Av. Agamenon Magalhães', 'Rua Setúbal', 'Av. Domingos Ferreira', 'Rua Dom Bosco']
+DDDS = (11, 21, 31, 41, 51, 61, 71, 81, 85, 91)
+
+# grade de consultas (mesma de agenda.IndiceAgenda com a duração padrão)
+INICIO_EXPEDIENTE = 8
+HORARIOS_POR_DIA = 20  # 8h-18h, de 30 em 30 min
+OCUPACAO_MAXIMA = 0.8
+# CPFs existentes lidos por tarefa de Consulta (--pacientes 0)
+JANELA_PACIENTES = 10000
+# triggers removidos durante a --carga-em-massa
+PADROES_TRIGGERS_RESUMO = (r'tg\_resumo\_%', r'tg\_ranking\_%')
+
+SQL_INSERT = {
+    'Clinica': "INSERT INTO Clinica (CodCli, NomeCli, Endereco, Telefone, Email) VALUES ",
+    'Medico': "INSERT INTO Medico (CodMed, NomeMed, Genero, Telefone, Email, Especialidade) VALUES ",
+    'Paciente': "INSERT INTO Paciente (CpfPaciente, NomePac, DataNascimento, Genero, Telefone, Email) VALUES ",
+    'Consulta': "INSERT INTO Consulta (CodCli, CodMed, CpfPaciente, Data_Hora) VALUES ",
+}
+
+
+# --- Formatos ---
+def formatar_cpf(corpo):
+    """Corpo de 9 dígitos (int) -> 'XXX.XXX.XXX-DD' com os dígitos verificadores."""
+    d = [int(c) for c in f"{corpo:09d}"]
+    for pesos in (range(10, 1, -1), range(11, 1, -1)):
+        d.append(sum(x * p for x, p in zip(d, pesos)) * 10 % 11 % 10)
+    s = ''.join(map(str, d))
+    return f"{s[:3]}.{s[3:6]}.{s[6:9]}-{s[9:]}"
+
+
+def corpo_cpf(cpf):
+    return int(cpf[:3] + cpf[4:7] + cpf[8:11])
+
+
+def telefone(rnd, clinica=False):
+    if clinica:
+        return f"({rnd.choice(DDDS)}) {rnd.randint(2000, 3999)}-{rnd.randint(0, 9999):04d}"
+    return f"({rnd.choice(DDDS)}) 9{rnd.randint(0, 9999):04d}-{rnd.randint(0, 9999):04d}"
+
+
+def email(usuario, sufixo):
+    """E-mail de até 40 caracteres (limite das colunas)."""
+    endereco = f"{usuario}{sufixo}@mail.com"
+    return endereco if len(endereco) <= 40 else f"u{sufixo}@mail.com"
+
+
+def _ascii(texto):
+    return unicodedata.normalize('NFKD', texto).encode('ascii', 'ignore').decode('ascii').lower().replace(' ', '')
+
+
+def nome_pessoa(rnd, genero):
+    primeiro = rnd.choice(NOMES_F if genero == 'F' else NOMES_M)
+    sobrenomes = rnd.sample(SOBRENOMES, rnd.choice((1, 2)))
+    return primeiro, ' '.join([primeiro] + sobrenomes)
+
+
+# --- Geração por intervalo de índices ---
+def gerar_clinicas(cfg, inicio, fim, rnd):
+    linhas = []
+    for i in range(inicio, fim):
+        codigo = cfg['base_clinica'] + i
+        nome = f"{rnd.choice(PREFIXOS_CLINICA)} {codigo % 100000}"[:20]
+        endereco = f"{rnd.choice(RUAS)}, {rnd.randint(1, 4000)}"
+        linhas.append((f"{codigo:07d}", nome, endereco, telefone(rnd, clinica=True),
+                       email(f"clinica{codigo}", '')))
+    return linhas
+
+
+def gerar_medicos(cfg, inicio, fim, rnd):
+    linhas = []
+    for i in range(inicio, fim):
+        codigo = cfg['base_medico'] + i
+        genero = rnd.choice('FM')
+        primeiro, nome = nome_pessoa(rnd, genero)
+        linhas.append((f"{codigo:07d}", nome, genero, telefone(rnd),
+                       email(_ascii(primeiro) + '.med', codigo), rnd.choice(ESPECIALIDADES)))
+    return linhas
+
+
+def gerar_pacientes(cfg, inicio, fim, rnd):
+    linhas = []
+    hoje = cfg['hoje']
+    for i in range(inicio, fim):
+        genero = rnd.choice('FM')
+        primeiro, nome = nome_pessoa(rnd, genero)
+        nascimento = hoje - timedelta(days=rnd.randint(0, 95 * 365))
+        linhas.append((formatar_cpf(cfg['base_cpf'] + i), nome, nascimento, genero, telefone(rnd),
+                       email(_ascii(primeiro), cfg['base_cpf'] + i)))
+    return linhas
+
+
+def _chave(cfg, tipo, indice):
+    """Chave do i-ésimo registro de `tipo` gerado nesta execução."""
+    if tipo == 'clinica':
+        return f"{cfg['base_clinica'] + indice:07d}"
+    if tipo == 'medico':
+        return f"{cfg['base_medico'] + indice:07d}"
+    return formatar_cpf(cfg['base_cpf'] + indice)
+
+
+def consultas_do_medico(cfg, m):
+    base, resto = divmod(cfg['consultas'], cfg['n_medicos'])
+    return base + (1 if m < resto else 0)
+
+
+def gerar_consultas(cfg, inicio, fim, rnd, existentes=None):
+    """
+    Consultas dos médicos de índice [inicio, fim), em horários distintos da grade de cada um.
+    `existentes` traz as chaves já gravadas que a tarefa usa (ver chaves_existentes).
+    """
+    existentes = existentes or {}
+    dias = cfg['dias_grade']
+    capacidade = len(dias) * HORARIOS_POR_DIA
+    medicos = existentes.get('medico')
+    ocupados = existentes.get('ocupados', {})
+    clinicas_existentes = existentes.get('clinica')
+    pacientes = existentes.get('paciente')
+    n_clinicas = len(clinicas_existentes) if clinicas_existentes is not None else cfg['n_clinicas']
+    if medicos is None:
+        medicos = [_chave(cfg, 'medico', m) for m in range(inicio, fim)]
+    linhas = []
+    for m, codmed in enumerate(medicos, inicio):
+        # cada médico atende em até 3 clínicas fixas
+        indices = [(m * 7 + k) % n_clinicas for k in range(min(3, n_clinicas))]
+        if clinicas_existentes is not None:
+            clinicas = [clinicas_existentes[i] for i in indices]
+        else:
+            clinicas = [_chave(cfg, 'clinica', i) for i in indices]
+        livres = range(capacidade)
+        if codmed in ocupados:
+            livres = [s for s in livres if s not in ocupados[codmed]]
+        for slot in rnd.sample(livres, min(consultas_do_medico(cfg, m), len(livres))):
+            dia, horario = divmod(slot, HORARIOS_POR_DIA)
+            data_hora = datetime.combine(dias[dia], datetime.min.time()) + timedelta(
+                hours=INICIO_EXPEDIENTE, minutes=30 * horario)
+            if pacientes is not None:
+                cpf = rnd.choice(pacientes)
+            else:
+                cpf = _chave(cfg, 'paciente', rnd.randrange(cfg['n_pacientes']))
+            linhas.append((rnd.choice(clinicas), codmed, cpf, data_hora))
+    return linhas
+
+
+GERADORES = {
+    'Clinica': gerar_clinicas,
+    'Medico': gerar_medicos,
+    'Paciente': gerar_pacientes,
+    'Consulta': gerar_consultas,
+}
+# id de cada tabela na semente das tarefas
+_IDS_TABELA = {'Clinica': 1, 'Medico': 2, 'Paciente': 3, 'Consulta': 4}
+
+
+def slots_ocupados(indice_dia, data_hora):
+    """Slots da grade que uma consulta já gravada em `data_hora` sobrepõe."""
+    dia = indice_dia.get(data_hora.date())
+    if dia is None:
+        return []
+    minutos = (data_hora.hour - INICIO_EXPEDIENTE) * 60 + data_hora.minute + data_hora.second / 60
+    primeiro, resto = divmod(minutos, 30)
+    horarios = [int(primeiro)] if resto == 0 else [int(primeiro), int(primeiro) + 1]
+    return [dia * HORARIOS_POR_DIA + h for h in horarios if 0 <= h < HORARIOS_POR_DIA]
+
+
+# --- Processos de carga ---
+_cfg = None
+_conn = None
+_clinicas_existentes = None  # lidas uma vez por processo
+
+
+def _buscar_chaves(cursor, sql, params=()):
+    cursor.execute(sql, params)
+    return [r[0] for r in cursor.fetchall()]
+
+
+def chaves_existentes(cfg, inicio, fim, rnd):
+    """
+    Chaves já gravadas que a tarefa [inicio, fim) de Consulta usa, lidas pela
+    conexão do processo (cfg['existentes'] só guarda contagens e limites):
+    - medico: os médicos de índice [inicio, fim) na ordem de CodMed
+    - ocupados: CodMed -> slots da grade em que esses médicos já têm consulta,
+      por range em idx_consulta_medico
+    - clinica: todas as clínicas, uma vez por processo (são poucas)
+    - paciente: até JANELA_PACIENTES CPFs seguidos a partir de um CPF sorteado
+      entre o menor e o maior, por range na PK
+    """
+    global _clinicas_existentes
+    existentes = cfg['existentes']
+    chaves = {}
+    cursor = _conn.cursor()
+    try:
+        if 'medico' in existentes:
+            chaves['medico'] = _buscar_chaves(
+                cursor, "SELECT CodMed FROM Medico ORDER BY CodMed LIMIT %s OFFSET %s", (fim - inicio, inicio))
+            chaves['ocupados'] = {}
+            if chaves['medico']:
+                dias = cfg['dias_grade']
+                indice_dia = {d: i for i, d in enumerate(dias)}
+                cursor.execute(
+                    "SELECT CodMed, Data_Hora FROM Consulta "
+                    "WHERE CodMed BETWEEN %s AND %s AND Data_Hora >= %s AND Data_Hora < %s",
+                    (chaves['medico'][0], chaves['medico'][-1],
+                     datetime.combine(dias[0], datetime.min.time()),
+                     datetime.combine(dias[-1] + timedelta(days=1), datetime.min.time())))
+                for codmed, data_hora in cursor.fetchall():
+                    chaves['ocupados'].setdefault(codmed, set()).update(
+                        slots_ocupados(indice_dia, data_hora))
+        if 'clinica' in existentes:
+            if _clinicas_existentes is None:
+                _clinicas_existentes = _buscar_chaves(cursor, "SELECT CodCli FROM Clinica ORDER BY CodCli")
+            chaves['clinica'] = _clinicas_existentes
+        if 'paciente' in existentes:
+            menor, maior = existentes['paciente']
+            partida = formatar_cpf(rnd.randint(menor, maior))
+            janela = _buscar_chaves(
+                cursor, "SELECT CpfPaciente FROM Paciente WHERE CpfPaciente >= %s ORDER BY CpfPaciente LIMIT %s",
+                (partida, JANELA_PACIENTES))
+            if len(janela) < JANELA_PACIENTES:
+                janela += _buscar_chaves(
+                    cursor, "SELECT CpfPaciente FROM Paciente WHERE CpfPaciente < %s ORDER BY CpfPaciente LIMIT %s",
+                    (partida, JANELA_PACIENTES - len(janela)))
+            chaves['paciente'] = janela
+    finally:
+        cursor.close()
+    # a leitura abriu um snapshot (autocommit=False); os INSERTs seguem em outra transação
+    _conn.rollback()
+    return chaves
+
+
+def _iniciar_processo(cfg):
+    global _cfg, _conn
+    _cfg = cfg
+    _conn = mysql.connector.connect(autocommit=False, **cfg['conexao'])
+
+
+def _inserir(cursor, tabela, linhas, lote):
+    n_colunas = len(linhas[0])
+    placeholders = "(" + ", ".join(["%s"] * n_colunas) + ")"
+    for i in range(0, len(linhas), lote):
+        parte = linhas[i:i + lote]
+        params = [v for linha in parte for v in linha]
+        cursor.execute(SQL_INSERT[tabela] + ", ".join([placeholders] * len(parte)), params)
+        _conn.commit()
+
+
+def _executar_tarefa(tarefa):
+    """Gera e grava os registros [inicio, fim) de uma tabela; retorna o nº de linhas."""
+    tabela, inicio, fim = tarefa
+    rnd = random.Random(f"{_cfg['semente']}:{_cfg['rodada']}:{_IDS_TABELA[tabela]}:{inicio}")
+    if tabela == 'Consulta' and _cfg['existentes']:
+        linhas = gerar_consultas(_cfg, inicio, fim, rnd, chaves_existentes(_cfg, inicio, fim, rnd))
+    else:
+        linhas = GERADORES[tabela](_cfg, inicio, fim, rnd)
+    if not linhas:
+        return 0
+    cursor = _conn.cursor()
+    try:
+        _inserir(cursor, tabela, linhas, _cfg['lote'])
+    except Exception:
+        _conn.rollback()
+        raise
+    finally:
+        cursor.close()
+    return len(linhas)
+
+
+def tarefas(tabela, total, tamanho):
+    return [(tabela, i, min(i + tamanho, total)) for i in range(0, total, tamanho)]
+
+
+def carregar_tabela(cfg, tabela, total_unidades, tamanho_tarefa, total_linhas, processos):
+    if total_unidades <= 0 or total_linhas <= 0:
+        return
+    inicio = time.perf_counter()
+    gravadas = 0
+    with multiprocessing.Pool(processos, initializer=_iniciar_processo, initargs=(cfg,)) as pool:
+        for n in pool.imap_unordered(_executar_tarefa, tarefas(tabela, total_unidades, tamanho_tarefa)):
+            gravadas += n
+            decorrido = time.perf_counter() - inicio
+            print(f"\r{tabela}: {gravadas:,}/{total_linhas:,} linhas ({gravadas / decorrido:,.0f}/s)",
+                  end='', flush=True)
+    print()
+
+
+# --- Preparação ---
+def _maior(cursor, sql):
+    cursor.execute(sql)
+    valor = cursor.fetchone()[0]
+    return valor
+
+
+def proximo_codigo(cursor, tabela, coluna):
+    """Próximo código numérico de 7 dígitos depois do maior existente."""
+    maior = _maior(cursor, f"SELECT MAX({coluna}) FROM {tabela}")
+    if maior is None:
+        return 1
+    if not maior.isdigit():
+        raise SystemExit(f"{tabela}.{coluna} tem códigos não numéricos ({maior}); use uma base vazia.")
+    return int(maior) + 1
+
+
+def proximo_corpo_cpf(cursor):
+    maior = _maior(cursor, "SELECT MAX(CpfPaciente) FROM Paciente")
+    return corpo_cpf(maior) + 1 if maior else 1
+
+
+def prazo_agendamento(cursor):
+    try:
+        prazo = _maior(cursor, "SELECT PrazoMaximoDias FROM PoliticaAgendamento WHERE Id = 1")
+    except mysql.connector.Error:
+        prazo = None
+    return prazo if prazo is not None else 60
+
+
+def remover_triggers_resumo(cursor):
+    """
+    Remove os triggers de resumo/ranking e retorna [(sql_mode, CREATE TRIGGER)]
+    na ordem em que devem ser recriados (mantém a ordem de execução de cada evento).
+    """
+    filtro = " OR ".join(["TRIGGER_NAME LIKE %s"] * len(PADROES_TRIGGERS_RESUMO))
+    nomes = _buscar_chaves(
+        cursor,
+        "SELECT TRIGGER_NAME FROM information_schema.TRIGGERS "
+        f"WHERE TRIGGER_SCHEMA = DATABASE() AND ({filtro}) "
+        "ORDER BY EVENT_OBJECT_TABLE, ACTION_TIMING, EVENT_MANIPULATION, ACTION_ORDER",
+        PADROES_TRIGGERS_RESUMO)
+    salvos = []
+    for nome in nomes:
+        cursor.execute(f"SHOW CREATE TRIGGER `{nome}`")
+        linha = cursor.fetchone()
+        # (Trigger, sql_mode, SQL Original Statement, ...); o DEFINER sai para recriar com o usuário atual
+        salvos.append((linha[1], re.sub(r"\bDEFINER\s*=\s*\S+\s+", "", linha[2], count=1)))
+    for nome in nomes:
+        cursor.execute(f"DROP TRIGGER `{nome}`")
+    return salvos
+
+
+def recriar_triggers_resumo(cursor, salvos):
+    for sql_mode, sql in salvos:
+        cursor.execute("SET SESSION sql_mode = %s", (sql_mode,))
+        cursor.execute(sql)
+
+
+def dias_da_grade(hoje, dias_historico, dias_futuro):
+    """Dias úteis de hoje - dias_historico até hoje + dias_futuro."""
+    dia = hoje - timedelta(days=dias_historico)
+    fim = hoje + timedelta(days=dias_futuro)
+    dias = []
+    while dia <= fim:
+        if dia.weekday() < 5:
+            dias.append(dia)
+        dia += timedelta(days=1)
+    return dias
+
+
+def conferir_formatos(cfg):
+    """Passa uma amostra de cada tabela pelos mesmos validadores de db.py."""
+    validador = MySQLDB()
+    rnd = random.Random(cfg['semente'])
+    amostras = []
+    if cfg['clinicas']:
+        clinicas = gerar_clinicas(cfg, 0, min(cfg['clinicas'], 200), rnd)
+        amostras.append(validador.validar_colunas(telefone=[c[3] for c in clinicas],
+                                                  email=[c[4] for c in clinicas], telefone_clinica=True))
+    if cfg['medicos']:
+        medicos = gerar_medicos(cfg, 0, min(cfg['medicos'], 200), rnd)
+        amostras.append(validador.validar_colunas(telefone=[m[3] for m in medicos], email=[m[4] for m in medicos]))
+    if cfg['pacientes']:
+        pacientes = gerar_pacientes(cfg, 0, min(cfg['pacientes'], 1000), rnd)
+        amostras.append(validador.validar_colunas(
+            cpf=[p[0] for p in pacientes], telefone=[p[4] for p in pacientes],
+            email=[p[5] for p in pacientes], verificar_digitos_cpf=True))
+    for resultado in amostras:
+        if any(resultado['invalido']):
+            raise SystemExit(f"Gerador produziu registros inválidos: {resultado}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Gera dados sintéticos em escala para testes de carga.")
+    parser.add_argument('--host', default=os.getenv('DB_HOST', 'localhost'))
+    parser.add_argument('--port', type=int, default=int(os.getenv('DB_PORT', 3306)))
+    parser.add_argument('--user', default=os.getenv('DB_USER', 'root'))
+    parser.add_argument('--password', default=os.getenv('DB_PASSWORD', ''))
+    parser.add_argument('--database', default=os.getenv('DB_NAME', 'consultas_medicas'))
+    parser.add_argument('--clinicas', type=int, default=100)
+    parser.add_argument('--medicos', type=int, default=1000)
+    parser.add_argument('--pacientes', type=int, default=50000)
+    parser.add_argument('--consultas', type=int, default=500000)
+    parser.add_argument('--dias-historico', type=int, default=365,
+                        help="Consultas começam até esse nº de dias atrás (aumentado se a grade não couber).")
+    parser.add_argument('--lote', type=int, default=2000, help="Linhas por INSERT/COMMIT.")
+    parser.add_argument('--processos', type=int, default=max(1, min(8, os.cpu_count() or 1)))
+    parser.add_argument('--semente', type=int, default=42)
+    parser.add_argument('--carga-em-massa', action='store_true',
+                        help="Remove os triggers de resumo/ranking durante a carga e reconcilia no fim "
+                             "(requer privilégio TRIGGER).")
+    args = parser.parse_args()
+
+    if min(args.clinicas, args.medicos, args.pacientes, args.consultas, args.dias_historico) < 0 or args.lote < 1:
+        parser.error("Quantidades devem ser >= 0 e --lote >= 1.")
+
+    conexao = dict(host=args.host, port=args.port, user=args.user,
+                   password=args.password, database=args.database)
+    try:
+        conn = mysql.connector.connect(**conexao)
+    except mysql.connector.Error as e:
+        print(f"Falha ao conectar ao MySQL: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    hoje = date.today()
+    cursor = conn.cursor()
+    try:
+        cfg = {
+            'conexao': conexao,
+            'semente': args.semente,
+            'lote': args.lote,
+            'hoje': hoje,
+            'clinicas': args.clinicas,
+            'medicos': args.medicos,
+            'pacientes': args.pacientes,
+            'consultas': args.consultas,
+            'base_clinica': proximo_codigo(cursor, 'Clinica', 'CodCli'),
+            'base_medico': proximo_codigo(cursor, 'Medico', 'CodMed'),
+            'base_cpf': proximo_corpo_cpf(cursor),
+            'existentes': {},
+        }
+        # muda depois de uma execução que acrescentou clínicas, médicos ou pacientes, então a
+        # mesma semente não repete os sorteios dela; com --medicos 0, consultas novas
+        # também não repetem horários porque os já ocupados ficam de fora (chaves_existentes)
+        cfg['rodada'] = f"{cfg['base_clinica']}:{cfg['base_medico']}:{cfg['base_cpf']}"
+        if cfg['base_clinica'] + args.clinicas > 10 ** 7 or cfg['base_medico'] + args.medicos > 10 ** 7:
+            raise SystemExit("Códigos de 7 dígitos esgotados a partir do maior código existente.")
+        if cfg['base_cpf'] + args.pacientes > 10 ** 9:
+            raise SystemExit("CPFs esgotados a partir do maior CPF existente.")
+
+        if args.consultas:
+            # consultas usam os registros gerados agora ou, se uma quantidade for 0, os já
+            # existentes; só contagens e limites vão para os processos (ver chaves_existentes)
+            for tipo, quantidade, tabela, coluna in (
+                ('clinica', args.clinicas, 'Clinica', 'CodCli'),
+                ('medico', args.medicos, 'Medico', 'CodMed'),
+                ('paciente', args.pacientes, 'Paciente', 'CpfPaciente'),
+            ):
+                if quantidade == 0:
+                    cursor.execute(f"SELECT COUNT(*), MIN({coluna}), MAX({coluna}) FROM {tabela}")
+                    total, menor, maior = cursor.fetchone()
+                    if not total:
+                        raise SystemExit(f"Sem registros de {tipo} para as consultas.")
+                    cfg[f'n_{tipo}s'] = total
+                    cfg['existentes'][tipo] = (corpo_cpf(menor), corpo_cpf(maior)) if tipo == 'paciente' else total
+            cfg['n_clinicas'] = args.clinicas or cfg['n_clinicas']
+            cfg['n_medicos'] = args.medicos or cfg['n_medicos']
+            cfg['n_pacientes'] = args.pacientes or cfg['n_pacientes']
+
+            # grade até o prazo dos triggers (1 dia de folga para o fuso do servidor)
+            dias_futuro = max(prazo_agendamento(cursor) - 1, 0)
+            por_medico = math.ceil(args.consultas / cfg['n_medicos'])
+            dias_uteis = math.ceil(por_medico / (HORARIOS_POR_DIA * OCUPACAO_MAXIMA))
+            historico = max(args.dias_historico, math.ceil(dias_uteis * 7 / 5) - dias_futuro + 7)
+            cfg['dias_grade'] = dias_da_grade(hoje, historico, dias_futuro)
+            if len(cfg['dias_grade']) * HORARIOS_POR_DIA < por_medico:
+                raise SystemExit("A grade de horários não comporta as consultas por médico.")
+    except BaseException:
+        conn.close()
+        raise
+    finally:
+        cursor.close()
+
+    conferir_formatos(cfg)
+    print(f"Clínicas a partir de {cfg['base_clinica']:07d}, médicos de {cfg['base_medico']:07d}, "
+          f"CPFs de {formatar_cpf(cfg['base_cpf'])}; {args.processos} processo(s), lotes de {args.lote}.")
+
+    inicio = time.perf_counter()
+    tarefa = args.lote * 10
+    cursor = conn.cursor()
+    triggers = []
+    try:
+        if args.carga_em_massa:
+            triggers = remover_triggers_resumo(cursor)
+            print(f"Carga em massa: {len(triggers)} triggers de resumo removidos até o fim da carga.")
+        carregar_tabela(cfg, 'Clinica', args.clinicas, tarefa, args.clinicas, args.processos)
+        carregar_tabela(cfg, 'Medico', args.medicos, tarefa, args.medicos, args.processos)
+        carregar_tabela(cfg, 'Paciente', args.pacientes, tarefa, args.pacientes, args.processos)
+        if args.consultas:
+            # tarefas por faixa de médicos, cada uma com ~10 lotes de consultas
+            medicos_por_tarefa = max(1, tarefa // math.ceil(args.consultas / cfg['n_medicos']))
+            carregar_tabela(cfg, 'Consulta', cfg['n_medicos'], medicos_por_tarefa, args.consultas, args.processos)
+    finally:
+        # mesmo após uma falha: sem os triggers os resumos deixariam de ser mantidos
+        if triggers:
+            recriar_triggers_resumo(cursor, triggers)
+            print("Triggers recriados; reconciliando resumos e rollups...")
+            cursor.execute("CALL sp_reconciliar_resumo()")
+            conn.commit()
+        cursor.close()
+        conn.close()
+    print(f"Concluído em {time.perf_counter() - inicio:,.1f} s.")
+
+
+if __name__ == '__main__':
+    main()
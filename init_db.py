@@ -1,11 +1,14 @@
 import mysql.connector
 import argparse
+import re
 import sys
 import os
 from dotenv import load_dotenv
 
 load_dotenv()
 
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'migrations')
+
 
 def execute_sql_file(conn, path):
     cur = conn.cursor()
@@ -37,16 +40,56 @@ def execute_sql_file(conn, path):
     conn.commit()
 
 
+def listar_migracoes(diretorio):
+    """Retorna [(versao, descricao, caminho)] dos arquivos NNN_descricao.sql, em ordem."""
+    migracoes = []
+    if not os.path.isdir(diretorio):
+        return migracoes
+    for nome in os.listdir(diretorio):
+        m = re.match(r'^(\d+)_(\w+)\.sql$', nome)
+        if m:
+            migracoes.append((int(m.group(1)), m.group(2), os.path.join(diretorio, nome)))
+    return sorted(migracoes)
+
+
+def aplicar_migracoes(conn, diretorio=MIGRATIONS_DIR):
+    """
+    Aplica as migrações ainda não registradas em VersaoSchema.
+    DDL faz commit implícito no MySQL: uma migração que falhe no meio
+    precisa ser corrigida manualmente antes de rodar de novo.
+    """
+    cur = conn.cursor()
+    cur.execute(
+        "CREATE TABLE IF NOT EXISTS VersaoSchema ("
+        "Versao INT NOT NULL PRIMARY KEY, "
+        "Descricao VARCHAR(100) NOT NULL, "
+        "AplicadaEm DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP)"
+    )
+    cur.execute("SELECT Versao FROM VersaoSchema")
+    aplicadas = {row[0] for row in cur.fetchall()}
+    pendentes = [m for m in listar_migracoes(diretorio) if m[0] not in aplicadas]
+    for versao, descricao, caminho in pendentes:
+        print(f"Aplicando migração {versao:03d} ({descricao})...")
+        execute_sql_file(conn, caminho)
+        cur.execute("INSERT INTO VersaoSchema (Versao, Descricao) VALUES (%s, %s)", (versao, descricao))
+        conn.commit()
+    cur.close()
+    return [m[0] for m in pendentes]
+
+
 def main():
     parser = argparse.ArgumentParser(description="Importa um .sql no MySQL (tratamento de DELIMITER).")
     parser.add_argument('--host', default=os.getenv('DB_HOST', 'localhost'))
     parser.add_argument('--port', type=int, default=int(os.getenv('DB_PORT', 3306)))
     parser.add_argument('--user', default=os.getenv('DB_USER', 'root'))
     parser.add_argument('--password', default=os.getenv('DB_PASSWORD', ''))
+    parser.add_argument('--database', default=os.getenv('DB_NAME', 'consultas_medicas'))
     parser.add_argument('--file', default='consultas_medicas.sql')
+    parser.add_argument('--somente-migracoes', action='store_true',
+                        help="Não recria o schema; apenas aplica migrações pendentes em um banco existente.")
     args = parser.parse_args()
 
-    if not os.path.exists(args.file):
+    if not args.somente_migracoes and not os.path.exists(args.file):
         print(f"Arquivo não encontrado: {args.file}", file=sys.stderr)
         sys.exit(2)
 
@@ -63,9 +106,16 @@ def main():
         sys.exit(1)
 
     try:
-        print("Iniciando importação...", args.file)
-        execute_sql_file(conn, args.file)
-        print("Importação concluída com sucesso.")
+        if not args.somente_migracoes:
+            print("Iniciando importação...", args.file)
+            execute_sql_file(conn, args.file)
+            print("Importação concluída com sucesso.")
+        conn.database = args.database
+        aplicadas = aplicar_migracoes(conn)
+        if aplicadas:
+            print(f"Migrações aplicadas: {', '.join(f'{v:03d}' for v in aplicadas)}")
+        else:
+            print("Schema já está na versão mais recente.")
     except Exception as e:
         print("Erro durante importação:", e, file=sys.stderr)
         sys.exit(3)
@@ -0,0 +1,258 @@
+"""
+Métricas no formato texto do Prometheus, sem dependências externas.
+- Registro: contadores e histogramas com labels, mais coletores chamados a
+  cada leitura (estado do pool, cache e métricas do MySQLDB)
+- coletar_mysqldb: converte metrics(), pool_stats(), cache_stats()... de um
+  MySQLDB em famílias do Prometheus, sem medir nada de novo no caminho quente
+- servir_http: expõe /metrics num servidor HTTP local, em thread daemon
+- gravar_arquivo/gravar_periodicamente: dump atômico do texto, para o
+  textfile collector do node_exporter
+"""
+
+import bisect
+import contextlib
+import os
+import threading
+import time
+from collections import namedtuple
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# amostras: [(sufixo, {label: valor}, valor), ...]; sufixo '' , '_bucket', '_sum'...
+Familia = namedtuple('Familia', 'nome tipo ajuda amostras')
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def _escapar(valor):
+    return str(valor).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _numero(valor):
+    if valor == float('inf'):
+        return '+Inf'
+    if isinstance(valor, float) and valor.is_integer():
+        return str(int(valor))
+    return repr(valor) if isinstance(valor, float) else str(valor)
+
+
+def formatar(familias):
+    """Texto de exposição do Prometheus (versão 0.0.4) para uma lista de Familia."""
+    linhas = []
+    for familia in familias:
+        if not familia.amostras:
+            continue
+        linhas.append(f"# HELP {familia.nome} {_escapar(familia.ajuda)}")
+        linhas.append(f"# TYPE {familia.nome} {familia.tipo}")
+        for sufixo, labels, valor in familia.amostras:
+            if labels:
+                corpo = ','.join(f'{k}="{_escapar(v)}"' for k, v in labels.items())
+                linhas.append(f"{familia.nome}{sufixo}{{{corpo}}} {_numero(valor)}")
+            else:
+                linhas.append(f"{familia.nome}{sufixo} {_numero(valor)}")
+    return '\n'.join(linhas) + '\n'
+
+
+def amostras_histograma(labels, limites, contagens, soma):
+    """
+    Amostras _bucket/_sum/_count de um histograma a partir de contagens não
+    acumuladas (uma por limite, mais a última acima do maior limite).
+    """
+    amostras = []
+    acumulado = 0
+    for limite, n in zip(list(limites) + [float('inf')], contagens):
+        acumulado += n
+        amostras.append(('_bucket', {**labels, 'le': _numero(float(limite))}, acumulado))
+    amostras.append(('_sum', dict(labels), round(soma, 6)))
+    amostras.append(('_count', dict(labels), acumulado))
+    return amostras
+
+
+class Registro:
+    """
+    Contadores e histogramas com labels, seguros entre threads.
+    Coletores (`adicionar_coletor`) são funções sem argumentos que retornam
+    uma lista de Familia; rodam a cada `texto()`, para valores que já são
+    mantidos em outro lugar (pool, cache).
+    """
+
+    BUCKETS_SEGUNDOS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._familias = {}  # nome -> (tipo, ajuda, buckets, {labels: valor ou [contagens, soma]})
+        self._coletores = []
+
+    def _serie(self, nome, tipo, ajuda, buckets, labels):
+        familia = self._familias.get(nome)
+        if familia is None:
+            familia = self._familias[nome] = (tipo, ajuda, buckets, {})
+        chave = tuple(sorted(labels.items()))
+        return familia[3], chave
+
+    def contador(self, nome, ajuda, valor=1, **labels):
+        with self._lock:
+            series, chave = self._serie(nome, 'counter', ajuda, None, labels)
+            series[chave] = series.get(chave, 0) + valor
+
+    def histograma(self, nome, ajuda, valor, buckets=None, **labels):
+        buckets = buckets or self.BUCKETS_SEGUNDOS
+        with self._lock:
+            series, chave = self._serie(nome, 'histogram', ajuda, buckets, labels)
+            estado = series.get(chave)
+            if estado is None:
+                estado = series[chave] = [[0] * (len(buckets) + 1), 0.0]
+            estado[0][bisect.bisect_left(buckets, valor)] += 1
+            estado[1] += valor
+
+    @contextlib.contextmanager
+    def cronometro(self, nome, ajuda, **labels):
+        """
+        Mede o bloco no histograma `nome` (segundos). Exceções comuns também
+        contam em `nome` com sufixo _erros_total; as de controle de fluxo
+        (BaseException, como o rerun do Streamlit) só entram na duração.
+        """
+        inicio = time.perf_counter()
+        try:
+            yield
+        except Exception:
+            self.contador(nome.replace('_seconds', '') + '_erros_total', f"Erros em: {ajuda}", **labels)
+            raise
+        finally:
+            self.histograma(nome, ajuda, time.perf_counter() - inicio, **labels)
+
+    def adicionar_coletor(self, coletor):
+        with self._lock:
+            self._coletores.append(coletor)
+
+    def familias(self):
+        with self._lock:
+            proprias = []
+            for nome, (tipo, ajuda, buckets, series) in sorted(self._familias.items()):
+                amostras = []
+                for chave, valor in series.items():
+                    labels = dict(chave)
+                    if tipo == 'histogram':
+                        amostras.extend(amostras_histograma(labels, buckets, valor[0], valor[1]))
+                    else:
+                        amostras.append(('', labels, valor))
+                proprias.append(Familia(nome, tipo, ajuda, amostras))
+            coletores = list(self._coletores)
+        for coletor in coletores:
+            try:
+                proprias.extend(coletor())
+            except Exception as e:
+                proprias.append(Familia('metricas_coletor_erro', 'gauge', f"Coletor falhou: {e}",
+                                        [('', {'coletor': getattr(coletor, '__name__', '?')}, 1)]))
+        return proprias
+
+    def texto(self):
+        return formatar(self.familias())
+
+
+def coletar_mysqldb(db, prefixo='consultas_db'):
+    """Famílias do Prometheus com as estatísticas que um MySQLDB já mantém."""
+    familias = []
+    metricas = db.metrics()
+    limites_s = [b / 1000 for b in metricas.get('buckets_ms', ())]
+
+    for grupo, nome, ajuda in (
+        ('metodos', 'consulta', "Consultas de _execute por método público"),
+        ('operacoes', 'operacao', "Chamadas dos métodos create/update/delete"),
+    ):
+        por_metodo = metricas.get(grupo, {})
+        duracao, erros, linhas = [], [], []
+        for metodo, m in sorted(por_metodo.items()):
+            labels = {'metodo': metodo}
+            duracao.extend(amostras_histograma(labels, limites_s, list(m['histograma'].values()),
+                                               m['total_ms'] / 1000))
+            erros.append(('', labels, m['erros']))
+            linhas.append(('', labels, m['linhas']))
+        familias.append(Familia(f'{prefixo}_{nome}_duracao_seconds', 'histogram', f"{ajuda}: duração", duracao))
+        familias.append(Familia(f'{prefixo}_{nome}_erros_total', 'counter', f"{ajuda}: erros", erros))
+        if grupo == 'metodos':
+            familias.append(Familia(f'{prefixo}_{nome}_linhas_total', 'counter', f"{ajuda}: linhas retornadas", linhas))
+
+    pool = db.pool_stats()
+    if pool:
+        familias += [
+            Familia(f'{prefixo}_pool_tamanho', 'gauge', "Máximo de conexões do pool", [('', {}, pool['size'])]),
+            Familia(f'{prefixo}_pool_conexoes', 'gauge', "Conexões do pool por estado",
+                    [('', {'estado': 'em_uso'}, pool['in_use']), ('', {'estado': 'ociosa'}, pool['idle'])]),
+            Familia(f'{prefixo}_pool_checkouts_total', 'counter', "Conexões retiradas do pool", [('', {}, pool['checkouts'])]),
+            Familia(f'{prefixo}_pool_timeouts_total', 'counter', "Esperas por conexão que estouraram o timeout", [('', {}, pool['timeouts'])]),
+            Familia(f'{prefixo}_pool_descartes_total', 'counter', "Conexões descartadas", [('', {}, pool['discarded'])]),
+            Familia(f'{prefixo}_pool_espera_seconds_total', 'counter', "Tempo total de espera por conexão", [('', {}, pool['wait_time_total'])]),
+        ]
+
+    cache = db.cache_stats()
+    familias += [
+        Familia(f'{prefixo}_cache_entradas', 'gauge', "Resultados no cache de leituras", [('', {}, cache['size'])]),
+        Familia(f'{prefixo}_cache_hit_ratio', 'gauge', "Taxa de acerto acumulada do cache", [('', {}, cache['hit_rate'])]),
+    ]
+    for chave, nome in (('hits', 'hits'), ('misses', 'misses'), ('evictions', 'despejos'),
+                        ('expirations', 'expiracoes'), ('invalidations', 'invalidacoes')):
+        familias.append(Familia(f'{prefixo}_cache_{nome}_total', 'counter', f"Cache de leituras: {nome}",
+                                [('', {}, cache[chave])]))
+
+    liveness = db.liveness_stats()
+    for chave, nome in (('pings', 'pings'), ('pings_avoided', 'pings_evitados'),
+                        ('dead_connections', 'conexoes_mortas'), ('read_retries', 'leituras_repetidas')):
+        familias.append(Familia(f'{prefixo}_{nome}_total', 'counter', f"Verificação de conexão: {nome}",
+                                [('', {}, liveness[chave])]))
+
+    preparados = db.prepared_stats()
+    if preparados:
+        familias += [
+            Familia(f'{prefixo}_prepared_prepares_total', 'counter', "Statements preparados no servidor", [('', {}, preparados['prepares'])]),
+            Familia(f'{prefixo}_prepared_reusos_total', 'counter', "Reexecuções de statements preparados", [('', {}, preparados['reusos'])]),
+        ]
+    return familias
+
+
+class _Handler(BaseHTTPRequestHandler):
+    registro = None
+
+    def do_GET(self):
+        if self.path.split('?', 1)[0] != '/metrics':
+            self.send_error(404)
+            return
+        corpo = self.registro.texto().encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', CONTENT_TYPE)
+        self.send_header('Content-Length', str(len(corpo)))
+        self.end_headers()
+        self.wfile.write(corpo)
+
+    def log_message(self, *args):
+        pass
+
+
+def servir_http(registro, porta, host='127.0.0.1'):
+    """Serve GET /metrics numa thread daemon; retorna o servidor (use .shutdown() para parar)."""
+    handler = type('Handler', (_Handler,), {'registro': registro})
+    servidor = ThreadingHTTPServer((host, porta), handler)
+    servidor.daemon_threads = True
+    threading.Thread(target=servidor.serve_forever, name='metricas-http', daemon=True).start()
+    return servidor
+
+
+def gravar_arquivo(registro, caminho):
+    """Grava o texto em `caminho` de forma atômica (arquivo temporário + rename)."""
+    temporario = f"{caminho}.{os.getpid()}.tmp"
+    with open(temporario, 'w', encoding='utf-8') as f:
+        f.write(registro.texto())
+    os.replace(temporario, caminho)
+
+
+def gravar_periodicamente(registro, caminho, intervalo=15.0):
+    """Regrava `caminho` a cada `intervalo` segundos numa thread daemon."""
+    def laco():
+        while True:
+            try:
+                gravar_arquivo(registro, caminho)
+            except OSError:
+                pass
+            time.sleep(intervalo)
+    thread = threading.Thread(target=laco, name='metricas-arquivo', daemon=True)
+    thread.start()
+    return thread
@@ -0,0 +1,28 @@
+-- Migração 001: índices secundários em Consulta.
+-- No InnoDB cada índice secundário carrega as colunas da PK, então todos
+-- cobrem (CodCli, CodMed, CpfPaciente, Data_Hora) sem acessar a tabela.
+--   idx_consulta_data_hora: get_consultas_proximas, get_consultas_por_periodo e keyset de get_pedidos_pagina
+--   idx_consulta_paciente:  get_historico_paciente (WHERE CpfPaciente ORDER BY Data_Hora)
+--   idx_consulta_medico:    filtro por médico em get_pedidos_pagina
+-- Bancos antigos podem já ter algum desses índices criado à mão; cada ADD INDEX
+-- só roda se o nome ainda não existir (senão o ALTER falharia com erro 1061).
+DELIMITER $$
+DROP PROCEDURE IF EXISTS sp_migracao_001_indice $$
+CREATE PROCEDURE sp_migracao_001_indice(IN p_nome VARCHAR(64), IN p_colunas VARCHAR(200))
+BEGIN
+    IF NOT EXISTS (
+        SELECT 1 FROM information_schema.STATISTICS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'Consulta' AND INDEX_NAME = p_nome
+    ) THEN
+        SET @ddl_migracao_001 = CONCAT('ALTER TABLE Consulta ADD INDEX ', p_nome, ' (', p_colunas, ')');
+        PREPARE stmt_migracao_001 FROM @ddl_migracao_001;
+        EXECUTE stmt_migracao_001;
+        DEALLOCATE PREPARE stmt_migracao_001;
+    END IF;
+END $$
+DELIMITER ;
+
+CALL sp_migracao_001_indice('idx_consulta_data_hora', 'Data_Hora');
+CALL sp_migracao_001_indice('idx_consulta_paciente', 'CpfPaciente, Data_Hora');
+CALL sp_migracao_001_indice('idx_consulta_medico', 'CodMed, Data_Hora');
+DROP PROCEDURE sp_migracao_001_indice;
@@ -0,0 +1,9 @@
+-- Migração 002: colunas geradas (STORED) e indexadas para os relatórios por mês e dia da semana.
+-- AnoMes = YYYYMM e DiaSemana = DAYOFWEEK (1 = domingo). Como os índices secundários
+-- carregam a PK, get_consultas_por_mes e get_taxa_ocupacao_por_dia_semana são
+-- respondidas só pelo índice, sem aplicar funções a Data_Hora linha a linha.
+ALTER TABLE Consulta
+    ADD COLUMN AnoMes INT AS (YEAR(Data_Hora) * 100 + MONTH(Data_Hora)) STORED NOT NULL,
+    ADD COLUMN DiaSemana TINYINT AS (DAYOFWEEK(Data_Hora)) STORED NOT NULL,
+    ADD INDEX idx_consulta_ano_mes (AnoMes),
+    ADD INDEX idx_consulta_dia_semana (DiaSemana);
@@ -0,0 +1,182 @@
+-- Migração 003: tabelas de resumo para get_resumo_geral_sistema.
+-- Mantidas por triggers em cada INSERT/UPDATE/DELETE, de modo que o painel
+-- lê contadores prontos em vez de contar as tabelas inteiras a cada acesso.
+-- sp_reconciliar_resumo() recalcula tudo a partir das tabelas base e corrige
+-- qualquer divergência; o evento ev_reconciliar_resumo a executa diariamente
+-- (requer event_scheduler=ON).
+
+CREATE TABLE ResumoSistema (
+    Id TINYINT NOT NULL PRIMARY KEY,
+    TotalPacientes BIGINT NOT NULL DEFAULT 0,
+    SomaAnoNascimento BIGINT NOT NULL DEFAULT 0,
+    TotalMedicos BIGINT NOT NULL DEFAULT 0,
+    TotalClinicas BIGINT NOT NULL DEFAULT 0,
+    TotalConsultas BIGINT NOT NULL DEFAULT 0,
+    ReconciliadoEm DATETIME NULL
+);
+
+INSERT INTO ResumoSistema (Id) VALUES (1);
+
+-- consultas por dia: consultas futuras/passadas sem varrer Consulta
+CREATE TABLE ResumoConsultaDia (
+    Dia DATE NOT NULL PRIMARY KEY,
+    Total BIGINT NOT NULL DEFAULT 0
+);
+
+-- médicos por especialidade: especialidades disponíveis sem COUNT(DISTINCT)
+CREATE TABLE ResumoEspecialidade (
+    Especialidade VARCHAR(30) NOT NULL PRIMARY KEY,
+    TotalMedicos BIGINT NOT NULL DEFAULT 0
+);
+
+DELIMITER $$
+CREATE TRIGGER tg_resumo_paciente_ins
+AFTER INSERT ON Paciente
+FOR EACH ROW
+BEGIN
+    UPDATE ResumoSistema
+    SET TotalPacientes = TotalPacientes + 1,
+        SomaAnoNascimento = SomaAnoNascimento + YEAR(NEW.DataNascimento)
+    WHERE Id = 1;
+END $$
+
+CREATE TRIGGER tg_resumo_paciente_upd
+AFTER UPDATE ON Paciente
+FOR EACH ROW
+BEGIN
+    IF NEW.DataNascimento <> OLD.DataNascimento THEN
+        UPDATE ResumoSistema
+        SET SomaAnoNascimento = SomaAnoNascimento + YEAR(NEW.DataNascimento) - YEAR(OLD.DataNascimento)
+        WHERE Id = 1;
+    END IF;
+END $$
+
+CREATE TRIGGER tg_resumo_paciente_del
+AFTER DELETE ON Paciente
+FOR EACH ROW
+BEGIN
+    UPDATE ResumoSistema
+    SET TotalPacientes = TotalPacientes - 1,
+        SomaAnoNascimento = SomaAnoNascimento - YEAR(OLD.DataNascimento)
+    WHERE Id = 1;
+END $$
+
+CREATE TRIGGER tg_resumo_medico_ins
+AFTER INSERT ON Medico
+FOR EACH ROW
+BEGIN
+    UPDATE ResumoSistema SET TotalMedicos = TotalMedicos + 1 WHERE Id = 1;
+    IF NEW.Especialidade <> '' THEN
+        INSERT INTO ResumoEspecialidade (Especialidade, TotalMedicos) VALUES (NEW.Especialidade, 1)
+        ON DUPLICATE KEY UPDATE TotalMedicos = TotalMedicos + 1;
+    END IF;
+END $$
+
+CREATE TRIGGER tg_resumo_medico_upd
+AFTER UPDATE ON Medico
+FOR EACH ROW
+BEGIN
+    IF NEW.Especialidade <> OLD.Especialidade THEN
+        IF OLD.Especialidade <> '' THEN
+            UPDATE ResumoEspecialidade SET TotalMedicos = TotalMedicos - 1
+            WHERE Especialidade = OLD.Especialidade;
+        END IF;
+        IF NEW.Especialidade <> '' THEN
+            INSERT INTO ResumoEspecialidade (Especialidade, TotalMedicos) VALUES (NEW.Especialidade, 1)
+            ON DUPLICATE KEY UPDATE TotalMedicos = TotalMedicos + 1;
+        END IF;
+    END IF;
+END $$
+
+CREATE TRIGGER tg_resumo_medico_del
+AFTER DELETE ON Medico
+FOR EACH ROW
+BEGIN
+    UPDATE ResumoSistema SET TotalMedicos = TotalMedicos - 1 WHERE Id = 1;
+    IF OLD.Especialidade <> '' THEN
+        UPDATE ResumoEspecialidade SET TotalMedicos = TotalMedicos - 1
+        WHERE Especialidade = OLD.Especialidade;
+    END IF;
+END $$
+
+CREATE TRIGGER tg_resumo_clinica_ins
+AFTER INSERT ON Clinica
+FOR EACH ROW
+BEGIN
+    UPDATE ResumoSistema SET TotalClinicas = TotalClinicas + 1 WHERE Id = 1;
+END $$
+
+-- O ON DELETE CASCADE de Consulta não dispara triggers; por isso as consultas
+-- da clínica são descontadas aqui, enquanto ainda existem (BEFORE DELETE).
+CREATE TRIGGER tg_resumo_clinica_del
+BEFORE DELETE ON Clinica
+FOR EACH ROW
+BEGIN
+    UPDATE ResumoConsultaDia d
+    JOIN (
+        SELECT DATE(Data_Hora) AS Dia, COUNT(*) AS Total
+        FROM Consulta
+        WHERE CodCli = OLD.CodCli
+        GROUP BY DATE(Data_Hora)
+    ) x ON x.Dia = d.Dia
+    SET d.Total = d.Total - x.Total;
+    UPDATE ResumoSistema
+    SET TotalClinicas = TotalClinicas - 1,
+        TotalConsultas = TotalConsultas - (SELECT COUNT(*) FROM Consulta WHERE CodCli = OLD.CodCli)
+    WHERE Id = 1;
+END $$
+
+CREATE TRIGGER tg_resumo_consulta_ins
+AFTER INSERT ON Consulta
+FOR EACH ROW
+BEGIN
+    UPDATE ResumoSistema SET TotalConsultas = TotalConsultas + 1 WHERE Id = 1;
+    INSERT INTO ResumoConsultaDia (Dia, Total) VALUES (DATE(NEW.Data_Hora), 1)
+    ON DUPLICATE KEY UPDATE Total = Total + 1;
+END $$
+
+CREATE TRIGGER tg_resumo_consulta_upd
+AFTER UPDATE ON Consulta
+FOR EACH ROW
+BEGIN
+    IF DATE(NEW.Data_Hora) <> DATE(OLD.Data_Hora) THEN
+        UPDATE ResumoConsultaDia SET Total = Total - 1 WHERE Dia = DATE(OLD.Data_Hora);
+        INSERT INTO ResumoConsultaDia (Dia, Total) VALUES (DATE(NEW.Data_Hora), 1)
+        ON DUPLICATE KEY UPDATE Total = Total + 1;
+    END IF;
+END $$
+
+CREATE TRIGGER tg_resumo_consulta_del
+AFTER DELETE ON Consulta
+FOR EACH ROW
+BEGIN
+    UPDATE ResumoSistema SET TotalConsultas = TotalConsultas - 1 WHERE Id = 1;
+    UPDATE ResumoConsultaDia SET Total = Total - 1 WHERE Dia = DATE(OLD.Data_Hora);
+END $$
+
+CREATE PROCEDURE sp_reconciliar_resumo()
+BEGIN
+    UPDATE ResumoSistema SET
+        TotalPacientes = (SELECT COUNT(*) FROM Paciente),
+        SomaAnoNascimento = (SELECT COALESCE(SUM(YEAR(DataNascimento)), 0) FROM Paciente),
+        TotalMedicos = (SELECT COUNT(*) FROM Medico),
+        TotalClinicas = (SELECT COUNT(*) FROM Clinica),
+        TotalConsultas = (SELECT COUNT(*) FROM Consulta),
+        ReconciliadoEm = NOW()
+    WHERE Id = 1;
+
+    DELETE FROM ResumoConsultaDia;
+    INSERT INTO ResumoConsultaDia (Dia, Total)
+    SELECT DATE(Data_Hora), COUNT(*) FROM Consulta GROUP BY DATE(Data_Hora);
+
+    DELETE FROM ResumoEspecialidade;
+    INSERT INTO ResumoEspecialidade (Especialidade, TotalMedicos)
+    SELECT Especialidade, COUNT(*) FROM Medico WHERE Especialidade <> '' GROUP BY Especialidade;
+END $$
+DELIMITER ;
+
+CREATE EVENT ev_reconciliar_resumo
+ON SCHEDULE EVERY 1 DAY
+DO CALL sp_reconciliar_resumo();
+
+CALL sp_reconciliar_resumo();
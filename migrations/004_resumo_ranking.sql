@@ -0,0 +1,239 @@
+-- Migração 004: rollups materializados por médico e por especialidade.
+-- Substituem a reagregação de Consulta inteira em Vw_QtdeConsultasPorMedico,
+-- get_medicos_mais_atendimentos e get_especialidades_mais_procuradas.
+-- Pacientes únicos são mantidos com tabelas de pares (médico/especialidade, paciente):
+-- o contador só muda quando um par surge ou desaparece.
+-- sp_refresh_rollups() reconstrói tudo; sp_reconciliar_resumo() passa a chamá-la.
+
+ALTER TABLE ResumoEspecialidade
+    ADD COLUMN TotalConsultas BIGINT NOT NULL DEFAULT 0,
+    ADD COLUMN PacientesUnicos BIGINT NOT NULL DEFAULT 0,
+    ADD INDEX idx_resumo_especialidade_consultas (TotalConsultas);
+
+CREATE TABLE ResumoMedico (
+    CodMed CHAR(7) NOT NULL PRIMARY KEY,
+    TotalConsultas BIGINT NOT NULL DEFAULT 0,
+    PacientesUnicos BIGINT NOT NULL DEFAULT 0,
+    INDEX idx_resumo_medico_consultas (TotalConsultas)
+);
+
+CREATE TABLE ResumoMedicoPaciente (
+    CodMed CHAR(7) NOT NULL,
+    CpfPaciente CHAR(14) NOT NULL,
+    Total BIGINT NOT NULL DEFAULT 0,
+    PRIMARY KEY (CodMed, CpfPaciente)
+);
+
+CREATE TABLE ResumoEspecialidadePaciente (
+    Especialidade VARCHAR(30) NOT NULL,
+    CpfPaciente CHAR(14) NOT NULL,
+    Total BIGINT NOT NULL DEFAULT 0,
+    PRIMARY KEY (Especialidade, CpfPaciente)
+);
+
+CREATE OR REPLACE VIEW Vw_QtdeConsultasPorMedico AS
+SELECT
+    m.CodMed,
+    m.NomeMed,
+    m.Especialidade,
+    COALESCE(r.TotalConsultas, 0) AS TotalConsultas
+FROM Medico m
+LEFT JOIN ResumoMedico r ON r.CodMed = m.CodMed;
+
+DELIMITER $$
+-- Aplica +1/-1 consulta do par (médico, paciente) aos rollups
+CREATE PROCEDURE sp_resumo_consulta_delta(IN p_codmed CHAR(7), IN p_cpf CHAR(14), IN p_delta INT)
+BEGIN
+    DECLARE v_esp VARCHAR(30);
+    DECLARE v_total BIGINT DEFAULT 0;
+    DECLARE v_par INT DEFAULT 0;
+
+    SELECT Especialidade INTO v_esp FROM Medico WHERE CodMed = p_codmed;
+
+    INSERT INTO ResumoMedicoPaciente (CodMed, CpfPaciente, Total) VALUES (p_codmed, p_cpf, p_delta)
+    ON DUPLICATE KEY UPDATE Total = Total + p_delta;
+    SELECT Total INTO v_total FROM ResumoMedicoPaciente WHERE CodMed = p_codmed AND CpfPaciente = p_cpf;
+    -- +1 quando o par surge, -1 quando desaparece
+    SET v_par = IF(p_delta > 0, v_total = p_delta, -(v_total <= 0));
+    IF v_total <= 0 THEN
+        DELETE FROM ResumoMedicoPaciente WHERE CodMed = p_codmed AND CpfPaciente = p_cpf;
+    END IF;
+    INSERT INTO ResumoMedico (CodMed, TotalConsultas, PacientesUnicos) VALUES (p_codmed, p_delta, GREATEST(v_par, 0))
+    ON DUPLICATE KEY UPDATE TotalConsultas = TotalConsultas + p_delta, PacientesUnicos = PacientesUnicos + v_par;
+
+    INSERT INTO ResumoEspecialidadePaciente (Especialidade, CpfPaciente, Total) VALUES (v_esp, p_cpf, p_delta)
+    ON DUPLICATE KEY UPDATE Total = Total + p_delta;
+    SELECT Total INTO v_total FROM ResumoEspecialidadePaciente WHERE Especialidade = v_esp AND CpfPaciente = p_cpf;
+    SET v_par = IF(p_delta > 0, v_total = p_delta, -(v_total <= 0));
+    IF v_total <= 0 THEN
+        DELETE FROM ResumoEspecialidadePaciente WHERE Especialidade = v_esp AND CpfPaciente = p_cpf;
+    END IF;
+    INSERT INTO ResumoEspecialidade (Especialidade, TotalConsultas, PacientesUnicos)
+    VALUES (v_esp, p_delta, GREATEST(v_par, 0))
+    ON DUPLICATE KEY UPDATE TotalConsultas = TotalConsultas + p_delta, PacientesUnicos = PacientesUnicos + v_par;
+END $$
+
+-- Desconta as consultas que o ON DELETE CASCADE vai remover (cascata não dispara triggers)
+CREATE PROCEDURE sp_resumo_remover_clinica(IN p_codcli CHAR(7))
+BEGIN
+    DECLARE v_fim INT DEFAULT 0;
+    DECLARE v_codmed CHAR(7);
+    DECLARE v_cpf CHAR(14);
+    DECLARE cur CURSOR FOR SELECT CodMed, CpfPaciente FROM Consulta WHERE CodCli = p_codcli;
+    DECLARE CONTINUE HANDLER FOR NOT FOUND SET v_fim = 1;
+    OPEN cur;
+    laco: LOOP
+        FETCH cur INTO v_codmed, v_cpf;
+        IF v_fim THEN
+            LEAVE laco;
+        END IF;
+        CALL sp_resumo_consulta_delta(v_codmed, v_cpf, -1);
+    END LOOP;
+    CLOSE cur;
+END $$
+
+CREATE PROCEDURE sp_refresh_rollups()
+BEGIN
+    DELETE FROM ResumoMedicoPaciente;
+    INSERT INTO ResumoMedicoPaciente (CodMed, CpfPaciente, Total)
+    SELECT CodMed, CpfPaciente, COUNT(*) FROM Consulta GROUP BY CodMed, CpfPaciente;
+
+    DELETE FROM ResumoMedico;
+    INSERT INTO ResumoMedico (CodMed, TotalConsultas, PacientesUnicos)
+    SELECT m.CodMed, COALESCE(SUM(mp.Total), 0), COUNT(mp.CpfPaciente)
+    FROM Medico m
+    LEFT JOIN ResumoMedicoPaciente mp ON mp.CodMed = m.CodMed
+    GROUP BY m.CodMed;
+
+    DELETE FROM ResumoEspecialidadePaciente;
+    INSERT INTO ResumoEspecialidadePaciente (Especialidade, CpfPaciente, Total)
+    SELECT m.Especialidade, mp.CpfPaciente, SUM(mp.Total)
+    FROM ResumoMedicoPaciente mp
+    INNER JOIN Medico m ON m.CodMed = mp.CodMed
+    GROUP BY m.Especialidade, mp.CpfPaciente;
+
+    UPDATE ResumoEspecialidade SET TotalConsultas = 0, PacientesUnicos = 0;
+    INSERT INTO ResumoEspecialidade (Especialidade, TotalConsultas, PacientesUnicos)
+    SELECT x.Especialidade, x.TotalConsultas, x.PacientesUnicos
+    FROM (
+        SELECT Especialidade, SUM(Total) AS TotalConsultas, COUNT(*) AS PacientesUnicos
+        FROM ResumoEspecialidadePaciente
+        GROUP BY Especialidade
+    ) x
+    ON DUPLICATE KEY UPDATE TotalConsultas = x.TotalConsultas, PacientesUnicos = x.PacientesUnicos;
+END $$
+
+CREATE TRIGGER tg_ranking_consulta_ins
+AFTER INSERT ON Consulta
+FOR EACH ROW
+BEGIN
+    CALL sp_resumo_consulta_delta(NEW.CodMed, NEW.CpfPaciente, 1);
+END $$
+
+CREATE TRIGGER tg_ranking_consulta_upd
+AFTER UPDATE ON Consulta
+FOR EACH ROW
+BEGIN
+    IF NEW.CodMed <> OLD.CodMed OR NEW.CpfPaciente <> OLD.CpfPaciente THEN
+        CALL sp_resumo_consulta_delta(OLD.CodMed, OLD.CpfPaciente, -1);
+        CALL sp_resumo_consulta_delta(NEW.CodMed, NEW.CpfPaciente, 1);
+    END IF;
+END $$
+
+CREATE TRIGGER tg_ranking_consulta_del
+AFTER DELETE ON Consulta
+FOR EACH ROW
+BEGIN
+    CALL sp_resumo_consulta_delta(OLD.CodMed, OLD.CpfPaciente, -1);
+END $$
+
+CREATE TRIGGER tg_ranking_medico_ins
+AFTER INSERT ON Medico
+FOR EACH ROW
+BEGIN
+    INSERT INTO ResumoMedico (CodMed) VALUES (NEW.CodMed);
+END $$
+
+-- Troca de especialidade: move as consultas e os pacientes do médico
+CREATE TRIGGER tg_ranking_medico_upd
+AFTER UPDATE ON Medico
+FOR EACH ROW
+BEGIN
+    IF NEW.Especialidade <> OLD.Especialidade THEN
+        UPDATE ResumoEspecialidade e
+        JOIN ResumoMedico r ON r.CodMed = NEW.CodMed
+        SET e.TotalConsultas = e.TotalConsultas - r.TotalConsultas
+        WHERE e.Especialidade = OLD.Especialidade;
+        INSERT INTO ResumoEspecialidade (Especialidade, TotalConsultas)
+        SELECT NEW.Especialidade, r.TotalConsultas FROM ResumoMedico r WHERE r.CodMed = NEW.CodMed
+        ON DUPLICATE KEY UPDATE TotalConsultas = ResumoEspecialidade.TotalConsultas + r.TotalConsultas;
+
+        UPDATE ResumoEspecialidadePaciente ep
+        JOIN ResumoMedicoPaciente mp ON mp.CpfPaciente = ep.CpfPaciente AND mp.CodMed = NEW.CodMed
+        SET ep.Total = ep.Total - mp.Total
+        WHERE ep.Especialidade = OLD.Especialidade;
+        DELETE FROM ResumoEspecialidadePaciente WHERE Especialidade = OLD.Especialidade AND Total <= 0;
+        INSERT INTO ResumoEspecialidadePaciente (Especialidade, CpfPaciente, Total)
+        SELECT NEW.Especialidade, mp.CpfPaciente, mp.Total FROM ResumoMedicoPaciente mp WHERE mp.CodMed = NEW.CodMed
+        ON DUPLICATE KEY UPDATE Total = ResumoEspecialidadePaciente.Total + mp.Total;
+
+        UPDATE ResumoEspecialidade
+        SET PacientesUnicos = (
+            SELECT COUNT(*) FROM ResumoEspecialidadePaciente WHERE Especialidade = OLD.Especialidade
+        )
+        WHERE Especialidade = OLD.Especialidade;
+        UPDATE ResumoEspecialidade
+        SET PacientesUnicos = (
+            SELECT COUNT(*) FROM ResumoEspecialidadePaciente WHERE Especialidade = NEW.Especialidade
+        )
+        WHERE Especialidade = NEW.Especialidade;
+    END IF;
+END $$
+
+CREATE TRIGGER tg_ranking_medico_del
+AFTER DELETE ON Medico
+FOR EACH ROW
+BEGIN
+    DELETE FROM ResumoMedico WHERE CodMed = OLD.CodMed;
+END $$
+
+CREATE TRIGGER tg_ranking_clinica_del
+BEFORE DELETE ON Clinica
+FOR EACH ROW
+BEGIN
+    CALL sp_resumo_remover_clinica(OLD.CodCli);
+END $$
+
+-- A reconciliação diária não pode mais apagar ResumoEspecialidade (agora guarda os rollups)
+DROP PROCEDURE sp_reconciliar_resumo $$
+CREATE PROCEDURE sp_reconciliar_resumo()
+BEGIN
+    UPDATE ResumoSistema SET
+        TotalPacientes = (SELECT COUNT(*) FROM Paciente),
+        SomaAnoNascimento = (SELECT COALESCE(SUM(YEAR(DataNascimento)), 0) FROM Paciente),
+        TotalMedicos = (SELECT COUNT(*) FROM Medico),
+        TotalClinicas = (SELECT COUNT(*) FROM Clinica),
+        TotalConsultas = (SELECT COUNT(*) FROM Consulta),
+        ReconciliadoEm = NOW()
+    WHERE Id = 1;
+
+    DELETE FROM ResumoConsultaDia;
+    INSERT INTO ResumoConsultaDia (Dia, Total)
+    SELECT DATE(Data_Hora), COUNT(*) FROM Consulta GROUP BY DATE(Data_Hora);
+
+    UPDATE ResumoEspecialidade SET TotalMedicos = 0;
+    INSERT INTO ResumoEspecialidade (Especialidade, TotalMedicos)
+    SELECT x.Especialidade, x.TotalMedicos
+    FROM (
+        SELECT Especialidade, COUNT(*) AS TotalMedicos
+        FROM Medico
+        WHERE Especialidade <> ''
+        GROUP BY Especialidade
+    ) x
+    ON DUPLICATE KEY UPDATE TotalMedicos = x.TotalMedicos;
+
+    CALL sp_refresh_rollups();
+END $$
+DELIMITER ;
+
+CALL sp_reconciliar_resumo();
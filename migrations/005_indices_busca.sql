@@ -0,0 +1,10 @@
+-- Migração 005: índices para a busca por prefixo dos seletores do Streamlit.
+-- `LIKE 'termo%'` e `ORDER BY nome LIMIT n` percorrem só o início do índice,
+-- então o custo da busca não cresce com a tabela. CPF, CodMed e CodCli já
+-- são chaves primárias.
+--   idx_paciente_nome: buscar_pacientes e ORDER BY de get_clientes
+--   idx_medico_nome:   buscar_medicos e ORDER BY de get_medicos
+--   idx_clinica_nome:  buscar_clinicas e ORDER BY de get_clinicas
+ALTER TABLE Paciente ADD INDEX idx_paciente_nome (NomePac);
+ALTER TABLE Medico ADD INDEX idx_medico_nome (NomeMed);
+ALTER TABLE Clinica ADD INDEX idx_clinica_nome (NomeCli);
@@ -0,0 +1,46 @@
+-- Migração 006: prazo máximo de agendamento em tabela.
+-- Os triggers de Consulta e a validação local do MySQLDB
+-- (agenda.PoliticaAgendamento) leem o mesmo valor, então as duas
+-- verificações não divergem. Para mudar o prazo use
+-- MySQLDB.definir_prazo_agendamento(dias) ou atualize PoliticaAgendamento.
+CREATE TABLE PoliticaAgendamento (
+    Id TINYINT NOT NULL PRIMARY KEY,
+    PrazoMaximoDias INT NOT NULL
+);
+
+INSERT INTO PoliticaAgendamento (Id, PrazoMaximoDias) VALUES (1, 60);
+
+-- as versões antigas eram removidas por um DROP com o nome errado (trg_)
+DROP TRIGGER IF EXISTS tg_verifica_intervalo_agendamento;
+DELIMITER $$
+CREATE TRIGGER tg_verifica_intervalo_agendamento
+BEFORE INSERT ON Consulta
+FOR EACH ROW
+BEGIN
+    DECLARE v_prazo INT;
+    DECLARE v_msg VARCHAR(128);
+    SELECT PrazoMaximoDias INTO v_prazo FROM PoliticaAgendamento WHERE Id = 1;
+    IF TIMESTAMPDIFF(DAY, CURDATE(), NEW.Data_Hora) > v_prazo THEN
+        SET v_msg = CONCAT('A consulta só pode ser agendada com no máximo ', v_prazo, ' dias de antecedência.');
+        SIGNAL SQLSTATE '45000'
+            SET MESSAGE_TEXT = v_msg;
+    END IF;
+END $$
+DELIMITER ;
+
+DROP TRIGGER IF EXISTS tg_verifica_intervalo_agendamento_upd;
+DELIMITER $$
+CREATE TRIGGER tg_verifica_intervalo_agendamento_upd
+BEFORE UPDATE ON Consulta
+FOR EACH ROW
+BEGIN
+    DECLARE v_prazo INT;
+    DECLARE v_msg VARCHAR(128);
+    SELECT PrazoMaximoDias INTO v_prazo FROM PoliticaAgendamento WHERE Id = 1;
+    IF TIMESTAMPDIFF(DAY, CURDATE(), NEW.Data_Hora) > v_prazo THEN
+        SET v_msg = CONCAT('A consulta só pode ser agendada com no máximo ', v_prazo, ' dias de antecedência.');
+        SIGNAL SQLSTATE '45000'
+            SET MESSAGE_TEXT = v_msg;
+    END IF;
+END $$
+DELIMITER ;
@@ -0,0 +1,175 @@
+-- Migração 007: ResumoSistema dividido em fatias.
+-- Com uma única linha (Id = 1), todo INSERT/DELETE de Paciente, Medico,
+-- Clinica e Consulta travava a mesma linha até o commit e serializava as
+-- escritas concorrentes. Agora há 16 linhas (Id = fatia, 1..16); cada
+-- conexão atualiza a fatia fn_resumo_fatia() = 1 + CONNECTION_ID() % 16, e a
+-- leitura soma as fatias. sp_reconciliar_resumo() grava os totais na fatia 1
+-- e zera as demais.
+
+INSERT INTO ResumoSistema (Id)
+WITH RECURSIVE fatias (n) AS (SELECT 2 UNION ALL SELECT n + 1 FROM fatias WHERE n < 16)
+SELECT n FROM fatias;
+
+DROP TRIGGER tg_resumo_paciente_ins;
+DROP TRIGGER tg_resumo_paciente_upd;
+DROP TRIGGER tg_resumo_paciente_del;
+DROP TRIGGER tg_resumo_medico_ins;
+DROP TRIGGER tg_resumo_medico_del;
+DROP TRIGGER tg_resumo_clinica_ins;
+DROP TRIGGER tg_resumo_clinica_del;
+DROP TRIGGER tg_resumo_consulta_ins;
+DROP TRIGGER tg_resumo_consulta_del;
+
+DELIMITER $$
+-- Fatia de ResumoSistema desta conexão. Os triggers guardam o valor numa
+-- variável antes do UPDATE: com a função no WHERE o UPDATE varreria (e
+-- travaria) todas as fatias.
+CREATE FUNCTION fn_resumo_fatia() RETURNS TINYINT
+NOT DETERMINISTIC NO SQL
+BEGIN
+    RETURN 1 + CONNECTION_ID() % 16;
+END $$
+
+CREATE TRIGGER tg_resumo_paciente_ins
+AFTER INSERT ON Paciente
+FOR EACH ROW
+BEGIN
+    DECLARE v_fatia TINYINT DEFAULT fn_resumo_fatia();
+    UPDATE ResumoSistema
+    SET TotalPacientes = TotalPacientes + 1,
+        SomaAnoNascimento = SomaAnoNascimento + YEAR(NEW.DataNascimento)
+    WHERE Id = v_fatia;
+END $$
+
+CREATE TRIGGER tg_resumo_paciente_upd
+AFTER UPDATE ON Paciente
+FOR EACH ROW
+BEGIN
+    DECLARE v_fatia TINYINT DEFAULT fn_resumo_fatia();
+    IF NEW.DataNascimento <> OLD.DataNascimento THEN
+        UPDATE ResumoSistema
+        SET SomaAnoNascimento = SomaAnoNascimento + YEAR(NEW.DataNascimento) - YEAR(OLD.DataNascimento)
+        WHERE Id = v_fatia;
+    END IF;
+END $$
+
+CREATE TRIGGER tg_resumo_paciente_del
+AFTER DELETE ON Paciente
+FOR EACH ROW
+BEGIN
+    DECLARE v_fatia TINYINT DEFAULT fn_resumo_fatia();
+    UPDATE ResumoSistema
+    SET TotalPacientes = TotalPacientes - 1,
+        SomaAnoNascimento = SomaAnoNascimento - YEAR(OLD.DataNascimento)
+    WHERE Id = v_fatia;
+END $$
+
+CREATE TRIGGER tg_resumo_medico_ins
+AFTER INSERT ON Medico
+FOR EACH ROW
+BEGIN
+    DECLARE v_fatia TINYINT DEFAULT fn_resumo_fatia();
+    UPDATE ResumoSistema SET TotalMedicos = TotalMedicos + 1 WHERE Id = v_fatia;
+    IF NEW.Especialidade <> '' THEN
+        INSERT INTO ResumoEspecialidade (Especialidade, TotalMedicos) VALUES (NEW.Especialidade, 1)
+        ON DUPLICATE KEY UPDATE TotalMedicos = TotalMedicos + 1;
+    END IF;
+END $$
+
+CREATE TRIGGER tg_resumo_medico_del
+AFTER DELETE ON Medico
+FOR EACH ROW
+BEGIN
+    DECLARE v_fatia TINYINT DEFAULT fn_resumo_fatia();
+    UPDATE ResumoSistema SET TotalMedicos = TotalMedicos - 1 WHERE Id = v_fatia;
+    IF OLD.Especialidade <> '' THEN
+        UPDATE ResumoEspecialidade SET TotalMedicos = TotalMedicos - 1
+        WHERE Especialidade = OLD.Especialidade;
+    END IF;
+END $$
+
+CREATE TRIGGER tg_resumo_clinica_ins
+AFTER INSERT ON Clinica
+FOR EACH ROW
+BEGIN
+    DECLARE v_fatia TINYINT DEFAULT fn_resumo_fatia();
+    UPDATE ResumoSistema SET TotalClinicas = TotalClinicas + 1 WHERE Id = v_fatia;
+END $$
+
+-- O ON DELETE CASCADE de Consulta não dispara triggers; por isso as consultas
+-- da clínica são descontadas aqui, enquanto ainda existem (BEFORE DELETE).
+CREATE TRIGGER tg_resumo_clinica_del
+BEFORE DELETE ON Clinica
+FOR EACH ROW
+BEGIN
+    DECLARE v_fatia TINYINT DEFAULT fn_resumo_fatia();
+    UPDATE ResumoConsultaDia d
+    JOIN (
+        SELECT DATE(Data_Hora) AS Dia, COUNT(*) AS Total
+        FROM Consulta
+        WHERE CodCli = OLD.CodCli
+        GROUP BY DATE(Data_Hora)
+    ) x ON x.Dia = d.Dia
+    SET d.Total = d.Total - x.Total;
+    UPDATE ResumoSistema
+    SET TotalClinicas = TotalClinicas - 1,
+        TotalConsultas = TotalConsultas - (SELECT COUNT(*) FROM Consulta WHERE CodCli = OLD.CodCli)
+    WHERE Id = v_fatia;
+END $$
+
+CREATE TRIGGER tg_resumo_consulta_ins
+AFTER INSERT ON Consulta
+FOR EACH ROW
+BEGIN
+    DECLARE v_fatia TINYINT DEFAULT fn_resumo_fatia();
+    UPDATE ResumoSistema SET TotalConsultas = TotalConsultas + 1 WHERE Id = v_fatia;
+    INSERT INTO ResumoConsultaDia (Dia, Total) VALUES (DATE(NEW.Data_Hora), 1)
+    ON DUPLICATE KEY UPDATE Total = Total + 1;
+END $$
+
+CREATE TRIGGER tg_resumo_consulta_del
+AFTER DELETE ON Consulta
+FOR EACH ROW
+BEGIN
+    DECLARE v_fatia TINYINT DEFAULT fn_resumo_fatia();
+    UPDATE ResumoSistema SET TotalConsultas = TotalConsultas - 1 WHERE Id = v_fatia;
+    UPDATE ResumoConsultaDia SET Total = Total - 1 WHERE Dia = DATE(OLD.Data_Hora);
+END $$
+
+DROP PROCEDURE sp_reconciliar_resumo $$
+CREATE PROCEDURE sp_reconciliar_resumo()
+BEGIN
+    UPDATE ResumoSistema SET
+        TotalPacientes = 0,
+        SomaAnoNascimento = 0,
+        TotalMedicos = 0,
+        TotalClinicas = 0,
+        TotalConsultas = 0
+    WHERE Id <> 1;
+    UPDATE ResumoSistema SET
+        TotalPacientes = (SELECT COUNT(*) FROM Paciente),
+        SomaAnoNascimento = (SELECT COALESCE(SUM(YEAR(DataNascimento)), 0) FROM Paciente),
+        TotalMedicos = (SELECT COUNT(*) FROM Medico),
+        TotalClinicas = (SELECT COUNT(*) FROM Clinica),
+        TotalConsultas = (SELECT COUNT(*) FROM Consulta),
+        ReconciliadoEm = NOW()
+    WHERE Id = 1;
+
+    DELETE FROM ResumoConsultaDia;
+    INSERT INTO ResumoConsultaDia (Dia, Total)
+    SELECT DATE(Data_Hora), COUNT(*) FROM Consulta GROUP BY DATE(Data_Hora);
+
+    UPDATE ResumoEspecialidade SET TotalMedicos = 0;
+    INSERT INTO ResumoEspecialidade (Especialidade, TotalMedicos)
+    SELECT x.Especialidade, x.TotalMedicos
+    FROM (
+        SELECT Especialidade, COUNT(*) AS TotalMedicos
+        FROM Medico
+        WHERE Especialidade <> ''
+        GROUP BY Especialidade
+    ) x
+    ON DUPLICATE KEY UPDATE TotalMedicos = x.TotalMedicos;
+
+    CALL sp_refresh_rollups();
+END $$
+DELIMITER ;
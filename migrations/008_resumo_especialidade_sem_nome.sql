@@ -0,0 +1,83 @@
+-- Migração 008: médicos sem especialidade ('') também entram em ResumoEspecialidade.
+-- Os triggers de Medico ignoravam Especialidade = '', mas as consultas desses
+-- médicos já eram somadas na linha '' por sp_resumo_consulta_delta; o ranking
+-- de get_especialidades_mais_procuradas mostrava "Não especificada" com 0
+-- médicos ou a escondia. Agora todo médico é contado, como no GROUP BY sobre
+-- Medico que o rollup substituiu; especialidades_disponiveis continua
+-- desconsiderando ''.
+
+DROP TRIGGER tg_resumo_medico_ins;
+DROP TRIGGER tg_resumo_medico_upd;
+DROP TRIGGER tg_resumo_medico_del;
+
+DELIMITER $$
+CREATE TRIGGER tg_resumo_medico_ins
+AFTER INSERT ON Medico
+FOR EACH ROW
+BEGIN
+    DECLARE v_fatia TINYINT DEFAULT fn_resumo_fatia();
+    UPDATE ResumoSistema SET TotalMedicos = TotalMedicos + 1 WHERE Id = v_fatia;
+    INSERT INTO ResumoEspecialidade (Especialidade, TotalMedicos) VALUES (NEW.Especialidade, 1)
+    ON DUPLICATE KEY UPDATE TotalMedicos = TotalMedicos + 1;
+END $$
+
+CREATE TRIGGER tg_resumo_medico_upd
+AFTER UPDATE ON Medico
+FOR EACH ROW
+BEGIN
+    IF NEW.Especialidade <> OLD.Especialidade THEN
+        UPDATE ResumoEspecialidade SET TotalMedicos = TotalMedicos - 1
+        WHERE Especialidade = OLD.Especialidade;
+        INSERT INTO ResumoEspecialidade (Especialidade, TotalMedicos) VALUES (NEW.Especialidade, 1)
+        ON DUPLICATE KEY UPDATE TotalMedicos = TotalMedicos + 1;
+    END IF;
+END $$
+
+CREATE TRIGGER tg_resumo_medico_del
+AFTER DELETE ON Medico
+FOR EACH ROW
+BEGIN
+    DECLARE v_fatia TINYINT DEFAULT fn_resumo_fatia();
+    UPDATE ResumoSistema SET TotalMedicos = TotalMedicos - 1 WHERE Id = v_fatia;
+    UPDATE ResumoEspecialidade SET TotalMedicos = TotalMedicos - 1
+    WHERE Especialidade = OLD.Especialidade;
+END $$
+
+DROP PROCEDURE sp_reconciliar_resumo $$
+CREATE PROCEDURE sp_reconciliar_resumo()
+BEGIN
+    UPDATE ResumoSistema SET
+        TotalPacientes = 0,
+        SomaAnoNascimento = 0,
+        TotalMedicos = 0,
+        TotalClinicas = 0,
+        TotalConsultas = 0
+    WHERE Id <> 1;
+    UPDATE ResumoSistema SET
+        TotalPacientes = (SELECT COUNT(*) FROM Paciente),
+        SomaAnoNascimento = (SELECT COALESCE(SUM(YEAR(DataNascimento)), 0) FROM Paciente),
+        TotalMedicos = (SELECT COUNT(*) FROM Medico),
+        TotalClinicas = (SELECT COUNT(*) FROM Clinica),
+        TotalConsultas = (SELECT COUNT(*) FROM Consulta),
+        ReconciliadoEm = NOW()
+    WHERE Id = 1;
+
+    DELETE FROM ResumoConsultaDia;
+    INSERT INTO ResumoConsultaDia (Dia, Total)
+    SELECT DATE(Data_Hora), COUNT(*) FROM Consulta GROUP BY DATE(Data_Hora);
+
+    UPDATE ResumoEspecialidade SET TotalMedicos = 0;
+    INSERT INTO ResumoEspecialidade (Especialidade, TotalMedicos)
+    SELECT x.Especialidade, x.TotalMedicos
+    FROM (
+        SELECT Especialidade, COUNT(*) AS TotalMedicos
+        FROM Medico
+        GROUP BY Especialidade
+    ) x
+    ON DUPLICATE KEY UPDATE TotalMedicos = x.TotalMedicos;
+
+    CALL sp_refresh_rollups();
+END $$
+DELIMITER ;
+
+CALL sp_reconciliar_resumo();
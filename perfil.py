@@ -0,0 +1,141 @@
+"""
+Perfil de uma renderização do Streamlit (modo opcional da barra lateral).
+
+Cada rerun roda numa thread do Streamlit; `perfilar()` guarda o PerfilRender
+ativo num threading.local, e `etapa(tipo, rotulo)` mede um trecho só quando
+há perfil ativo nesta thread. Fora do modo de perfil o custo é um getattr.
+"""
+
+import contextlib
+import cProfile
+import io
+import os
+import pstats
+import threading
+import time
+from datetime import datetime
+
+_atual = threading.local()
+
+
+class PerfilRender:
+    """Etapas medidas numa renderização, com início relativo ao começo do rerun."""
+
+    LARGURA_BARRA = 40
+
+    def __init__(self, nome=''):
+        self.nome = nome
+        self.inicio = time.perf_counter()
+        self.fim = None
+        self.etapas = []  # (tipo, rotulo, inicio_s, duracao_s, erro)
+        self.arquivo_cprofile = None
+        self.resumo_cprofile = None
+
+    def registrar(self, tipo, rotulo, inicio, duracao, erro=False):
+        """`inicio` em perf_counter(); `duracao` em segundos."""
+        self.etapas.append((tipo, rotulo, inicio - self.inicio, duracao, erro))
+
+    @property
+    def total(self):
+        return (self.fim or time.perf_counter()) - self.inicio
+
+    def cascata(self):
+        """
+        Linhas da tabela em cascata: cada etapa com início, duração, % do
+        total e uma barra posicionada no tempo do rerun.
+        """
+        total = self.total or 1e-9
+        linhas = []
+        for i, (tipo, rotulo, inicio, duracao, erro) in enumerate(sorted(self.etapas, key=lambda e: e[2]), 1):
+            deslocamento = int(inicio / total * self.LARGURA_BARRA)
+            largura = max(1, round(duracao / total * self.LARGURA_BARRA))
+            linhas.append({
+                '#': i,
+                'tipo': tipo,
+                'etapa': rotulo + (' (erro)' if erro else ''),
+                'início (ms)': round(inicio * 1000, 2),
+                'duração (ms)': round(duracao * 1000, 2),
+                '% do total': round(duracao / total * 100, 1),
+                'cascata': '·' * deslocamento + '█' * largura,
+            })
+        return linhas
+
+    def por_tipo(self):
+        """Tempo somado por tipo de etapa e o restante do rerun (widgets, markdown...)."""
+        somas = {}
+        for tipo, _, _, duracao, _ in self.etapas:
+            qtd, soma = somas.get(tipo, (0, 0.0))
+            somas[tipo] = (qtd + 1, soma + duracao)
+        total = self.total
+        linhas = [{'tipo': tipo, 'etapas': qtd, 'duração (ms)': round(soma * 1000, 2),
+                   '% do total': round(soma / total * 100, 1) if total else 0.0}
+                  for tipo, (qtd, soma) in sorted(somas.items(), key=lambda kv: -kv[1][1])]
+        # etapas aninhadas (ex.: consulta dentro de um get_*) não são descontadas
+        medido = sum(soma for _, soma in somas.values())
+        linhas.append({'tipo': 'restante', 'etapas': None,
+                       'duração (ms)': round(max(total - medido, 0.0) * 1000, 2),
+                       '% do total': round(max(total - medido, 0.0) / total * 100, 1) if total else 0.0})
+        return linhas
+
+
+def ativo():
+    """PerfilRender da renderização em curso nesta thread, ou None."""
+    return getattr(_atual, 'perfil', None)
+
+
+def registrar(tipo, rotulo, inicio, duracao, erro=False):
+    """Registra no perfil ativo uma etapa já medida (ex.: pelo MySQLDB)."""
+    perfil = ativo()
+    if perfil is not None:
+        perfil.registrar(tipo, rotulo, inicio, duracao, erro)
+
+
+@contextlib.contextmanager
+def etapa(tipo, rotulo=''):
+    """Mede o bloco como uma etapa do perfil ativo (sem efeito se não houver)."""
+    perfil = ativo()
+    if perfil is None:
+        yield
+        return
+    inicio = time.perf_counter()
+    erro = True
+    try:
+        yield
+        erro = False
+    finally:
+        perfil.registrar(tipo, rotulo, inicio, time.perf_counter() - inicio, erro)
+
+
+@contextlib.contextmanager
+def perfilar(nome, diretorio_cprofile=None, linhas_resumo=25):
+    """
+    Ativa um PerfilRender nesta thread durante o bloco. Com
+    `diretorio_cprofile`, roda também o cProfile e grava
+    <diretorio>/<nome>-<data-hora>.prof (abra com pstats ou snakeviz).
+    """
+    perfil = PerfilRender(nome)
+    anterior = ativo()
+    _atual.perfil = perfil
+    profiler = cProfile.Profile() if diretorio_cprofile else None
+    if profiler is not None:
+        try:
+            profiler.enable()
+        except ValueError as e:
+            # só um profiler por processo: outra sessão já está usando o cProfile
+            perfil.resumo_cprofile = f"cProfile indisponível: {e}"
+            profiler = None
+    try:
+        yield perfil
+    finally:
+        if profiler is not None:
+            profiler.disable()
+        perfil.fim = time.perf_counter()
+        _atual.perfil = anterior
+        if profiler is not None:
+            os.makedirs(diretorio_cprofile, exist_ok=True)
+            caminho = os.path.join(diretorio_cprofile, f"{nome}-{datetime.now():%Y%m%d-%H%M%S-%f}.prof")
+            profiler.dump_stats(caminho)
+            saida = io.StringIO()
+            pstats.Stats(profiler, stream=saida).sort_stats('cumulative').print_stats(linhas_resumo)
+            perfil.arquivo_cprofile = caminho
+            perfil.resumo_cprofile = saida.getvalue()
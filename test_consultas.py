@@ -233,6 +233,110 @@ class TestConsultas:
         except Exception as e:
             logger.error(f"ERRO no CRUD Consultas: {e}")
 
+    def test_insercao_lote(self):
+        """Testa inserção em lote de clínicas"""
+        self.separador("TESTE: INSERÇÃO EM LOTE")
+
+        try:
+            logger.info(">> Testando create_clinicas_lote com um registro inválido...")
+            registros = [
+                {"codcli": "LOT0001", "nome": "Lote Um", "endereco": "Rua Lote, 1",
+                 "telefone": "(81) 3000-0001", "email": "lote1@mail.com"},
+                {"codcli": "LOT0002", "nome": "Lote Dois", "endereco": "Rua Lote, 2",
+                 "telefone": "3000-0002", "email": "lote2@mail.com"},
+                {"codcli": "LOT0003", "nome": "Lote Três", "endereco": "Rua Lote, 3",
+                 "telefone": "(81) 3000-0003", "email": "lote3@mail.com"},
+            ]
+            relatorio = self.db.create_clinicas_lote(registros, chunk_size=2)
+            self.print_resultados(relatorio, "Relatório do lote")
+            if relatorio['inseridos'] == 2 and [e['linha'] for e in relatorio['erros']] == [1]:
+                logger.info("OK - Lote inserido e erro atribuído à linha correta")
+            else:
+                logger.error("ERRO - Relatório do lote inesperado")
+
+            for codcli in ("LOT0001", "LOT0003"):
+                self.db.delete_clinica(codcli)
+            logger.info("OK - Clínicas do lote removidas")
+
+        except Exception as e:
+            logger.error(f"ERRO na inserção em lote: {e}")
+
+    def test_transacao(self):
+        """Testa transaction(): rollback total e savepoint aninhado"""
+        self.separador("TESTE: TRANSAÇÕES")
+
+        def clinica(codcli):
+            return {"codcli": codcli, "nome": f"Clínica {codcli}", "endereco": "Rua TX, 1",
+                    "telefone": "(81) 3000-0000", "email": f"{codcli.lower()}@mail.com"}
+
+        try:
+            logger.info(">> Testando rollback da transação inteira...")
+            try:
+                with self.db.transaction():
+                    self.db.create_clinica(**clinica("TXA0001"))
+                    raise RuntimeError("falha simulada")
+            except RuntimeError:
+                pass
+            if self.db.get_clinica_por_id("TXA0001") is None:
+                logger.info("OK - Escrita desfeita pelo rollback")
+            else:
+                logger.error("ERRO - Clínica persistiu após rollback")
+
+            logger.info(">> Testando savepoint aninhado...")
+            with self.db.transaction():
+                self.db.create_clinica(**clinica("TXB0001"))
+                try:
+                    with self.db.transaction():
+                        self.db.create_clinica(**clinica("TXB0002"))
+                        raise RuntimeError("falha no bloco interno")
+                except RuntimeError:
+                    pass
+            externa = self.db.get_clinica_por_id("TXB0001")
+            interna = self.db.get_clinica_por_id("TXB0002")
+            if externa is not None and interna is None:
+                logger.info("OK - Só o bloco interno foi desfeito")
+            else:
+                logger.error("ERRO - Savepoint não isolou o bloco interno")
+            if externa is not None:
+                self.db.delete_clinica("TXB0001")
+
+        except Exception as e:
+            logger.error(f"ERRO nas transações: {e}")
+
+    def test_busca_nomes(self):
+        """Testa a busca aproximada por nome e a atualização incremental do índice"""
+        self.separador("TESTE: BUSCA POR NOME")
+
+        try:
+            cpf_teste = "987.654.321-00"
+            self.db.create_cliente(
+                cpf=cpf_teste,
+                nome="Fernanda Quitéria Busca",
+                data_nascimento="1985-03-10",
+                genero="F",
+                telefone="(81) 97777-7777",
+                email="fernanda.busca@email.com"
+            )
+
+            logger.info(">> Testando busca por prefixo e com erro de digitação...")
+            for texto in ("ferna quit", "fernnda quiteria"):
+                resultados = self.db.buscar_nomes(texto, tipo='paciente')
+                self.print_resultados(resultados, f"Busca '{texto}'")
+                if any(r['chave'] == cpf_teste for r in resultados):
+                    logger.info(f"OK - '{texto}' encontrou o paciente")
+                else:
+                    logger.error(f"ERRO - '{texto}' não encontrou o paciente")
+
+            logger.info(">> Testando remoção do índice após DELETE...")
+            self.db.delete_cliente(cpf=cpf_teste)
+            if any(r['chave'] == cpf_teste for r in self.db.buscar_nomes("quiteria busca")):
+                logger.error("ERRO - Paciente excluído ainda aparece na busca")
+            else:
+                logger.info("OK - Paciente excluído saiu do índice")
+
+        except Exception as e:
+            logger.error(f"ERRO na busca por nome: {e}")
+
     # ========================================
     # TESTES DE CONSULTAS NÃO TRIVIAIS (BONIFICAÇÃO)
     # ========================================
@@ -366,6 +470,21 @@ class TestConsultas:
         except Exception as e:
             logger.error(f"ERRO: {e}")
 
+    def test_metricas(self):
+        """Testa as métricas de _execute por método"""
+        self.separador("TESTE: MÉTRICAS DE CONSULTAS")
+
+        try:
+            metodos = self.db.metrics()['metodos']
+            for nome in ('get_estatisticas_por_clinica', 'get_resumo_geral_sistema'):
+                m = metodos.get(nome)
+                if m and m['chamadas'] >= 1 and sum(m['histograma'].values()) == m['chamadas']:
+                    logger.info(f"OK - {nome}: {m['chamadas']} chamada(s), média {m['media_ms']} ms, p95 {m['p95_ms']} ms")
+                else:
+                    logger.error(f"ERRO - Métricas ausentes ou inconsistentes para {nome}: {m}")
+        except Exception as e:
+            logger.error(f"ERRO: {e}")
+
     def test_historico_paciente(self):
         """Testa histórico de paciente"""
         self.separador("TESTE: HISTÓRICO DE PACIENTE")
@@ -413,6 +532,29 @@ class TestConsultas:
         except ValidationError as e:
             logger.info(f"OK - Validação funcionou: {e}")
 
+        # Teste validação em lote (máscara de erros por linha)
+        logger.info(">> Testando validação de colunas em lote...")
+        mascaras = self.db.validar_colunas(
+            cpf=["529.982.247-25", "529.982.247-24", "123"],
+            telefone=["(81) 99999-9999", "(81) 99999-9999", "(81) 99999-9999"],
+            email=["a@b.com", "", "invalido"],
+            verificar_digitos_cpf=True
+        )
+        if mascaras['invalido'] == [False, True, True]:
+            logger.info("OK - Máscara de erros correta")
+        else:
+            logger.error(f"ERRO - Máscara inesperada: {mascaras}")
+
+        # Teste prazo de agendamento (mesma regra do trigger, validada antes do banco)
+        logger.info(">> Testando prazo de agendamento local...")
+        try:
+            prazo = self.db.politica_agendamento().prazo_dias
+            self.db.create_pedido("0000001", "5793149", "012.345.678-90",
+                                  datetime.now() + timedelta(days=prazo + 2))
+            logger.error("ERRO - Validação não detectou agendamento fora do prazo!")
+        except ValidationError as e:
+            logger.info(f"OK - Validação funcionou: {e}")
+
     def executar_todos_testes(self):
         """Executa todos os testes"""
         logger.info("\n\n")
@@ -427,6 +569,9 @@ class TestConsultas:
             self.test_crud_clinicas()
             self.test_crud_medicos()
             self.test_crud_consultas()
+            self.test_insercao_lote()
+            self.test_transacao()
+            self.test_busca_nomes()
 
             # Testes de Consultas Não Triviais (Bonificação)
             logger.info("\n[FASE 2] TESTES DE CONSULTAS NÃO TRIVIAIS (BONIFICAÇÃO)")
@@ -441,6 +586,7 @@ class TestConsultas:
             self.test_consultas_proximas()
             self.test_resumo_geral()
             self.test_historico_paciente()
+            self.test_metricas()
 
             # Testes de Validações
             logger.info("\n[FASE 3] TESTES DE VALIDAÇÕES")